@@ -1,17 +1,21 @@
 import sys
 import os
-import tqdm
-from PySide6 import QtWidgets
 import numpy as np
 
-from config_modern import Config
-from grid_widget_modern import GridWidget
+from gh_engine import write_step_counts
+from gh_frontier import FrontierGreenbergHastingsEngine
 
 NUM_STEPS = 1000
 INITIAL_DENSITY = 0.15
 REFRACTORY_PERIODS = 2
 
 def run_batch_simulation():
+    # Qt, el widget y tqdm solo hacen falta en el modo con ventana, --cpu funciona sin ellos
+    import tqdm
+    from PySide6 import QtWidgets
+    from config_modern import Config
+    from grid_widget_modern import GridWidget
+
     app = QtWidgets.QApplication(sys.argv)
 
     print("Selecciona la carpeta donde se guardarán los archivos CSV:")
@@ -73,5 +77,23 @@ def run_batch_simulation():
     widget.release_resources()
     app.quit()
 
+def run_batch_simulation_cpu(save_directory):
+    """
+    Mismo experimento con el motor que solo recorre el frente (gh_frontier), sin ventana ni GPU:
+        python Replicate_GH.py --cpu <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+
+    engine = FrontierGreenbergHastingsEngine(500, 500, refractory_period=REFRACTORY_PERIODS,
+                                             threshold=1, neighborhood='Von Neumann')
+    engine.replicate_pattern()
+
+    filename = f"GH_size{engine.width}x{engine.height}_Replicate_GH.csv"
+    write_step_counts(os.path.join(save_directory, filename), engine.run(NUM_STEPS))
+    print("Experimento completado.")
+
 if __name__ == "__main__":
-    run_batch_simulation()
\ No newline at end of file
+    if len(sys.argv) > 2 and sys.argv[1] == '--cpu':
+        run_batch_simulation_cpu(sys.argv[2])
+    else:
+        run_batch_simulation()
\ No newline at end of file
@@ -2,12 +2,18 @@ from numpy._core.numeric import full
 import sys
 import os
 import time
-import tqdm
-from PySide6 import QtWidgets
+from types import SimpleNamespace
 import numpy as np
 
-from config_modern import Config
-from grid_widget_modern import GridWidget
+# Los modos --cpu solo necesitan NumPy: Qt, el widget y la GPU se importan dentro de
+# las funciones que los usan, y sin tqdm no se muestra la barra de progreso
+try:
+    import tqdm
+except ImportError:
+    tqdm = None
+
+from gh_engine import write_step_counts
+from gh_frontier import FrontierGreenbergHastingsEngine
 
 NUM_STEPS = 2000
 
@@ -18,7 +24,18 @@ GRID_SIZES = np.linspace(100, 2000, 20, dtype=int)
 SINGLE_GRID = 500
 REPETITIONS = 10
 
+def progress_bar(total: int, desc: str = "Experimentos completados"):
+    """
+    Barra de progreso de tqdm, o una que no hace nada si tqdm no esta instalado
+    """
+    if tqdm is None:
+        return SimpleNamespace(update=lambda n=1: None, close=lambda: None)
+    return tqdm.tqdm(total=total, desc=desc)
+
 def run_batch_simulation():
+    from PySide6 import QtWidgets
+    from config_modern import Config
+    from grid_widget_modern import GridWidget
 
     app = QtWidgets.QApplication(sys.argv)
 
@@ -36,7 +53,7 @@ def run_batch_simulation():
 
     total_experiments = len(REFRACTORY_PERIODS) * len(GRID_SIZES)
     # Barra de progreso
-    pbar = tqdm.tqdm(total=total_experiments, desc="Experimentos completados")
+    pbar = progress_bar(total_experiments)
 
     for grid_size in GRID_SIZES:
         # Configuracion inicial, solo importa el tamaño del grid y la velocidad, 
@@ -81,6 +98,9 @@ def run_batch_simulation():
     app.quit()
 
 def run_single_size_simulation():
+    from PySide6 import QtWidgets
+    from config_modern import Config
+    from grid_widget_modern import GridWidget
 
     app = QtWidgets.QApplication(sys.argv)
 
@@ -98,7 +118,7 @@ def run_single_size_simulation():
 
     total_experiments = len(REFRACTORY_PERIODS) * REPETITIONS
     # Barra de progreso
-    pbar = tqdm.tqdm(total=total_experiments, desc="Experimentos completados")
+    pbar = progress_bar(total_experiments)
 
     for repetition in range(REPETITIONS):
         grid_size = SINGLE_GRID
@@ -143,5 +163,102 @@ def run_single_size_simulation():
     print("Todos los experimentos han sido completados.")
     app.quit()
 
+def run_batch_simulation_cpu(save_directory):
+    """
+    Mismo barrido que run_batch_simulation pero con el motor que solo recorre el frente (gh_frontier).
+    No necesita ventana ni GPU, se puede lanzar en maquinas sin pantalla:
+        python automate_spiral_experiment.py --cpu-batch <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    total_experiments = len(REFRACTORY_PERIODS) * len(GRID_SIZES)
+    pbar = progress_bar(total_experiments)
+
+    for grid_size in GRID_SIZES:
+        for refractory_period in REFRACTORY_PERIODS:
+            engine = FrontierGreenbergHastingsEngine(grid_size, grid_size, refractory_period=refractory_period,
+                                                     threshold=1, neighborhood='Von Neumann')
+            engine.randomize(INITIAL_DENSITY)
+
+            density_percent = int(INITIAL_DENSITY * 100)
+            filename = f"GH_size{grid_size}x{grid_size}_density{density_percent}_refr{refractory_period}.csv"
+            write_step_counts(os.path.join(save_directory, filename), engine.run(NUM_STEPS))
+            pbar.update(1)
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+def run_single_size_simulation_cpu(save_directory):
+    """
+    Mismo experimento que run_single_size_simulation con el motor de NumPy:
+        python automate_spiral_experiment.py --cpu <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    total_experiments = len(REFRACTORY_PERIODS) * REPETITIONS
+    pbar = progress_bar(total_experiments)
+
+    for repetition in range(REPETITIONS):
+        grid_size = SINGLE_GRID
+        for refractory_period in REFRACTORY_PERIODS:
+            engine = FrontierGreenbergHastingsEngine(grid_size, grid_size, refractory_period=refractory_period,
+                                                     threshold=1, neighborhood='Von Neumann')
+            engine.randomize(INITIAL_DENSITY)
+
+            density_percent = int(INITIAL_DENSITY * 100)
+            filename = f"GH_size{grid_size}x{grid_size}_density{density_percent}_refr{refractory_period}_run{repetition}.csv"
+            write_step_counts(os.path.join(save_directory, filename), engine.run(NUM_STEPS))
+            pbar.update(1)
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+def run_single_size_simulation_gpu_ensemble(save_directory):
+    """
+    Mismo experimento que run_single_size_simulation, pero todos los periodos refractarios
+    de una repeticion se avanzan a la vez en un atlas de la GPU (un render por paso, ver
+    gh_ensemble_gpu). Sin ventana:
+        python automate_spiral_experiment.py --gpu-ensemble <carpeta>
+    """
+    from gh_ensemble_gpu import GHEnsembleSimulator, create_headless_context, max_layers
+
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    grid_size = SINGLE_GRID
+    density_percent = int(INITIAL_DENSITY * 100)
+    ctx = create_headless_context()
+    # Si no caben todos los periodos en una textura se hacen por grupos
+    group_size = max_layers(ctx, grid_size, grid_size)
+    groups = [REFRACTORY_PERIODS[start:start + group_size] for start in range(0, len(REFRACTORY_PERIODS), group_size)]
+
+    pbar = progress_bar(len(REFRACTORY_PERIODS) * REPETITIONS)
+    try:
+        for repetition in range(REPETITIONS):
+            for refractory_periods in groups:
+                simulator = GHEnsembleSimulator(grid_size, grid_size, refractory_periods, thresholds=1,
+                                                neighborhood='Von Neumann', ctx=ctx)
+                try:
+                    simulator.randomize(INITIAL_DENSITY)
+                    counts = simulator.run(NUM_STEPS)
+                finally:
+                    simulator.release_resources()
+
+                for layer, refractory_period in enumerate(refractory_periods):
+                    filename = f"GH_size{grid_size}x{grid_size}_density{density_percent}_refr{refractory_period}_run{repetition}.csv"
+                    write_step_counts(os.path.join(save_directory, filename), counts[:, layer])
+                pbar.update(len(refractory_periods))
+    finally:
+        ctx.release()
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
 if __name__ == "__main__":
-    run_single_size_simulation()
\ No newline at end of file
+    if len(sys.argv) > 2 and sys.argv[1] == '--gpu-ensemble':
+        run_single_size_simulation_gpu_ensemble(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--cpu':
+        run_single_size_simulation_cpu(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--cpu-batch':
+        run_batch_simulation_cpu(sys.argv[2])
+    else:
+        run_single_size_simulation()
\ No newline at end of file
@@ -17,11 +17,11 @@ class ConfigTab(QtWidgets.QDialog):
         config_to_use = actual_config if actual_config else Config()
 
         self.height_spinbox = QtWidgets.QSpinBox()
-        self.height_spinbox.setRange(2, 5000)
+        self.height_spinbox.setRange(2, 8192)
         self.height_spinbox.setValue(config_to_use.grid_height)
 
         self.width_spinbox = QtWidgets.QSpinBox()
-        self.width_spinbox.setRange(2, 5000)
+        self.width_spinbox.setRange(2, 8192)
         self.width_spinbox.setValue(config_to_use.grid_width)
 
         self.init_pattern_combo = QtWidgets.QComboBox()
@@ -56,7 +56,7 @@ class ConfigTab(QtWidgets.QDialog):
         self.threshold_title_label = QtWidgets.QLabel("Umbral de excitación:")
 
         self.refractory_period_spinbox = QtWidgets.QSpinBox()
-        self.refractory_period_spinbox.setRange(1, 100)
+        self.refractory_period_spinbox.setRange(1, 1000) # Hasta 127 cabe en R8UI, por encima R16UI
         self.refractory_period_spinbox.setValue(config_to_use.refractory_period)
         self.refractory_period_spinbox.setSuffix(" Iteraciones")
         self.refractory_period_title_label = QtWidgets.QLabel("Periodo refractario:")
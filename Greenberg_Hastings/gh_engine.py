@@ -0,0 +1,246 @@
+"""
+Motor de Greenberg-Hastings en CPU con NumPy.
+
+Hace lo mismo que shaders/greenberg_h.glsl sin ventana ni contexto de OpenGL, para
+poder lanzar los barridos en maquinas sin pantalla:
+    - El estado es una cuenta atras entera: 0 reposo, R (periodo refractario)
+      excitada y 1..R-1 refractaria. Cada paso las celdas no en reposo bajan uno.
+    - Una celda en reposo se excita si tiene al menos threshold vecinos excitados
+      (Moore, 8 vecinos, o Von Neumann, 4 vecinos).
+    - Los bordes no son periodicos: los vecinos fuera del grid no cuentan.
+    - Las celdas bloqueadas no cambian, y si estan excitadas excitan a sus vecinas.
+
+Los vecinos excitados se suman con cortes desplazados de la matriz, sin bucles por
+celda. Las matrices estan en el orden de la textura (fila 0 abajo), asi que se pueden
+comparar directamente con GridWidget.read_state.
+
+Tambien estan aqui la codificacion del estado en la textura (R8UI o R16UI con el bit
+alto para las celdas bloqueadas), los estados iniciales y la lectura de shaders, que
+usan GridWidget y GHEnsembleSimulator.
+"""
+
+import csv
+import os
+from pathlib import Path
+
+import numpy as np
+
+STATE_REST = 0
+MAX_U8_REFRACTORY = 0x7F
+MOORE = 'Moore (8)' # Nombre del vecindario de Moore en la configuracion (el resto es Von Neumann)
+CSV_HEADER = ['Step', 'Active_cells', 'Refractory_cells', 'Resting_cells'] # Igual que GridWidget.init_csv_buffer
+
+# Reduccion en la GPU para contar las celdas excitadas y refractarias: cada pasada suma
+# bloques de REDUCE_BLOCK x REDUCE_BLOCK y el resultado final se guarda en un buffer
+# circular de COUNT_RING_SIZE pasos que se lee de golpe
+REDUCE_BLOCK = 16
+COUNT_RING_SIZE = 1024
+
+
+def load_shader_source(shader_file: str) -> str:
+    """
+    Lee el contenido de un archivo de shader
+    """
+    shader_path = Path(__file__).parent / shader_file
+    try:
+        with open(shader_path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Error Crítico: No se pudo encontrar el archivo de shader: {shader_path}")
+
+
+def state_dtype(refractory_period: int) -> str:
+    """
+    Tipo de la textura de estado en el que cabe la cuenta atras del periodo refractario
+    """
+    return 'u1' if refractory_period <= MAX_U8_REFRACTORY else 'u2'
+
+
+def blocked_bit(dtype: str) -> int:
+    return 0x80 if dtype == 'u1' else 0x8000
+
+
+def neighborhood_index(neighborhood: str) -> int:
+    """
+    Valor de u_neighborhood en el shader: 0 para Moore, 1 para Von Neumann
+    """
+    return 0 if neighborhood == MOORE else 1
+
+
+def countdown_from_voltage(v, refractory_period: int) -> np.ndarray:
+    """
+    Cuenta atras equivalente a un voltaje del modelo en float (1 excitada, 0 reposo,
+    bajando 1/R por paso): los pasos que le quedan para llegar al reposo
+    """
+    v = np.asarray(v, dtype=np.float64)
+    countdown = np.minimum(np.ceil(v * refractory_period - 1e-6), refractory_period - 1)
+    return np.where(v >= 1.0, refractory_period, np.maximum(countdown, STATE_REST)).astype(np.int64)
+
+
+def rescale_countdowns(countdowns, old_refractory_period: int, new_refractory_period: int) -> np.ndarray:
+    """
+    Pasa una cuenta atras de un periodo refractario a otro: las excitadas siguen excitadas,
+    las de reposo en reposo y las refractarias conservan la parte del periodo que les
+    queda, redondeada hacia arriba y dentro de 1..R-1 (con R = 1 no hay refractarias y
+    pasan a reposo)
+    """
+    countdowns = np.asarray(countdowns, dtype=np.int64)
+    scaled = -(-countdowns * new_refractory_period // old_refractory_period) # Division redondeando hacia arriba
+    refractory = np.minimum(np.maximum(scaled, 1), new_refractory_period - 1)
+    return np.where(countdowns >= old_refractory_period, new_refractory_period,
+                    np.where(countdowns > STATE_REST, refractory, STATE_REST))
+
+
+def random_countdowns(height: int, width: int, density: float, refractory_period: int,
+                      rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Estado aleatorio: excitadas con probabilidad density y el resto repartido a partes
+    iguales entre reposo y refractarias (voltaje 0.5)
+    """
+    choice = np.random.choice if rng is None else rng.choice
+    return choice([STATE_REST, int(countdown_from_voltage(0.5, refractory_period)), refractory_period],
+                  size=(height, width), p=[(1 - density) / 2, (1 - density) / 2, density])
+
+
+def replicate_countdowns(height: int, width: int, refractory_period: int) -> np.ndarray:
+    """
+    Condiciones iniciales de la Figura 2 del articulo de Greenberg-Hastings: una linea
+    refractaria y encima una excitada, desde el centro hasta el borde derecho
+    """
+    state = np.full((height, width), STATE_REST, dtype=np.int64)
+    center_x = width // 2
+    center_y = height // 2
+
+    # u^0_{i,0} = -1 (Refractario) -> voltaje 0.5 del modelo en float
+    if 0 <= center_y < height:
+        state[center_y, center_x:] = countdown_from_voltage(0.5, refractory_period)
+    # u^0_{i,1} = 1 (Excitado) -> cuenta atras R
+    if 0 <= center_y + 1 < height:
+        state[center_y + 1, center_x:] = refractory_period
+    return state
+
+
+def write_step_counts(file_path: str, counts: np.ndarray):
+    """
+    Escribe los recuentos de run (pasos, 3) en el mismo CSV que GridWidget.flush_csv_buffer
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, mode='w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_HEADER)
+            writer.writerows([step, *row] for step, row in enumerate(np.asarray(counts).tolist()))
+    except Exception as e:
+        print(f"Error al guardar el archivo CSV: {e}")
+
+
+class GreenbergHastingsEngine:
+    """
+    Greenberg-Hastings con la misma interfaz de parametros que Config
+    (refractory_period, threshold, neighborhood)
+    """
+
+    def __init__(self, width: int, height: int, refractory_period: int = 15, threshold: int = 2,
+                 neighborhood: str = MOORE):
+        self.width = width
+        self.height = height
+        self.refractory_period = refractory_period
+        self.threshold = threshold
+        self.neighborhood = neighborhood
+
+        self.iteration_count = 0
+        self.state = np.zeros((height, width), dtype=state_dtype(refractory_period))
+        self.blocked = np.zeros((height, width), dtype=bool)
+
+        # Buffers reutilizados en cada paso
+        self._excited = np.zeros((height, width), dtype=bool)
+        self._neighbors = np.zeros((height, width), dtype=np.uint8)
+
+    def randomize(self, density: float, rng: np.random.Generator = None):
+        """
+        Estado aleatorio igual que GridWidget._init_random_pattern (sin celdas bloqueadas)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_state(random_countdowns(self.height, self.width, density, self.refractory_period, rng))
+
+    def replicate_pattern(self):
+        """
+        Estado inicial del articulo, igual que GridWidget._init_replicate_pattern
+        """
+        self.set_state(replicate_countdowns(self.height, self.width, self.refractory_period))
+
+    def set_state(self, state: np.ndarray, blocked: np.ndarray = None):
+        """
+        Carga una cuenta atras (alto, ancho) y opcionalmente las celdas bloqueadas
+        """
+        state = np.asarray(state)
+        if state.shape != (self.height, self.width):
+            raise ValueError(f"El estado tiene forma {state.shape}, se esperaba {(self.height, self.width)}")
+        self.state = state.astype(state_dtype(self.refractory_period))
+        self.blocked = np.zeros(state.shape, dtype=bool) if blocked is None else np.asarray(blocked, dtype=bool).copy()
+        self.iteration_count = 0
+
+    def set_texture_state(self, texture_state: np.ndarray):
+        """
+        Carga un estado codificado como en la textura (cuenta atras con el bit de bloqueo)
+        """
+        texture_state = np.asarray(texture_state, dtype=np.int64)
+        bit = blocked_bit(state_dtype(self.refractory_period))
+        self.set_state(texture_state & ~bit, (texture_state & bit) != 0)
+
+    def get_texture_state(self) -> np.ndarray:
+        """
+        Estado codificado como en la textura de GridWidget
+        """
+        dtype = state_dtype(self.refractory_period)
+        return (self.state | np.where(self.blocked, blocked_bit(dtype), 0)).astype(dtype)
+
+    def _count_excited_neighbors(self, excited: np.ndarray) -> np.ndarray:
+        """
+        Numero de vecinos excitados de cada celda, sumando cortes desplazados (bordes no periodicos)
+        """
+        n = self._neighbors
+        n[:] = 0
+        # Von Neumann: arriba, abajo, derecha, izquierda
+        n[1:, :] += excited[:-1, :]
+        n[:-1, :] += excited[1:, :]
+        n[:, 1:] += excited[:, :-1]
+        n[:, :-1] += excited[:, 1:]
+        if neighborhood_index(self.neighborhood) == 0:
+            # Moore: las cuatro diagonales
+            n[1:, 1:] += excited[:-1, :-1]
+            n[1:, :-1] += excited[:-1, 1:]
+            n[:-1, 1:] += excited[1:, :-1]
+            n[:-1, :-1] += excited[1:, 1:]
+        return n
+
+    def step(self):
+        """
+        Avanza un paso
+        """
+        neighbors = self._count_excited_neighbors(np.equal(self.state, self.refractory_period, out=self._excited))
+        resting = self.state == STATE_REST
+        new_state = self.state - ~resting # Bajar uno las que no estan en reposo (True = 1)
+        new_state[resting & (neighbors >= self.threshold)] = self.refractory_period
+        new_state[self.blocked] = self.state[self.blocked]
+        self.state = new_state
+        self.iteration_count += 1
+
+    def counts(self) -> tuple[int, int, int]:
+        """
+        Celdas excitadas, refractarias y en reposo, como en GridWidget.capture_step_data
+        """
+        active = int(np.count_nonzero(self.state == self.refractory_period))
+        refractory = int(np.count_nonzero((self.state > STATE_REST) & (self.state < self.refractory_period)))
+        return active, refractory, self.width * self.height - active - refractory
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps pasos y devuelve (pasos, 3) con las celdas excitadas, refractarias
+        y en reposo tras cada uno
+        """
+        counts = np.empty((n_steps, 3), dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            counts[step] = self.counts()
+        return counts
@@ -0,0 +1,269 @@
+"""
+Muchos experimentos de Greenberg-Hastings con parametros distintos en una sola pasada de GPU.
+
+Cada experimento (capa) es una casilla de un atlas: una textura dividida en casillas
+del mismo tamaño, cada una con su propio grid, su periodo refractario y su umbral
+(una texel por casilla en una textura de parametros) y su semilla para el estado
+inicial. Un solo render avanza todas las casillas y dos pasadas de suma por bloques
+dan las celdas excitadas y refractarias de cada una. Los recuentos de cada paso se
+guardan en un buffer circular de hasta COUNT_RING_SIZE pasos que se lee de golpe.
+
+El estado usa la misma codificacion que GridWidget (cuenta atras en R8UI, o R16UI si
+algun periodo refractario no cabe en 7 bits). Usa un contexto de ModernGL sin ventana,
+no necesita pantalla.
+"""
+
+import numpy as np
+import moderngl
+
+from gh_engine import (COUNT_RING_SIZE, MOORE, blocked_bit, load_shader_source, neighborhood_index,
+                       random_countdowns, state_dtype)
+
+MAX_ATLAS_CELLS = 1 << 26 # Celdas como mucho en un atlas (64 MB por textura de estado en R8UI)
+
+
+def create_headless_context() -> moderngl.Context:
+    """
+    Crea un contexto de OpenGL sin ventana. Si no hay servidor X se intenta con EGL.
+    """
+    try:
+        return moderngl.create_standalone_context(require=330)
+    except Exception:
+        return moderngl.create_standalone_context(require=330, backend='egl')
+
+
+def max_layers(ctx: moderngl.Context, tile_width: int, tile_height: int) -> int:
+    """
+    Casillas de tile_width x tile_height que caben en un atlas (tamaño maximo de
+    textura y MAX_ATLAS_CELLS)
+    """
+    max_size = ctx.info['GL_MAX_TEXTURE_SIZE']
+    fit = (max_size // tile_width) * (max_size // tile_height)
+    return max(1, min(fit, MAX_ATLAS_CELLS // (tile_width * tile_height)))
+
+
+class GHEnsembleSimulator:
+    """
+    Avanza a la vez un grid de tile_width x tile_height por cada periodo refractario de
+    refractory_periods. thresholds puede ser un umbral comun o uno por capa
+    """
+
+    def __init__(self, tile_width: int, tile_height: int, refractory_periods, thresholds=1,
+                 neighborhood: str = MOORE, ctx: moderngl.Context = None):
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.refractory_periods = np.asarray(refractory_periods, dtype=np.int64).ravel()
+        self.num_layers = len(self.refractory_periods)
+        self.thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.int64), (self.num_layers,)).copy()
+        self.neighborhood = neighborhood
+        self.seeds = None # Semilla del estado inicial de cada capa (la ultima de randomize)
+
+        self.iteration_count = 0
+        self.pending_count_steps = [] # Paso de cada posicion ocupada del buffer circular
+
+        self._owns_ctx = ctx is None
+        self.ctx = create_headless_context() if ctx is None else ctx
+
+        # Colocar las casillas en un atlas lo mas cuadrado posible que quepa en una textura
+        max_size = self.ctx.info['GL_MAX_TEXTURE_SIZE']
+        self.tiles_x = max(1, min(int(np.ceil(np.sqrt(self.num_layers))), max_size // tile_width))
+        self.tiles_y = int(np.ceil(self.num_layers / self.tiles_x))
+        self.atlas_size = (self.tiles_x * tile_width, self.tiles_y * tile_height)
+        if self.atlas_size[1] > max_size:
+            raise ValueError(f"{self.num_layers} casillas de {tile_width}x{tile_height} no caben en una textura "
+                             f"de {max_size}x{max_size}, como mucho {max_layers(self.ctx, tile_width, tile_height)}")
+        # Pasos que caben en el buffer circular (una fila de casillas por paso)
+        self.ring_size = min(COUNT_RING_SIZE, max_size // self.tiles_y)
+
+        # Mismo tipo para todas las casillas: el del periodo refractario mas largo
+        self.state_dtype = state_dtype(int(self.refractory_periods.max()))
+        self.blocked_bit = blocked_bit(self.state_dtype)
+
+        vertex_source = load_shader_source("shaders/vertex.glsl")
+        self.neuron_program = self.ctx.program(vertex_shader=vertex_source,
+                                               fragment_shader=load_shader_source("shaders/greenberg_h_tiles.glsl"))
+        self.count_program = self.ctx.program(vertex_shader=vertex_source,
+                                              fragment_shader=load_shader_source("shaders/tile_count.glsl"))
+
+        vertices = np.array([-1, -1, 1, -1, 1, 1, -1, 1], dtype='f4')
+        indices = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
+        self.vbo = self.ctx.buffer(vertices)
+        self.ebo = self.ctx.buffer(indices)
+        self.neuron_vao = self.ctx.vertex_array(self.neuron_program, [(self.vbo, '2f', 'aPos')], index_buffer=self.ebo)
+        self.count_vao = self.ctx.vertex_array(self.count_program, [(self.vbo, '2f', 'aPos')], index_buffer=self.ebo)
+
+        # Texturas de estado (ping-pong)
+        self.textures = []
+        self.fbos = []
+        for _ in range(2):
+            tex = self.ctx.texture(self.atlas_size, 1, dtype=self.state_dtype)
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.textures.append(tex)
+            self.fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+        self.current_texture_idx = 0
+
+        # Parametros de cada casilla. Las sobrantes no se excitan nunca (umbral mayor que los vecinos)
+        params = np.zeros((self.tiles_y * self.tiles_x, 2), dtype=np.uint32)
+        params[:, 0] = 1
+        params[:, 1] = 9
+        params[:self.num_layers, 0] = self.refractory_periods
+        params[:self.num_layers, 1] = self.thresholds
+        self.param_texture = self.ctx.texture((self.tiles_x, self.tiles_y), 2, data=params.tobytes(), dtype='u4')
+        self.param_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+        # Suma por filas de cada casilla, y buffer circular con la suma de cada casilla en cada paso
+        self.row_sum_texture = self.ctx.texture((self.tiles_x, self.atlas_size[1]), 2, dtype='u4')
+        self.row_sum_fbo = self.ctx.framebuffer(color_attachments=[self.row_sum_texture])
+        self.count_ring_texture = self.ctx.texture((self.tiles_x, self.tiles_y * self.ring_size), 2, dtype='u4')
+        self.count_ring_fbo = self.ctx.framebuffer(color_attachments=[self.count_ring_texture])
+        for tex in (self.row_sum_texture, self.count_ring_texture):
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+    def set_states(self, states: np.ndarray):
+        """
+        Carga una cuenta atras (capas, alto, ancho) por capa, en el orden de la textura (fila 0 abajo)
+        """
+        states = np.asarray(states)
+        if states.shape != (self.num_layers, self.tile_height, self.tile_width):
+            raise ValueError(f"El estado tiene forma {states.shape}, se esperaba "
+                             f"{(self.num_layers, self.tile_height, self.tile_width)}")
+
+        atlas = np.zeros((self.tiles_y * self.tiles_x, self.tile_height, self.tile_width), dtype=self.state_dtype)
+        atlas[:self.num_layers] = states
+        # (casillas_y, casillas_x, alto, ancho) -> (casillas_y * alto, casillas_x * ancho)
+        atlas = atlas.reshape(self.tiles_y, self.tiles_x, self.tile_height, self.tile_width)
+        atlas = atlas.transpose(0, 2, 1, 3).reshape(self.atlas_size[1], self.atlas_size[0])
+
+        self.textures[self.current_texture_idx].write(np.ascontiguousarray(atlas).tobytes(), alignment=1)
+        self.iteration_count = 0
+        self.pending_count_steps.clear()
+
+    def read_states(self) -> np.ndarray:
+        """
+        Estado actual (capas, alto, ancho) con el bit de bloqueo, como GridWidget.read_state
+        """
+        raw_data = self.textures[self.current_texture_idx].read(alignment=1)
+        atlas = np.frombuffer(raw_data, dtype=self.state_dtype).reshape(self.atlas_size[1], self.atlas_size[0])
+        tiles = atlas.reshape(self.tiles_y, self.tile_height, self.tiles_x, self.tile_width).transpose(0, 2, 1, 3)
+        return tiles.reshape(-1, self.tile_height, self.tile_width)[:self.num_layers].astype(np.int64)
+
+    def randomize(self, density: float, seeds=None):
+        """
+        Estado aleatorio como GridWidget._init_random_pattern, cada capa con su semilla.
+        Sin semillas se eligen al azar (quedan en self.seeds)
+        """
+        if seeds is None:
+            seeds = np.random.default_rng().integers(2**32, size=self.num_layers)
+        self.seeds = [int(seed) for seed in seeds]
+        if len(self.seeds) != self.num_layers:
+            raise ValueError(f"Hay {len(self.seeds)} semillas, se esperaban {self.num_layers}")
+        self.set_states([random_countdowns(self.tile_height, self.tile_width, density, int(refractory_period),
+                                           np.random.default_rng(seed))
+                         for refractory_period, seed in zip(self.refractory_periods, self.seeds)])
+
+    def step(self):
+        """
+        Avanza un paso todas las capas con un solo render
+        """
+        source_idx = self.current_texture_idx
+        dest_idx = 1 - source_idx
+
+        self.fbos[dest_idx].use()
+
+        self.textures[source_idx].use(location=0)
+        self.neuron_program['u_state_texture'].value = 0
+        self.param_texture.use(location=1)
+        self.neuron_program['u_param_texture'].value = 1
+        self.neuron_program['u_tile_size'].value = (self.tile_width, self.tile_height)
+        self.neuron_program['u_neighborhood'].value = neighborhood_index(self.neighborhood)
+        self.neuron_program['u_blocked_bit'].value = self.blocked_bit
+
+        self.neuron_vao.render(moderngl.TRIANGLES)
+
+        self.current_texture_idx = dest_idx
+        self.iteration_count += 1
+
+    def queue_counts(self):
+        """
+        Cuenta las celdas excitadas y refractarias de cada capa en la GPU y las guarda en
+        la siguiente posicion del buffer circular (se leen con flush_counts)
+        """
+        slot = len(self.pending_count_steps)
+        program = self.count_program
+        self.param_texture.use(location=1)
+        program['u_param_texture'].value = 1
+        program['u_tile_size'].value = (self.tile_width, self.tile_height)
+        program['u_blocked_bit'].value = self.blocked_bit
+
+        # Suma de cada fila de cada casilla
+        self.row_sum_fbo.use()
+        self.textures[self.current_texture_idx].use(location=0)
+        program['u_source_texture'].value = 0
+        program['u_block'].value = (self.tile_width, 1)
+        program['u_step'].value = (1, 0)
+        program['u_length'].value = self.tile_width
+        program['u_output_offset'].value = (0, 0)
+        program['u_count_states'].value = True
+        self.count_vao.render(moderngl.TRIANGLES)
+
+        # Suma de las filas de cada casilla, en la fila de casillas del paso en el buffer circular
+        self.count_ring_fbo.viewport = (0, slot * self.tiles_y, self.tiles_x, self.tiles_y)
+        self.count_ring_fbo.use()
+        self.row_sum_texture.use(location=0)
+        program['u_block'].value = (1, self.tile_height)
+        program['u_step'].value = (0, 1)
+        program['u_length'].value = self.tile_height
+        program['u_output_offset'].value = (0, slot * self.tiles_y)
+        program['u_count_states'].value = False
+        self.count_vao.render(moderngl.TRIANGLES)
+
+        self.pending_count_steps.append(self.iteration_count)
+
+    def flush_counts(self) -> np.ndarray:
+        """
+        Lee de golpe los recuentos pendientes: (pasos, capas, 3) con las celdas excitadas,
+        refractarias y en reposo de cada capa
+        """
+        num_counts = len(self.pending_count_steps)
+        counts = np.zeros((num_counts, self.num_layers, 3), dtype=np.int64)
+        if not num_counts:
+            return counts
+
+        raw_data = self.count_ring_fbo.read(viewport=(0, 0, self.tiles_x, self.tiles_y * num_counts),
+                                            components=2, dtype='u4')
+        ring_data = np.frombuffer(raw_data, dtype=np.uint32).reshape(num_counts, self.tiles_y * self.tiles_x, 2)
+        counts[..., :2] = ring_data[:, :self.num_layers]
+        counts[..., 2] = self.tile_width * self.tile_height - counts[..., 0] - counts[..., 1]
+        self.pending_count_steps.clear()
+        return counts
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps pasos y devuelve (pasos, capas, 3) con las celdas excitadas,
+        refractarias y en reposo de cada capa tras cada uno
+        """
+        counts = np.empty((n_steps, self.num_layers, 3), dtype=np.int64)
+        done = 0
+        self.flush_counts()
+        for step in range(n_steps):
+            self.step()
+            self.queue_counts()
+            if len(self.pending_count_steps) == self.ring_size or step == n_steps - 1:
+                batch = self.flush_counts()
+                counts[done:done + len(batch)] = batch
+                done += len(batch)
+        return counts
+
+    def release_resources(self):
+        for fbo in self.fbos + [self.row_sum_fbo, self.count_ring_fbo]:
+            fbo.release()
+        for texture in self.textures + [self.param_texture, self.row_sum_texture, self.count_ring_texture]:
+            texture.release()
+        self.neuron_vao.release()
+        self.count_vao.release()
+        self.neuron_program.release()
+        self.count_program.release()
+        self.vbo.release()
+        self.ebo.release()
+        if self._owns_ctx:
+            self.ctx.release()
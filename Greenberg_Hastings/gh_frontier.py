@@ -0,0 +1,142 @@
+"""
+Greenberg-Hastings en CPU que solo recorre el frente de excitacion.
+
+En Greenberg-Hastings la actividad vive en frentes de onda finos: en cada paso solo
+puede cambiar de reposo a excitada una celda vecina de una excitada, y el resto
+de celdas o estan en reposo o bajan su cuenta atras, que no depende de los vecinos.
+
+En vez de la cuenta atras de cada celda se guarda el paso en el que se excito por
+ultima vez (excited_at): en el paso t su estado es R - (t - excited_at) mientras sea
+positivo, y reposo despues. Asi las celdas refractarias no hay que tocarlas en cada
+paso. Los recuentos salen de una cola de cubos por paso de caducidad: el cubo
+k % R tiene cuantas celdas se excitaron en el paso k, que vuelven al reposo en el
+paso k + R, justo cuando el cubo se reutiliza para las excitadas de ese paso.
+
+Cada paso solo recorre los vecinos de las celdas excitadas, con lo que el coste
+depende de la longitud del frente y no del area. Si el frente ocupa mas de
+DENSE_FRACTION del grid se hace el paso normal de GreenbergHastingsEngine.
+
+Los resultados son exactamente los mismos que los de GreenbergHastingsEngine.
+"""
+
+import numpy as np
+
+from gh_engine import GreenbergHastingsEngine, STATE_REST, neighborhood_index
+
+# Desplazamientos (fila, columna) de los vecinos: los 4 de Von Neumann y despues las diagonales de Moore
+NEIGHBOR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+# Por encima de esta proporcion de celdas excitadas sale mas a cuenta avanzar todo el grid
+DENSE_FRACTION = 0.05
+
+
+class FrontierGreenbergHastingsEngine(GreenbergHastingsEngine):
+    """
+    GreenbergHastingsEngine con el estado guardado como paso de excitacion y el
+    frente de celdas excitadas como lista de indices
+    """
+
+    def __init__(self, width: int, height: int, refractory_period: int = 15, threshold: int = 2,
+                 neighborhood: str = 'Moore (8)'):
+        super().__init__(width, height, refractory_period, threshold, neighborhood)
+        self._build_frontier()
+
+    @property
+    def state(self) -> np.ndarray:
+        """
+        Cuenta atras (alto, ancho) reconstruida a partir de excited_at (recorre todo el grid)
+        """
+        if not hasattr(self, 'excited_at'):
+            return self._state
+        countdown = self.refractory_period - (self.iteration_count - self.excited_at)
+        state = np.where(self.blocked.ravel(), self._state.ravel(), np.maximum(countdown, STATE_REST))
+        return state.reshape(self.height, self.width).astype(self._state.dtype)
+
+    @state.setter
+    def state(self, state: np.ndarray):
+        # Solo la usan __init__ y set_state de la clase base, que despues llaman a _build_frontier
+        self._state = state
+
+    def set_state(self, state: np.ndarray, blocked: np.ndarray = None):
+        super().set_state(state, blocked)
+        self._build_frontier()
+
+    def _build_frontier(self):
+        """
+        Pasa la cuenta atras cargada a excited_at, la cola de cubos y el frente
+        """
+        R = self.refractory_period
+        state = self._state.ravel().astype(np.int64)
+        blocked = self.blocked.ravel()
+        t = self.iteration_count
+
+        # Las bloqueadas no cambian nunca: se cuentan aparte y no entran en la cola
+        self._blocked_excited = np.flatnonzero(blocked & (state == R))
+        self._num_blocked_refractory = int(np.count_nonzero(blocked & (state > STATE_REST) & (state < R)))
+
+        # Una celda con cuenta atras s se excito hace R - s pasos (las de reposo, hace R)
+        self.excited_at = np.where(state > STATE_REST, t - (R - state), t - R)
+        self.excited_at[blocked] = t - R
+        excited = ~blocked & (state > STATE_REST)
+        self._bucket_sizes = np.bincount(self.excited_at[excited] % R, minlength=R).astype(np.int64)
+        self._bucket_total = int(self._bucket_sizes.sum())
+        self._front = np.flatnonzero(excited & (state == R))
+
+    def _neighbor_indices(self, sources: np.ndarray) -> np.ndarray:
+        """
+        Indices de los vecinos dentro del grid de cada celda de sources (con repeticiones)
+        """
+        rows, cols = np.divmod(sources, self.width)
+        offsets = NEIGHBOR_OFFSETS if neighborhood_index(self.neighborhood) == 0 else NEIGHBOR_OFFSETS[:4]
+        indices = []
+        for dy, dx in offsets:
+            r, c = rows + dy, cols + dx
+            inside = (r >= 0) & (r < self.height) & (c >= 0) & (c < self.width)
+            indices.append(r[inside] * self.width + c[inside])
+        return np.concatenate(indices)
+
+    def _next_front_sparse(self, sources: np.ndarray) -> np.ndarray:
+        """
+        Celdas en reposo que se excitan: solo se miran los vecinos de las excitadas
+        """
+        # Ordenar los indices agrupa las repeticiones: cada una es un vecino excitado
+        candidates, counts = np.unique(self._neighbor_indices(sources), return_counts=True)
+        candidates = candidates[counts >= self.threshold]
+        resting = self.iteration_count - self.excited_at[candidates] >= self.refractory_period
+        return candidates[resting & ~self.blocked.ravel()[candidates]]
+
+    def _next_front_dense(self, sources: np.ndarray) -> np.ndarray:
+        """
+        Lo mismo que _next_front_sparse pero con las sumas de cortes sobre todo el grid
+        """
+        excited = self._excited
+        excited[:] = False
+        excited.ravel()[sources] = True
+        neighbors = self._count_excited_neighbors(excited).ravel()
+        resting = self.iteration_count - self.excited_at >= self.refractory_period
+        return np.flatnonzero(resting & (neighbors >= self.threshold) & ~self.blocked.ravel())
+
+    def step(self):
+        """
+        Avanza un paso tocando solo el entorno del frente
+        """
+        sources = np.concatenate((self._front, self._blocked_excited))
+        if self.threshold <= 0 or len(sources) > DENSE_FRACTION * self.width * self.height:
+            new_front = self._next_front_dense(sources)
+        else:
+            new_front = self._next_front_sparse(sources)
+
+        self.iteration_count += 1
+        self.excited_at[new_front] = self.iteration_count
+        # El cubo de este paso tenia las que se excitaron hace R pasos, que vuelven al reposo
+        bucket = self.iteration_count % self.refractory_period
+        self._bucket_total += len(new_front) - int(self._bucket_sizes[bucket])
+        self._bucket_sizes[bucket] = len(new_front)
+        self._front = new_front
+
+    def counts(self) -> tuple[int, int, int]:
+        """
+        Celdas excitadas, refractarias y en reposo sin recorrer el grid
+        """
+        active = len(self._front) + len(self._blocked_excited)
+        refractory = self._bucket_total - len(self._front) + self._num_blocked_refractory
+        return active, refractory, self.width * self.height - active - refractory
@@ -10,16 +10,14 @@ from PIL import Image
 import numpy as np
 import csv
 
-def load_shader_source(shader_file: str) -> str:
-    """
-    Lee el contenido de un archivo de shader
-    """
-    shader_path = Path(__file__).parent / shader_file
-    try:
-        with open(shader_path, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error Crítico: No se pudo encontrar el archivo de shader: {shader_path}")
+# Estado de la textura: una cuenta atras entera por celda (R8UI, o R16UI si el periodo
+# refractario R no cabe en 7 bits). 0 es reposo, R excitada y 1..R-1 refractaria (baja
+# de uno en uno). El bit alto marca las celdas bloqueadas. Tiene que coincidir con
+# shaders/greenberg_h.glsl. Los helpers estan en gh_engine, que no depende de Qt
+from gh_engine import (COUNT_RING_SIZE, REDUCE_BLOCK, blocked_bit, countdown_from_voltage, load_shader_source,
+                       neighborhood_index, random_countdowns, replicate_countdowns, rescale_countdowns,
+                       state_dtype)
+
 
 class GridWidget(QOpenGLWidget):
     def __init__(self, config: Config):
@@ -39,10 +37,22 @@ class GridWidget(QOpenGLWidget):
         self.block_vao = None
         self.paste_vao = None
         self.ghost_vao = None
+        # Reduccion de los recuentos de estados
+        self.count_program = None
+        self.reduce_program = None
+        self.count_vao = None
+        self.reduce_vao = None
+        self.reduce_textures = []
+        self.reduce_fbos = []
+        self.count_ring_texture = None
+        self.count_ring_fbo = None
+        self.pending_count_steps = [] # Paso de cada posicion ocupada del buffer circular
         # FBOs y Texturas
         self.fbos = []
         self.textures = []
         self.current_texture_idx = 0
+        self.state_dtype = None # 'u1' (R8UI) o 'u2' (R16UI), segun el periodo refractario
+        self.state_refractory_period = None # Periodo refractario con el que esta escrita la cuenta atras
         # Variables para zoom y paneo
         self.zoom_level = 1.0
         self.view_offset_x = self.config.grid_width / 2.0
@@ -74,6 +84,8 @@ class GridWidget(QOpenGLWidget):
             block_source = load_shader_source("shaders/block_cell.glsl")
             paste_source = load_shader_source("shaders/paste.glsl")
             ghost_source = load_shader_source("shaders/ghost.glsl")
+            count_source = load_shader_source("shaders/count_states.glsl")
+            reduce_source = load_shader_source("shaders/reduce_sum.glsl")
             # Crear los programas de shaders
             self.display_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=display_source)
             self.activate_cell_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=activate_cell_source)
@@ -81,6 +93,8 @@ class GridWidget(QOpenGLWidget):
             self.block_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=block_source)
             self.paste_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=paste_source)
             self.ghost_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=ghost_source)
+            self.count_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=count_source)
+            self.reduce_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=reduce_source)
             # Crear los VAOs
             vertices = np.array([-1, -1, 1, -1, 1, 1, -1, 1], dtype='f4')
             indices = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
@@ -94,19 +108,113 @@ class GridWidget(QOpenGLWidget):
             self.block_vao = self.ctx.vertex_array(self.block_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
             self.paste_vao = self.ctx.vertex_array(self.paste_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
             self.ghost_vao = self.ctx.vertex_array(self.ghost_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
+            self.count_vao = self.ctx.vertex_array(self.count_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
+            self.reduce_vao = self.ctx.vertex_array(self.reduce_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
             # Crear las texturas y FBOs
-            for _ in range(2):
-                tex = self.ctx.texture((self.config.grid_width, self.config.grid_height), 4, dtype='f4')
-                tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
-                tex.repeat_x = False
-                tex.repeat_y = False
-                self.textures.append(tex)
-                self.fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+            self._create_state_textures(state_dtype(self.config.refractory_period))
+            self._create_reduction_textures()
             QtCore.QTimer.singleShot(0, self.perform_initial_render)
         except Exception as e:
             print(f"Error durante la inicialización de OpenGL: {e}")
             self.window().close()
 
+    def _create_state_textures(self, dtype: str):
+        """
+        Crea (o vuelve a crear) las dos texturas de estado con un canal entero de 1 o 2
+        bytes por celda, en vez de RGBA en float (16 bytes)
+        """
+        for fbo in self.fbos:
+            fbo.release()
+        for texture in self.textures:
+            texture.release()
+        self.fbos = []
+        self.textures = []
+        for _ in range(2):
+            tex = self.ctx.texture((self.config.grid_width, self.config.grid_height), 1, dtype=dtype)
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            tex.repeat_x = False
+            tex.repeat_y = False
+            self.textures.append(tex)
+            self.fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+        self.state_dtype = dtype
+        self.state_refractory_period = self.config.refractory_period # Todo en reposo, vale para cualquiera
+        self.current_texture_idx = 0
+
+    def _create_reduction_textures(self):
+        """
+        Crea las texturas intermedias de la reduccion hasta que quede un bloque
+        de como mucho REDUCE_BLOCK x REDUCE_BLOCK, y el buffer circular de resultados
+        """
+        width, height = self.config.grid_width, self.config.grid_height
+        while width > REDUCE_BLOCK or height > REDUCE_BLOCK:
+            width = (width + REDUCE_BLOCK - 1) // REDUCE_BLOCK
+            height = (height + REDUCE_BLOCK - 1) // REDUCE_BLOCK
+            tex = self.ctx.texture((width, height), 4, dtype='u4') # Excitadas y refractarias de cada bloque
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.reduce_textures.append(tex)
+            self.reduce_fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+
+        self.count_ring_texture = self.ctx.texture((COUNT_RING_SIZE, 1), 4, dtype='u4')
+        self.count_ring_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.count_ring_fbo = self.ctx.framebuffer(color_attachments=[self.count_ring_texture])
+
+    @property
+    def blocked_bit(self) -> int:
+        return blocked_bit(self.state_dtype)
+
+    def _ensure_state_format(self, preserve=True):
+        """
+        Adapta las texturas si se ha cambiado config.refractory_period: cambia su tipo si
+        la cuenta atras no cabe y, con preserve, pasa el estado al nuevo periodo con
+        rescale_countdowns conservando las celdas bloqueadas (y no se vuelve a un tipo
+        mas pequeño). Sin preserve el que llama escribe despues un estado nuevo.
+        Hay que llamarla con el contexto activo.
+        """
+        refractory_period = self.config.refractory_period
+        needed = state_dtype(refractory_period)
+        if preserve and self.state_dtype == 'u2':
+            needed = 'u2'
+        if needed == self.state_dtype and refractory_period == self.state_refractory_period:
+            return
+        if not preserve:
+            if needed != self.state_dtype:
+                self._create_state_textures(needed)
+            self.state_refractory_period = refractory_period
+            return
+
+        state = self.read_state()
+        old_bit = self.blocked_bit
+        blocked = (state & old_bit) != 0
+        countdowns = rescale_countdowns(state & ~old_bit, self.state_refractory_period, refractory_period)
+        if needed != self.state_dtype:
+            self._create_state_textures(needed)
+        self._write_state(countdowns | np.where(blocked, self.blocked_bit, 0))
+        self.state_refractory_period = refractory_period
+
+    def read_state(self) -> np.ndarray:
+        """
+        Estado actual (alto, ancho) como enteros: cuenta atras y bit de bloqueo (fila 0 abajo)
+        """
+        texture = self.textures[self.current_texture_idx]
+        raw_data = texture.read(alignment=1)
+        width, height = texture.size
+        return np.frombuffer(raw_data, dtype=self.state_dtype).reshape((height, width)).astype(np.int64)
+
+    def _write_state(self, state: np.ndarray):
+        """
+        Escribe un estado entero (alto, ancho) en la otra textura y la pasa a ser la actual
+        """
+        dest_idx = 1 - self.current_texture_idx
+        self.textures[dest_idx].write(np.ascontiguousarray(state, dtype=self.state_dtype).tobytes(), alignment=1)
+        self.current_texture_idx = dest_idx
+
+    def _set_state_uniforms(self, program):
+        """
+        Uniforms con los que los shaders decodifican el estado
+        """
+        program['u_refractory_period'].value = int(self.config.refractory_period)
+        program['u_blocked_bit'].value = self.blocked_bit
+
     def perform_initial_render(self):
         self.run_init_shader()
         self._is_initialized = True
@@ -115,6 +223,7 @@ class GridWidget(QOpenGLWidget):
     def paintGL(self):
         if not self._is_initialized: 
             return
+        self._ensure_state_format()
         
         paint_fbo = self.ctx.detect_framebuffer()
         paint_fbo.use()
@@ -124,6 +233,7 @@ class GridWidget(QOpenGLWidget):
         self.display_program['u_zoom_level'].value = self.zoom_level
         self.display_program['u_view_offset'].value = (self.view_offset_x, self.view_offset_y)
         self.display_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
+        self._set_state_uniforms(self.display_program)
 
         self.textures[self.current_texture_idx].use(location=0)
         self.display_program['u_state_texture'].value = 0
@@ -169,6 +279,22 @@ class GridWidget(QOpenGLWidget):
             self.block_program.release()
         if self.block_vao: 
             self.block_vao.release()
+        for fbo in self.reduce_fbos:
+            fbo.release()
+        for texture in self.reduce_textures:
+            texture.release()
+        if self.count_ring_fbo:
+            self.count_ring_fbo.release()
+        if self.count_ring_texture:
+            self.count_ring_texture.release()
+        if self.count_program:
+            self.count_program.release()
+        if self.count_vao:
+            self.count_vao.release()
+        if self.reduce_program:
+            self.reduce_program.release()
+        if self.reduce_vao:
+            self.reduce_vao.release()
         if self.ctx: 
             self.ctx.release()
         #print("Recursos liberados.")
@@ -188,6 +314,7 @@ class GridWidget(QOpenGLWidget):
         """
         self.makeCurrent()
         try:
+            self._ensure_state_format()
             source_idx = self.current_texture_idx
             dest_idx = 1 - source_idx
 
@@ -195,7 +322,7 @@ class GridWidget(QOpenGLWidget):
 
             self.activate_cell_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
             self.activate_cell_program['u_flip_coord'].value = (x, y)
-            self.activate_cell_program['dt'].value = 1.0 / self.config.speed
+            self._set_state_uniforms(self.activate_cell_program)
 
             self.textures[source_idx].use(location=0)
             self.activate_cell_program['u_state_texture'].value = 0
@@ -222,38 +349,11 @@ class GridWidget(QOpenGLWidget):
 
         self.makeCurrent()
         try:
-            rgba_grid = np.zeros((self.config.grid_height, self.config.grid_width, 4), dtype='f4')
-            
-            # Todas las celdas en estado de reposo (u=0) y no bloqueadas (is_blocked=0)
-            rgba_grid[..., 0] = 0.0 # Canal rojo para el estado (0.5 representa el estado de reposo u=0)
-            rgba_grid[..., 1] = 0.0 # Canal verde para nada por ahora
-            rgba_grid[..., 2] = 0.0 # Canal azul para 'is_blocked' (0.0 significa no bloqueado)
-            rgba_grid[..., 3] = 1.0 # Canal alfa
-
-            # Calcular el centro de la cuadrícula
-            center_x = self.config.grid_width // 2
-            center_y = self.config.grid_height // 2
-
-            # Hay que determinar las filas para las lineas iniciales (replicar el paper)
-            
-            refractory_row_idx = center_y
-            excited_row_idx = center_y + 1
-
-            # Aplicar las condiciones iniciales del paper para la Figura 2:
-            # u^0_{i,0} = -1 (Refractario) -> Valor mapeado 0.0
-            # Esta línea comienza desde center_x y se extiende hacia la derecha (hasta grid_width-1)
-            if refractory_row_idx >= 0 and refractory_row_idx < self.config.grid_height:
-                rgba_grid[refractory_row_idx, center_x:, 0] = 0.5 
-
-            # u^0_{i,1} = 1 (Excitado) -> Valor mapeado 1.0
-            # Esta línea comienza desde center_x y se extiende hacia la derecha (hasta grid_width-1)
-            if excited_row_idx >= 0 and excited_row_idx < self.config.grid_height:
-                rgba_grid[excited_row_idx, center_x:, 0] = 1.0 
-        
-
-            dest_idx = 1 - self.current_texture_idx
-            self.textures[dest_idx].write(rgba_grid.tobytes(), alignment=1)
-            self.current_texture_idx = dest_idx
+            self._ensure_state_format(preserve=False)
+            # Condiciones iniciales del paper para la Figura 2 (lineas refractaria y excitada
+            # desde el centro hacia la derecha)
+            state = replicate_countdowns(self.config.grid_height, self.config.grid_width, self.config.refractory_period)
+            self._write_state(state)
         finally:
             self.doneCurrent()
     
@@ -264,17 +364,12 @@ class GridWidget(QOpenGLWidget):
 
         self.makeCurrent()
         try:
-            rgba_grid = np.zeros((self.config.grid_height, self.config.grid_width, 4), dtype='f4')
-
-            # Generar estados aleatorios entre 0, 0.5 y 1.0
-            random_states = np.random.choice([0.0, 0.5, 1.0], size=(self.config.grid_height, self.config.grid_width), p=[(1-self.config.density)/2, (1-self.config.density)/2, self.config.density])
+            self._ensure_state_format(preserve=False)
+            # Generar estados aleatorios entre reposo, refractario (voltaje 0.5) y excitado
+            random_states = random_countdowns(self.config.grid_height, self.config.grid_width,
+                                              self.config.density, self.config.refractory_period)
 
-            rgba_grid[..., 0] = random_states  # Canal rojo para el estado
-            rgba_grid[..., 3] = 1.0 # Canal alfa
-
-            dest_idx = 1 - self.current_texture_idx
-            self.textures[dest_idx].write(rgba_grid.tobytes(), alignment=1)
-            self.current_texture_idx = dest_idx
+            self._write_state(random_states)
 
         finally:
             self.doneCurrent()
@@ -285,6 +380,7 @@ class GridWidget(QOpenGLWidget):
         """
         self.makeCurrent()
         try:
+            self._ensure_state_format()
             source_idx = self.current_texture_idx
             dest_idx = 1 - source_idx
 
@@ -295,8 +391,8 @@ class GridWidget(QOpenGLWidget):
             self.textures[source_idx].use(location=0)
             self.neuron_program['u_state_texture'].value = 0
             self.neuron_program['u_threshold'].value = self.config.threshold
-            self.neuron_program['u_refractory_period'].value = self.config.refractory_period
-            self.neuron_program['u_neighborhood'].value = 0 if self.config.neighborhood == 'Moore (8)' else 1
+            self._set_state_uniforms(self.neuron_program)
+            self.neuron_program['u_neighborhood'].value = neighborhood_index(self.config.neighborhood)
 
             self.neuron_vao.render(moderngl.TRIANGLES)
             self.current_texture_idx = dest_idx
@@ -309,6 +405,7 @@ class GridWidget(QOpenGLWidget):
         """
         self.makeCurrent()
         try:
+            self._ensure_state_format()
             source_idx = self.current_texture_idx
             dest_idx = 1 - source_idx
 
@@ -316,6 +413,7 @@ class GridWidget(QOpenGLWidget):
 
             self.block_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
             self.block_program['u_block_coord'].value = (x, y)
+            self.block_program['u_blocked_bit'].value = self.blocked_bit
             self.textures[source_idx].use(location=0)
             self.block_program['u_state_texture'].value = 0
 
@@ -425,6 +523,7 @@ class GridWidget(QOpenGLWidget):
         self.makeCurrent()
 
         try:
+            self._ensure_state_format()
             source_idx = self.current_texture_idx
             dest_idx = 1 - source_idx
 
@@ -433,6 +532,7 @@ class GridWidget(QOpenGLWidget):
             self.paste_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
             self.paste_program['u_offset'].value = (self.paste_pos.x(), self.paste_pos.y())
             self.paste_program['u_pattern_size'].value = (self.paste_size[0], self.paste_size[1])
+            self._set_state_uniforms(self.paste_program)
 
             self.textures[source_idx].use(location=0)
             self.paste_program['u_state_texture'].value = 0
@@ -481,17 +581,19 @@ class GridWidget(QOpenGLWidget):
         """
         self.makeCurrent()
         try:
-            texture = self.textures[self.current_texture_idx]
-            raw_data = texture.read(alignment=1)
-            width, height = texture.size
-            components = texture.components
+            self._ensure_state_format()
+            state = self.read_state()
             #print("Guardando patrón")
-            
-            float_array = np.frombuffer(raw_data, dtype=np.float32) # El dtype es f32 para 4 componentes (RGBA)
-            float_array = float_array.reshape((height, width, components))
-            uint8_array = (float_array * 255).astype(np.uint8)
-                
-            image = Image.fromarray(uint8_array, 'RGBA' if components == 4 else 'RGB')
+
+            # Mismo formato de imagen que con el estado en float: voltaje en rojo y verde,
+            # bloqueo en azul
+            voltage = np.minimum((state & ~self.blocked_bit) / self.config.refractory_period, 1.0)
+            uint8_array = np.empty(state.shape + (4,), dtype=np.uint8)
+            uint8_array[..., 0] = uint8_array[..., 1] = (voltage * 255).astype(np.uint8)
+            uint8_array[..., 2] = np.where(state & self.blocked_bit, 255, 0)
+            uint8_array[..., 3] = 255
+
+            image = Image.fromarray(uint8_array, 'RGBA')
 
             image = image.transpose(Image.FLIP_TOP_BOTTOM)
             image.save(file_path)
@@ -517,14 +619,13 @@ class GridWidget(QOpenGLWidget):
             image = image.transpose(method=Image.Transpose.FLIP_TOP_BOTTOM) # ModernGL tiene el eje y cambiado
 
             uint8_array = np.array(image)
-            float_array = (uint8_array / 255.0).astype(np.float32)
+            self._ensure_state_format(preserve=False)
 
-            data_for_texture = float_array.tobytes()
+            # Rojo: voltaje del modelo en float, azul: bloqueo
+            state = countdown_from_voltage(uint8_array[..., 0] / 255.0, self.config.refractory_period)
+            state[uint8_array[..., 2] > 127] |= self.blocked_bit
 
-            dest_idx = 1 - self.current_texture_idx
-            self.textures[dest_idx].write(data_for_texture, alignment=1)
-
-            self.current_texture_idx = dest_idx
+            self._write_state(state)
 
             print(f"Patrón importado desde {file_path}")
 
@@ -585,37 +686,89 @@ class GridWidget(QOpenGLWidget):
         """
         self.csv_buffer = []
         self.csv_buffer.append(['Step', 'Active_cells', 'Refractory_cells', 'Resting_cells'])
+        self.pending_count_steps = []
 
     def capture_step_data(self, step_index):
         """
-        Captura los datos del paso actual para el CSV
+        Captura los datos del paso actual para el CSV. Los recuentos se calculan en la
+        GPU y se leen cada COUNT_RING_SIZE pasos (o al escribir el CSV)
         """
         if not self.ctx:
             return
         self.makeCurrent()
         try:
-            raw_data = self.textures[self.current_texture_idx].read(alignment=1)
+            self._queue_state_count(step_index)
+            if len(self.pending_count_steps) == COUNT_RING_SIZE:
+                self._flush_state_counts()
+        except Exception as e:
+            print(f"Error al capturar datos del paso {step_index}: {e}")
+        finally:
+            self.doneCurrent()
 
-            data_np = np.frombuffer(raw_data, dtype=np.float32)
+    def _queue_state_count(self, step_index):
+        """
+        Cuenta las celdas excitadas y refractarias del estado actual en la GPU y guarda
+        el resultado en la siguiente posicion del buffer circular. Hay que llamarla con
+        el contexto activo.
+        """
+        self._ensure_state_format()
+        slot = len(self.pending_count_steps)
 
-            states = data_np[0::4]
+        source = self.textures[self.current_texture_idx]
+        source.use(location=0)
+        program, vao = self.count_program, self.count_vao
+        self._set_state_uniforms(program)
+        targets = self.reduce_fbos + [self.count_ring_fbo]
 
-            active_count = np.sum(states == 1.0)
-            refractory_count = np.sum((states > 0.0) & (states < 1.0))
+        for level, fbo in enumerate(targets):
+            is_last = level == len(targets) - 1
+            if is_last:
+                # La ultima pasada escribe un unico texel en el buffer circular
+                fbo.viewport = (slot, 0, 1, 1)
+            fbo.use()
 
-            total_cells = self.config.grid_width * self.config.grid_height
-            resting_count = total_cells - active_count - refractory_count
+            program['u_source_texture'].value = 0
+            program['u_source_size'].value = source.size
+            program['u_block'].value = REDUCE_BLOCK
+            program['u_output_offset'].value = (slot, 0) if is_last else (0, 0)
+            vao.render(moderngl.TRIANGLES)
 
-            self.csv_buffer.append([step_index, active_count, refractory_count, resting_count])
-        except Exception as e:
-            print(f"Error al capturar datos del paso {step_index}: {e}")
-        finally:
-            self.doneCurrent()
+            if not is_last:
+                source = self.reduce_textures[level]
+                source.use(location=0)
+                program, vao = self.reduce_program, self.reduce_vao
+
+        self.pending_count_steps.append(step_index)
+
+    def _flush_state_counts(self):
+        """
+        Lee de golpe los recuentos pendientes del buffer circular y los pasa al buffer
+        CSV. Hay que llamarla con el contexto activo.
+        """
+        if not self.pending_count_steps:
+            return
+
+        num_counts = len(self.pending_count_steps)
+        raw_data = self.count_ring_fbo.read(viewport=(0, 0, num_counts, 1), components=4, dtype='u4')
+        ring_data = np.frombuffer(raw_data, dtype=np.uint32).reshape(num_counts, 4).astype(np.int64)
+
+        total_cells = self.config.grid_width * self.config.grid_height
+        for step_index, (active_count, refractory_count, _, _) in zip(self.pending_count_steps, ring_data):
+            resting_count = total_cells - active_count - refractory_count
+            self.csv_buffer.append([step_index, int(active_count), int(refractory_count), int(resting_count)])
+        self.pending_count_steps.clear()
 
     def flush_csv_buffer(self, file_path: str):
         """
         Escribe el buffer CSV al archivo
         """
+        if self.pending_count_steps:
+            self.makeCurrent()
+            try:
+                self._flush_state_counts()
+            finally:
+                self.doneCurrent()
+
         try:
             import os
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
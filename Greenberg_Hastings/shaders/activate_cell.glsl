@@ -1,29 +1,29 @@
 // Shader para activar o desactivar una celda especifica
 
 #version 330 core
-out vec4 FragColor;
+out uvec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture; // Textura actual del estado del grid
+uniform usampler2D u_state_texture; // Textura actual del estado del grid (cuenta atras entera)
 uniform vec2 u_grid_size; // Tamaño del grid
 uniform vec2 u_flip_coord; // Coordenadas de la celda a cambiar
-uniform float dt; // Paso de tiempo (se usa para activar el temporizador en caso de que la celda este inactiva)
+uniform uint u_refractory_period; // Valor del estado excitado
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas
 
 void main(){
-    vec4 current_state = texture(u_state_texture, TexCoords);
-    vec2 current_grid_coord = floor(TexCoords * u_grid_size);
+    ivec2 current_grid_coord = min(ivec2(TexCoords * u_grid_size), ivec2(u_grid_size) - 1);
+    uint current_state = texelFetch(u_state_texture, current_grid_coord, 0).r;
 
-    if (int(current_grid_coord.x) == int(u_flip_coord.x) && int(current_grid_coord.y) == int(u_flip_coord.y)){
-        // Si la celda coincide con la que se ha pulsado
-        if (current_state.g <= 0.0){
-            // Si la celda esta inactiva, activarla
-            FragColor = vec4(1.0, dt, 0.0, 1.0);
+    if (current_grid_coord.x == int(u_flip_coord.x) && current_grid_coord.y == int(u_flip_coord.y)){
+        // Si la celda coincide con la que se ha pulsado (se desbloquea en ambos casos)
+        if ((current_state & ~u_blocked_bit) == 0u){
+            // Si la celda esta en reposo, excitarla
+            FragColor = uvec4(u_refractory_period, 0u, 0u, 1u);
         }else{
-            // Si la celda esta activa, desactivarla
-            FragColor = vec4(0.0, 0.0, 0.0, 1.0);
+            // Si la celda esta activa, pasarla a reposo
+            FragColor = uvec4(0u, 0u, 0u, 1u);
         }
     }else{
-        FragColor = current_state;
+        FragColor = uvec4(current_state, 0u, 0u, 1u);
     }
 }
-
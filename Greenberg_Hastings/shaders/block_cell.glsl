@@ -2,27 +2,22 @@
 
 #version 330 core
 
-out vec4 FragColor;
+out uvec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture; // Textura actual del estado del grid
+uniform usampler2D u_state_texture; // Textura actual del estado del grid (cuenta atras entera)
 uniform vec2 u_grid_size; // Tamaño del grid
 uniform vec2 u_block_coord; // Coordenadas de la celda a bloquear
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas
 
 void main(){
-    vec4 current_state = texture(u_state_texture, TexCoords);
-    vec2 current_grid_coord = floor(TexCoords * u_grid_size);
+    ivec2 current_grid_coord = min(ivec2(TexCoords * u_grid_size), ivec2(u_grid_size) - 1);
+    uint current_state = texelFetch(u_state_texture, current_grid_coord, 0).r;
 
-    if (int(current_grid_coord.x) == int(u_block_coord.x) && int(current_grid_coord.y) == int(u_block_coord.y)){
-        // Si la celda coincide con la que se ha pulsado
-        if (current_state.b <= 0.5){
-            // Celda no bloqueada, bloquearla 
-            FragColor = vec4(current_state.r, current_state.g, 1.0, 1.0);
-        }else{
-            // Si la celda esta bloqueada, desbloquearla
-            FragColor = vec4(current_state.r, current_state.g, 0.0, 1.0);
-        }
+    if (current_grid_coord.x == int(u_block_coord.x) && current_grid_coord.y == int(u_block_coord.y)){
+        // Si la celda coincide con la que se ha pulsado, bloquearla o desbloquearla sin cambiar su estado
+        FragColor = uvec4(current_state ^ u_blocked_bit, 0u, 0u, 1u);
     }else{
-        FragColor = current_state;
+        FragColor = uvec4(current_state, 0u, 0u, 1u);
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,34 @@
+#version 330 core
+// Primera pasada de la reduccion: cuenta las celdas excitadas (r) y refractarias (g)
+// de cada bloque de u_block x u_block celdas. Las de reposo son el resto
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_source_texture; // Textura del estado (R8UI o R16UI)
+uniform ivec2 u_source_size; // Tamaño de la textura de entrada
+uniform int u_block; // Lado del bloque que suma cada fragmento
+uniform ivec2 u_output_offset; // Posicion de la salida (para escribir en el buffer circular)
+
+uniform uint u_refractory_period; // Cuenta atras de las celdas excitadas
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas (no cuenta para el estado)
+
+void main(){
+    ivec2 start = (ivec2(gl_FragCoord.xy) - u_output_offset) * u_block;
+
+    uvec2 total = uvec2(0u);
+    for (int y = 0; y < u_block; y++){
+        for (int x = 0; x < u_block; x++){
+            ivec2 coord = start + ivec2(x, y);
+            if (coord.x >= u_source_size.x || coord.y >= u_source_size.y){
+                continue; // Fuera de la textura (el ultimo bloque puede estar incompleto)
+            }
+            uint v = texelFetch(u_source_texture, coord, 0).r & ~u_blocked_bit;
+            if (v == u_refractory_period){
+                total.x += 1u; // Excitada
+            } else if (v > 0u){
+                total.y += 1u; // Refractaria
+            }
+        }
+    }
+    FragColor = uvec4(total, 0u, 1u);
+}
@@ -4,12 +4,12 @@
 out vec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture; // Textura actual del estado del grid
+uniform usampler2D u_state_texture; // Textura actual del estado del grid (cuenta atras entera)
 uniform float u_zoom_level; // Nivel de zoom
 uniform vec2 u_view_offset; // Offset de la vista en coordenadas de celda
 uniform vec2 u_grid_size; // Tamaño del grid
-
-const float epsilon = 1e-6; 
+uniform uint u_refractory_period; // Valor del estado excitado
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas
 
 void main()
 {
@@ -22,23 +22,26 @@ void main()
         return;
     }
 
-    vec4 current_state = texture(u_state_texture, sample_coord); // Leer el estado actual de la celda
-    float v = current_state.r; // Voltaje de la celda (canal rojo)
-    float is_blocked = current_state.b; // Bloqueo de la celda (canal azul)
+    ivec2 cell_coord = min(ivec2(sample_coord * u_grid_size), ivec2(u_grid_size) - 1);
+    uint current_state = texelFetch(u_state_texture, cell_coord, 0).r; // Leer el estado actual de la celda
+    uint countdown = current_state & ~u_blocked_bit;
+    bool is_blocked = (current_state & u_blocked_bit) != 0u; // Bloqueo de la celda (bit alto)
+    // Voltaje de la celda como en el modelo original: 1 excitada, baja 1/R por paso hasta 0
+    float v = float(countdown) / float(u_refractory_period);
 
     vec3 final_color;
 
-    if (is_blocked > 0.5){
-        if (v > 1.0 - epsilon){
+    if (is_blocked){
+        if (countdown == u_refractory_period){
             final_color = vec3(0.92, 0.0, 1.0); // Magenta para celulas activas bloqueadas (reflectores)
         }else{
             // Si la celula esta inactiva, se bloquea
             final_color = vec3(0.4, 0.4, 0.4); // Gris para células bloqueadas
         }
-    }else if (v > 1.0 - epsilon){
+    }else if (countdown == u_refractory_period){
         // Celula activa
         final_color = vec3(1.0, 1.0, 1.0);
-    }else if (v > epsilon){
+    }else if (countdown > 0u){
         // Celula refractaria
         final_color = vec3(v, 0, 0);
     }else{
@@ -1,94 +1,81 @@
 // Shader para actualizar los automatas segun el modelo de Greenberg-Hastings (Three-State Model)
 #version 330 core
 // Salida
-out vec4 FragColor;
+out uvec4 FragColor;
 //Entrada
 in vec2 TexCoords;
 // Parametros uniforms
-uniform sampler2D u_state_texture; // Textura con el estado actual
+uniform usampler2D u_state_texture; // Textura con el estado actual (R8UI o R16UI)
 uniform vec2 u_grid_size; // Tamaño del grid
 
-uniform float u_refractory_period; // Periodo refractario, si es 2, dos pasos, si es 10, diez pasos...
+uniform uint u_refractory_period; // Periodo refractario, si es 2, dos pasos, si es 10, diez pasos...
 uniform int u_threshold; // Umbral para excitacion desde el estado de reposo
 uniform int u_neighborhood; // Tipo de vecindario: 0 para Moore, 1 para Von Neumann
-
-const float epsilon = 10e-6; // Valor pequeño, para tener cierta tolerancia en comparaciones de punto flotante. QUIZAS DA PROBLEMAS
+uniform uint u_blocked_bit; // Bit alto de la textura, marca las celdas bloqueadas
 
 
 void main(){
 
-    vec4 current_state_data = texture(u_state_texture, TexCoords);
-    float v = current_state_data.r; // Asegurarse de que es -1, 0, o 1
-
-    float is_blocked = current_state_data.b; // Canal azul indica si la celda esta bloqueada
+    ivec2 grid_size = ivec2(u_grid_size);
+    ivec2 cell_coord = min(ivec2(TexCoords * u_grid_size), grid_size - 1);
+    uint current_state_data = texelFetch(u_state_texture, cell_coord, 0).r;
 
-    if (is_blocked > 0.5){
-        FragColor = current_state_data; // Mantener el estado actual si está bloqueado
+    if ((current_state_data & u_blocked_bit) != 0u){
+        FragColor = uvec4(current_state_data, 0u, 0u, 1u); // Mantener el estado actual si está bloqueado
         return;
     }
 
-    float v_new = 0.0;
+    // Cuenta atras entera (el bit de bloqueo es 0 aqui)
+    uint v = current_state_data;
+    uint v_new = 0u;
 
     // Logica general del modelo de Greenberg-Hastings
-    // Si v == 1, excitado (solo durante un paso)
+    // Si v == u_refractory_period, excitado (solo durante un paso)
     // Si v == 0, reposo
-    // Si 0 < v < 1, refractario (durante el numero de pasos definido por u_refractory_period)
+    // Si 0 < v < u_refractory_period, refractario (baja de uno en uno hasta el reposo)
 
-    if (v > epsilon){
-        // Estado excitado o refractario, debe bajar a 0 gradualmente
-        float decay = 1.0 / u_refractory_period;
-        v_new = v - decay; // Disminuir el valor de v en cada paso
-
-        if (v_new < 0.0){
-            v_new = 0.0; // Asegurarse de que no baje de 0
-        }
+    if (v > 0u){
+        // Estado excitado o refractario, baja un paso hacia el reposo
+        v_new = v - 1u;
 
     }else{// Estado de reposo, verificar vecinos para posible excitacion
-        vec2 pixel_step = 1.0 / u_grid_size;
-
-        vec2 neighbors[8];
-
-        neighbors[0] = vec2(0.0, pixel_step.y); // Arriba
-        neighbors[1] = vec2(0.0, -pixel_step.y); // Abajo
-        neighbors[2] = vec2(pixel_step.x, 0.0); // Derecha
-        neighbors[3] = vec2(-pixel_step.x, 0.0); // Izquierda
-        if (u_neighborhood == 0){ // Vecindario de Moore
-            neighbors[4] = vec2(pixel_step.x, pixel_step.y); // Arriba-Derecha
-            neighbors[5] = vec2(-pixel_step.x, pixel_step.y); // Arriba-Izquierda
-            neighbors[6] = vec2(pixel_step.x, -pixel_step.y); // Abajo-Derecha
-            neighbors[7] = vec2(-pixel_step.x, -pixel_step.y); // Abajo-Izquierda
-        }else{ // Vecindario de Von Neumann
-            neighbors[4] = vec2(0.0, 0.0); // No usar
-            neighbors[5] = vec2(0.0, 0.0); // No usar
-            neighbors[6] = vec2(0.0, 0.0); // No usar
-            neighbors[7] = vec2(0.0, 0.0); // No usar
-            }
-
+        ivec2 neighbors[8];
+
+        neighbors[0] = ivec2(0, 1); // Arriba
+        neighbors[1] = ivec2(0, -1); // Abajo
+        neighbors[2] = ivec2(1, 0); // Derecha
+        neighbors[3] = ivec2(-1, 0); // Izquierda
+        neighbors[4] = ivec2(1, 1); // Arriba-Derecha
+        neighbors[5] = ivec2(-1, 1); // Arriba-Izquierda
+        neighbors[6] = ivec2(1, -1); // Abajo-Derecha
+        neighbors[7] = ivec2(-1, -1); // Abajo-Izquierda
+
+        // Moore usa los 8 vecinos y Von Neumann solo los 4 primeros
+        int num_neighbors = (u_neighborhood == 0) ? 8 : 4;
         int excited_neighbors = 0;
 
-        for (int i = 0; i < 8; i++){
-            vec2 neighbor_coords = TexCoords + neighbors[i];
+        for (int i = 0; i < num_neighbors; i++){
+            ivec2 neighbor_coords = cell_coord + neighbors[i];
 
-            // Asegurarse de que las coordenadas del vecino estén dentro de los límites
-            if (neighbor_coords.x < 0.0 || neighbor_coords.x > 1.0 || neighbor_coords.y < 0.0 || neighbor_coords.y > 1.0){
-                continue; // Saltar vecinos fuera de los límites
+            // Los bordes no son periodicos: saltar vecinos fuera de los límites
+            if (any(lessThan(neighbor_coords, ivec2(0))) || any(greaterThanEqual(neighbor_coords, grid_size))){
+                continue;
             }
 
-            float neighbor_v = texture(u_state_texture, neighbor_coords).r;
+            // Las celdas bloqueadas excitadas (reflectores) tambien excitan
+            uint neighbor_v = texelFetch(u_state_texture, neighbor_coords, 0).r & ~u_blocked_bit;
 
-            if (neighbor_v > 1.0 - epsilon){ // Si el vecino está en estado excitado (1)
+            if (neighbor_v == u_refractory_period){ // Si el vecino está en estado excitado
                 excited_neighbors += 1;
             }
         }
 
-        if (excited_neighbors >= int(u_threshold)){
-            v_new = 1.0; // Excitar la celda
+        if (excited_neighbors >= u_threshold){
+            v_new = u_refractory_period; // Excitar la celda
         }else{
-            v_new = 0.0; // Mantener en reposo
+            v_new = 0u; // Mantener en reposo
         }
     }
 
-    FragColor = vec4(v_new, v_new, is_blocked, 1.0); // Canal rojo para el estado, verde y azul en 0, alfa en 1
-
-    
-}
\ No newline at end of file
+    FragColor = uvec4(v_new, 0u, 0u, 1u);
+}
@@ -0,0 +1,84 @@
+// Variante de greenberg_h.glsl para avanzar muchos parametros a la vez.
+// La textura es un atlas de casillas (tiles) del mismo tamaño, cada una es un grid
+// independiente con bordes no periodicos y con su propio periodo refractario y umbral.
+#version 330 core
+// Salida
+out uvec4 FragColor;
+//Entrada
+in vec2 TexCoords;
+// Parametros uniforms
+uniform usampler2D u_state_texture; // Atlas con el estado actual de todas las casillas (R8UI o R16UI)
+uniform usampler2D u_param_texture; // Una texel por casilla: periodo refractario (r) y umbral (g)
+uniform ivec2 u_tile_size; // Tamaño de cada casilla (grid de un experimento)
+
+uniform int u_neighborhood; // Tipo de vecindario: 0 para Moore, 1 para Von Neumann
+uniform uint u_blocked_bit; // Bit alto de la textura, marca las celdas bloqueadas
+
+
+void main(){
+
+    ivec2 coord = ivec2(gl_FragCoord.xy); // Celda del atlas
+    ivec2 tile = coord / u_tile_size; // Casilla a la que pertenece
+    ivec2 tile_origin = tile * u_tile_size;
+    ivec2 cell_coord = coord - tile_origin; // Celda dentro de la casilla
+
+    uvec2 params = texelFetch(u_param_texture, tile, 0).rg;
+    uint refractory_period = params.r;
+    int threshold = int(params.g);
+
+    uint current_state_data = texelFetch(u_state_texture, coord, 0).r;
+
+    if ((current_state_data & u_blocked_bit) != 0u){
+        FragColor = uvec4(current_state_data, 0u, 0u, 1u); // Mantener el estado actual si está bloqueado
+        return;
+    }
+
+    // Cuenta atras entera, la misma logica que en greenberg_h.glsl
+    uint v = current_state_data;
+    uint v_new = 0u;
+
+    if (v > 0u){
+        // Estado excitado o refractario, baja un paso hacia el reposo
+        v_new = v - 1u;
+
+    }else{// Estado de reposo, verificar vecinos para posible excitacion
+        ivec2 neighbors[8];
+
+        neighbors[0] = ivec2(0, 1); // Arriba
+        neighbors[1] = ivec2(0, -1); // Abajo
+        neighbors[2] = ivec2(1, 0); // Derecha
+        neighbors[3] = ivec2(-1, 0); // Izquierda
+        neighbors[4] = ivec2(1, 1); // Arriba-Derecha
+        neighbors[5] = ivec2(-1, 1); // Arriba-Izquierda
+        neighbors[6] = ivec2(1, -1); // Abajo-Derecha
+        neighbors[7] = ivec2(-1, -1); // Abajo-Izquierda
+
+        // Moore usa los 8 vecinos y Von Neumann solo los 4 primeros
+        int num_neighbors = (u_neighborhood == 0) ? 8 : 4;
+        int excited_neighbors = 0;
+
+        for (int i = 0; i < num_neighbors; i++){
+            ivec2 neighbor_coords = cell_coord + neighbors[i];
+
+            // Los bordes de la casilla no son periodicos: saltar vecinos fuera de ella
+            if (any(lessThan(neighbor_coords, ivec2(0))) || any(greaterThanEqual(neighbor_coords, u_tile_size))){
+                continue;
+            }
+
+            // Las celdas bloqueadas excitadas (reflectores) tambien excitan
+            uint neighbor_v = texelFetch(u_state_texture, tile_origin + neighbor_coords, 0).r & ~u_blocked_bit;
+
+            if (neighbor_v == refractory_period){ // Si el vecino está en estado excitado
+                excited_neighbors += 1;
+            }
+        }
+
+        if (excited_neighbors >= threshold){
+            v_new = refractory_period; // Excitar la celda
+        }else{
+            v_new = 0u; // Mantener en reposo
+        }
+    }
+
+    FragColor = uvec4(v_new, 0u, 0u, 1u);
+}
@@ -1,16 +1,19 @@
 #version 330 core
 
-out vec4 FragColor;
+out uvec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture; // Textura actual del estado del grid
+uniform usampler2D u_state_texture; // Textura actual del estado del grid (cuenta atras entera)
 uniform sampler2D u_paste_pattern;
 uniform vec2 u_grid_size; // Tamaño del grid
 uniform vec2 u_pattern_size; // Tamaño del patrón a pegar
 uniform vec2 u_offset; // Offset en coordenadas de celda donde pegar el patrón
+uniform uint u_refractory_period; // Valor del estado excitado
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas
 
 void main(){
-    vec4 current_state = texture(u_state_texture, TexCoords);
+    ivec2 cell_coord = min(ivec2(TexCoords * u_grid_size), ivec2(u_grid_size) - 1);
+    uint current_state = texelFetch(u_state_texture, cell_coord, 0).r;
 
     vec2 pixel_pos = TexCoords * u_grid_size;
 
@@ -24,17 +27,17 @@ void main(){
         vec4 visual_color = texture(u_paste_pattern, pattern_uv);
 
         if (visual_color.a < 0.1){
-            FragColor = current_state;
+            FragColor = uvec4(current_state, 0u, 0u, 1u);
             return;
         }
 
         if (visual_color.r > 0.8){
             // Celda activa 
-            FragColor = vec4(1.0, 0.0, 0.0, 1.0); // Estado activo
+            FragColor = uvec4(u_refractory_period, 0u, 0u, 1u); // Estado activo
         }else{
-            FragColor = vec4(0.0, 0.0, 1.0, 1.0); // Celda bloqueada
+            FragColor = uvec4(u_blocked_bit, 0u, 0u, 1u); // Celda bloqueada
         }
         return;
     }
-    FragColor = current_state;
+    FragColor = uvec4(current_state, 0u, 0u, 1u);
 }
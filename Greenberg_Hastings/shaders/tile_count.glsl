@@ -0,0 +1,40 @@
+#version 330 core
+// Suma por bloques para contar las celdas excitadas (r) y refractarias (g) de cada
+// casilla del atlas. Cada fragmento de salida suma u_length texels de la textura de
+// entrada empezando en su posicion * u_block y avanzando u_step.
+// Con dos pasadas (filas y luego columnas) se obtiene una suma por casilla.
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_source_texture; // Estado (R8UI o R16UI) o sumas parciales (RG32UI)
+uniform usampler2D u_param_texture; // Periodo refractario de cada casilla (r)
+uniform ivec2 u_tile_size; // Tamaño de cada casilla
+uniform ivec2 u_block; // Tamaño del bloque que le toca a cada fragmento
+uniform ivec2 u_step; // Direccion de la suma: (1, 0) filas, (0, 1) columnas
+uniform int u_length; // Numero de texels a sumar
+uniform ivec2 u_output_offset; // Posicion de la salida (para escribir en el buffer circular)
+uniform bool u_count_states; // Si es true se clasifican los estados, si no se suman los valores
+uniform uint u_blocked_bit; // Bit de las celdas bloqueadas (no cuenta para el estado)
+
+void main(){
+    ivec2 start = (ivec2(gl_FragCoord.xy) - u_output_offset) * u_block;
+    uint refractory_period = 0u;
+    if (u_count_states){
+        refractory_period = texelFetch(u_param_texture, start / u_tile_size, 0).r;
+    }
+
+    uvec2 total = uvec2(0u);
+    for (int i = 0; i < u_length; i++){
+        if (u_count_states){
+            uint v = texelFetch(u_source_texture, start + i * u_step, 0).r & ~u_blocked_bit;
+            if (v == refractory_period){
+                total.x += 1u; // Excitada
+            } else if (v > 0u){
+                total.y += 1u; // Refractaria
+            }
+        }else{
+            total += texelFetch(u_source_texture, start + i * u_step, 0).rg;
+        }
+    }
+    FragColor = uvec4(total, 0u, 1u);
+}
@@ -1,12 +1,11 @@
-import pandas as pd
-import re
 from PySide6 import QtWidgets
 import sys
-import os
 import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.pyplot as plt
 
+from results_index import ResultsIndex, KIND_DAMAGE
+
 def generate_3d_plot():
     app = QtWidgets.QApplication([])
 
@@ -24,65 +23,118 @@ def generate_3d_plot():
     survive_range = np.arange(9)
     birth_range = np.arange(9)
 
-    entropy_matrix = np.zeros((len(survive_range), len(birth_range)))
-
     print("Procesando archivos con una densidad de:", density_value)
 
-    for birth in birth_range:
-        for survive in survive_range:
-
-            pattern_str = rf"GoL_size\d+x\d+_density{density_str}_survive{survive}_birth{birth}\.csv$"
-            pattern = re.compile(pattern_str)
+    # Un solo recorrido de la carpeta; las ultimas filas de cada archivo salen del indice
+    results = ResultsIndex(folder_path).group_by_rule(density=int(density_str))
+    sizes = sorted({(width, height) for width, height, _, _ in results})
+    if not sizes:
+        print("No se encontraron archivos con esa densidad.")
+        return
 
-            matched_file = None
+    # Cada tamaño de grid es un experimento distinto: una superficie por tamaño
+    for width, height in sizes:
+        entropy_matrix = np.zeros((len(survive_range), len(birth_range)))
+
+        for birth in birth_range:
+            for survive in survive_range:
+
+                # Puede haber varias replicas del mismo experimento (sufijo _run{i}), se promedian
+                entries = results.get((width, height, survive, birth), [])
+
+                if entries:
+                    replica_entropies = []
+                    for entry in entries:
+                        last_rows = entry.tail
+                        if last_rows is None or len(last_rows) == 0:
+                            print(f"Error al procesar {entry.path}")
+                            continue
+                        entropy_vector = [calculate_shannon_entropy(x, entry.total_cells) for x in last_rows]
+                        replica_entropies.append(np.mean(entropy_vector))
+
+                    entropy_matrix[survive, birth] = np.mean(replica_entropies) if replica_entropies else 0.0
+                else:
+                    print(f"No se encontró archivo para {width}x{height}, survive={survive}, birth={birth}")
+                    entropy_matrix[survive, birth] = 0.0
 
-            for filename in os.listdir(folder_path):
-                if pattern.match(filename):
-                    matched_file = os.path.join(folder_path, filename)
-                    break
+        fig = plt.figure(figsize=(11.69, 8.27))
+        ax = fig.add_subplot(111, projection='3d')
 
-            if matched_file is not None:
-                try:
-                    df = pd.read_csv(matched_file)
+        X, Y = np.meshgrid(birth_range + 1, survive_range + 1)
+        Z = entropy_matrix
 
-                    number_of_average_rows = min(100, len(df))
-                    last_rows = df.tail(number_of_average_rows)
+        surf = ax.plot_surface(X, Y, Z, cmap='viridis')
 
-                    total_cells = df.iloc[0]['Width'] * df.iloc[0]['Height']
+        ax.set_xlabel('Regla de nacimiento', fontsize=14)
+        ax.set_ylabel('Regla de supervivencia', fontsize=14)
+        ax.set_zlabel('Entropía de Shannon', fontsize=14)
+        size_title = f' ({width}x{height})' if len(sizes) > 1 else ''
+        ax.set_title(f'Entropía de Shannon para la densidad inicial $\\rho = {density_value}${size_title}',
+                     fontsize=16, fontweight='bold')
 
-                    entropy_vector = last_rows['Live Cells'].apply(
-                        lambda x: calculate_shannon_entropy(x, total_cells)
-                    )
-                    
-                    average_entropy = np.mean(entropy_vector)
-                    entropy_matrix[survive, birth] = average_entropy
+        fig.colorbar(surf, shrink=0.5, aspect=10)
 
-                except Exception as e:
-                    print(f"Error al procesar {matched_file}: {e}")
-                    entropy_matrix[survive, birth] = 0.0
-            else:
-                print(f"No se encontró archivo para survive={survive}, birth={birth}")
-                entropy_matrix[survive, birth] = 0.0
+        ax.scatter([4], [3], [entropy_matrix[2, 3]+0.01], color='r', s=50, label='Regla Clásica (B3/S2)')
+        ax.plot([4, 4], [3, 3], [entropy_matrix[2, 3], 1], color='red', linewidth=1, zorder=1000)
 
-    fig = plt.figure(figsize=(11.69, 8.27))
-    ax = fig.add_subplot(111, projection='3d')
+        ax.legend()
+    plt.show()
 
-    X, Y = np.meshgrid(birth_range + 1, survive_range + 1)
-    Z = entropy_matrix
+def generate_damage_3d_plot():
+    """
+    Superficie de la distancia de Hamming final (normalizada por el tamaño del grid)
+    entre sopas que empiezan con una celda de diferencia, a partir de los archivos
+    _damage.csv de automate_experiments.py --damage
+    """
+    app = QtWidgets.QApplication([])
 
-    surf = ax.plot_surface(X, Y, Z, cmap='viridis')
+    folder_path = QtWidgets.QFileDialog.getExistingDirectory(
+        None,
+        "Seleccionar carpeta con archivos de propagación de daño"
+    )
 
-    ax.set_xlabel('Regla de nacimiento', fontsize=14)
-    ax.set_ylabel('Regla de supervivencia', fontsize=14)
-    ax.set_zlabel('Entropía de Shannon', fontsize=14)
-    ax.set_title(f'Entropía de Shannon para la densidad inicial $\\rho = {density_value}$', fontsize=16, fontweight='bold')
+    if not folder_path:
+        print("No se seleccionó ninguna carpeta. Saliendo.")
+        return
 
-    fig.colorbar(surf, shrink=0.5, aspect=10)
+    density_value = 0.3
+    density_str = str(int(density_value * 100))
+    survive_range = np.arange(9)
+    birth_range = np.arange(9)
 
-    ax.scatter([4], [3], [entropy_matrix[2, 3]+0.01], color='r', s=50, label='Regla Clásica (B3/S2)')
-    ax.plot([4, 4], [3, 3], [entropy_matrix[2, 3], 1], color='red', linewidth=1, zorder=1000)
+    results = ResultsIndex(folder_path).group_by_rule(KIND_DAMAGE, density=int(density_str))
+    sizes = sorted({(width, height) for width, height, _, _ in results})
+    if not sizes:
+        print("No se encontraron archivos con esa densidad.")
+        return
 
-    plt.legend()
+    # Una superficie por tamaño de grid
+    for width, height in sizes:
+        damage_matrix = np.zeros((len(survive_range), len(birth_range)))
+
+        for birth in birth_range:
+            for survive in survive_range:
+                entries = results.get((width, height, survive, birth))
+                if not entries or entries[0].tail is None:
+                    print(f"No se encontró archivo para {width}x{height}, survive={survive}, birth={birth}")
+                    continue
+                # Media de las ultimas 100 generaciones, como en la entropia
+                damage_matrix[survive, birth] = np.mean(entries[0].tail) / entries[0].total_cells
+
+        fig = plt.figure(figsize=(11.69, 8.27))
+        ax = fig.add_subplot(111, projection='3d')
+
+        X, Y = np.meshgrid(birth_range + 1, survive_range + 1)
+        surf = ax.plot_surface(X, Y, damage_matrix, cmap='inferno')
+
+        ax.set_xlabel('Regla de nacimiento', fontsize=14)
+        ax.set_ylabel('Regla de supervivencia', fontsize=14)
+        ax.set_zlabel('Daño final (fracción del grid)', fontsize=14)
+        size_title = f' ({width}x{height})' if len(sizes) > 1 else ''
+        ax.set_title(f'Propagación de daño para la densidad inicial $\\rho = {density_value}${size_title}',
+                     fontsize=16, fontweight='bold')
+
+        fig.colorbar(surf, shrink=0.5, aspect=10)
     plt.show()
 
 def calculate_shannon_entropy(live_cells, total_cells):
@@ -1,13 +1,23 @@
 from numpy._core.numeric import full
 import sys
 import os
+import re
 import time
 import tqdm
-from PySide6 import QtWidgets
+import csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 
-from config_modern import Config
-from grid_widget_modern import GridWidget
+from bit_life import BitLifeEngine
+from sparse_life import SparseBitLifeEngine
+from hashlife import HashLife
+from life_ensemble import LifeEnsemble
+from rule_space_gpu import RuleSpaceSimulator, create_headless_context
+from cycle_detection import CycleDetector
+from census import ObjectCensus
+from damage_spreading import DamageSpreadingEnsemble, DEFAULT_NUM_SITES
+from soup_search import SOUP_SIZE, SOUP_BOUNDS, SOUPS_PER_BATCH, SoupResults, random_soups, run_soups
+from series_store import SERIES_EXTENSION, write_series, read_series
 
 NUM_STEPS = 20_000
 
@@ -16,8 +26,92 @@ DENSITIES = [0.05, 0.1, 0.3, 0.5, 0.7, 0.9]
 BIRTH_RULES = [5]
 SURVIVE_RULES = [4]
 
+# Simulaciones largas con HashLife: solo se guardan las generaciones de muestreo
+LONG_NUM_STEPS = 1_000_000
+LONG_SAMPLE_TIMES = np.unique(np.concatenate((np.arange(0, 1000), np.geomspace(1000, LONG_NUM_STEPS, 1000).astype(int))))
+
+# Replicas con condiciones iniciales distintas en el modo conjunto (64 por palabra)
+ENSEMBLE_REPLICAS = 64
+
+# Espacio de reglas completo para la superficie de entropia de 3d_graphs.py
+RULE_SPACE_DENSITY = 0.3
+RULE_SPACE_RULES = [(survive, birth) for survive in range(9) for birth in range(9)]
+
+# Periodo maximo de los ciclos que se detectan para terminar antes las simulaciones
+MAX_CYCLE_PERIOD = 64
+
+GRID_WIDTH = 500
+GRID_HEIGHT = 500
+
+# Barrido completo del espacio regla/densidad (9 x 9 x 6 puntos) del modo --sweep
+SWEEP_SURVIVE_RULES = list(range(9))
+SWEEP_BIRTH_RULES = list(range(9))
+SWEEP_SEED = 12345 # Cada punto tiene su propia semilla derivada de esta, se puede repetir
+SWEEP_ENGINES = ('cpu', 'sparse', 'gpu')
+
+# Temporales que escriben los procesos del barrido antes de renombrar (.tmp{pid}.csv o .tmp{pid}.gol)
+SWEEP_TEMP_PATTERN = re.compile(r'GoL_.*\.tmp(\d+)\.\w+$')
+
+# Generaciones entre censos de objetos en el barrido (--census=k), 0 para no hacer censo
+CENSUS_INTERVAL = 0
+CENSUS_HEADER = ['Iteration', 'Object', 'Kind', 'Count']
+
+# Propagacion de daño (--damage): copias con una celda cambiada por cada punto del espacio de reglas
+DAMAGE_NUM_STEPS = 1000
+DAMAGE_NUM_SITES = DEFAULT_NUM_SITES
+DAMAGE_HEADER = ['Iteration', 'Mean Distance', 'Damaged Fraction']
+
+# Busqueda en sopas (--soups): muchas sopas pequeñas por regla, con su poblacion final y su censo
+SOUPS_PER_RULE = 1_000_000
+SOUP_RULES = [(2, 3)]
+SOUP_HEADER = ['Soup', 'Final Population', 'Stable Generation']
+SOUP_CENSUS_HEADER = ['Object', 'Kind', 'Count', 'Soups']
+
+CSV_HEADER = ['Height', 'Width', 'Density', 'Survive', 'Birth', 'Iteration', 'Live Cells']
+
+# Formato de los resultados: SERIES_EXTENSION (serie binaria de series_store) o '.csv'
+OUTPUT_EXTENSION = SERIES_EXTENSION
+
+
+def experiment_filename(width, height, density, survive, birth, run=None, extension=OUTPUT_EXTENSION):
+    """
+    Nombre del archivo de un experimento. Si hay varias replicas se añade _run{run}
+    """
+    density_percent = int(density * 100)
+    run_suffix = "" if run is None else f"_run{run}"
+    return f"GoL_size{width}x{height}_density{density_percent}_survive{survive}_birth{birth}{run_suffix}{extension}"
+
+
+def write_counts_csv(file_path, width, height, density, survive, birth, counts, iterations=None):
+    """
+    Escribe la serie de celdas vivas con el mismo formato que GridWidget.
+    counts[i] es el numero de celdas vivas en la iteracion iterations[i], por defecto
+    todas las iteraciones seguidas empezando por el estado inicial (0)
+    """
+    if iterations is None:
+        iterations = range(len(counts))
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        writer.writerows([height, width, density, survive, birth, int(iteration), int(count)]
+                         for iteration, count in zip(iterations, counts))
+
+
+def write_counts(file_path, width, height, density, survive, birth, counts, iterations=None):
+    """
+    Escribe la serie en el formato que indica la extension del archivo (binario o CSV)
+    """
+    if file_path.endswith(SERIES_EXTENSION):
+        write_series(file_path, width, height, density, survive, birth, counts, iterations)
+    else:
+        write_counts_csv(file_path, width, height, density, survive, birth, counts, iterations)
+
 
 def run_batch_simulation():
+    # Qt solo hace falta para el modo con ventana, el resto de modos funcionan sin el
+    from PySide6 import QtWidgets
+    from config_modern import Config
+    from grid_widget_modern import GridWidget
 
     app = QtWidgets.QApplication(sys.argv)
 
@@ -34,7 +128,7 @@ def run_batch_simulation():
     print(f"Guardando archivos en: {save_directory}")
     # Configuracion inicial, solo importa el tamaño del grid y la velocidad, 
     # el resto es irrelevante porque se va a cambiar dentro del bucle
-    config = Config(grid_width=500, grid_height=500, initial_speed=1000,
+    config = Config(grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, initial_speed=1000,
                     initial_density=0.3, survive=2, birth=3, save_csv=True)
 
     widget = GridWidget(config=config)
@@ -60,8 +154,7 @@ def run_batch_simulation():
             for birth in BIRTH_RULES:
                 
                 # Generar el nombre del archivo basado en los parametros
-                density_percent = int(density * 100)
-                filename = f"GoL_size{config.grid_width}x{config.grid_height}_density{density_percent}_survive{survive}_birth{birth}.csv"
+                filename = experiment_filename(config.grid_width, config.grid_height, density, survive, birth)
                 full_path = os.path.join(save_directory, filename)
                 # Hay que cambiar los parametros del widget directamente
                 # Se cambia en ambos sitios, en las variables y en la config interna
@@ -81,14 +174,17 @@ def run_batch_simulation():
                     pass
 
                 widget.csv_buffer.clear() # Por si acaso no se hubiera limpoado antes
+                widget.cycle_detector = CycleDetector(MAX_CYCLE_PERIOD)
 
                 widget.restart_grid()
 
-                for step in range(NUM_STEPS):
-                    widget.run_life_shader()
-                    if (step + 1) % 100 == 0:
-                        app.processEvents() # Procesar eventos cada 100 pasos para evitar que la app se congele
-                
+                for first_step in range(0, NUM_STEPS, 100):
+                    widget.run_life_steps(min(100, NUM_STEPS - first_step))
+                    app.processEvents() # Procesar eventos cada 100 pasos para evitar que la app se congele
+                    if widget.detected_cycle_period() is not None:
+                        break # La sopa ya esta en un ciclo, el resto no hace falta simularlo
+
+                widget.fill_csv_from_cycle(NUM_STEPS)
                 widget.flush_csv_buffer()  # Escribir los datos almacenados en el buffer al archivo CSV
                 pbar.update(1)
     pbar.close()
@@ -97,5 +193,519 @@ def run_batch_simulation():
     widget.release_resources()
     app.quit()
 
+
+def run_batch_simulation_cpu(save_directory):
+    """
+    Mismo barrido que run_batch_simulation pero con el motor empaquetado en bits (bit_life).
+    No necesita ventana ni GPU, se puede lanzar en maquinas sin pantalla:
+        python automate_experiments.py --cpu <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    total_experiments = len(DENSITIES) * len(BIRTH_RULES) * len(SURVIVE_RULES)
+    pbar = tqdm.tqdm(total=total_experiments, desc="Experimentos completados")
+
+    engine = BitLifeEngine(GRID_WIDTH, GRID_HEIGHT)
+
+    for density in DENSITIES:
+        for survive in SURVIVE_RULES:
+            for birth in BIRTH_RULES:
+                engine.survive_rule = survive
+                engine.birth_rule = birth
+                engine.randomize(density)
+
+                counts = np.empty(NUM_STEPS + 1, dtype=np.int64)
+                counts[0] = engine.live_count()
+                # Se para en cuanto la sopa entra en un ciclo, el resto se rellena con el ciclo
+                counts[1:] = engine.run(NUM_STEPS, max_period=MAX_CYCLE_PERIOD)
+
+                filename = experiment_filename(GRID_WIDTH, GRID_HEIGHT, density, survive, birth)
+                write_counts(os.path.join(save_directory, filename),
+                                 GRID_WIDTH, GRID_HEIGHT, density, survive, birth, counts)
+                pbar.update(1)
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
+def run_ensemble_simulation(save_directory):
+    """
+    Barrido con ENSEMBLE_REPLICAS condiciones iniciales aleatorias por punto, todas
+    avanzadas a la vez por LifeEnsemble. Se escribe un archivo por replica (sufijo _run{i}).
+        python automate_experiments.py --ensemble <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    total_experiments = len(DENSITIES) * len(BIRTH_RULES) * len(SURVIVE_RULES)
+    pbar = tqdm.tqdm(total=total_experiments, desc="Experimentos completados")
+
+    ensemble = LifeEnsemble(GRID_WIDTH, GRID_HEIGHT, num_replicas=ENSEMBLE_REPLICAS)
+
+    for density in DENSITIES:
+        for survive in SURVIVE_RULES:
+            for birth in BIRTH_RULES:
+                ensemble.survive_rule = survive
+                ensemble.birth_rule = birth
+                ensemble.randomize(density)
+
+                counts = np.empty((NUM_STEPS + 1, ENSEMBLE_REPLICAS), dtype=np.int64)
+                counts[0] = ensemble.live_counts()
+                counts[1:] = ensemble.run(NUM_STEPS)
+
+                for run in range(ENSEMBLE_REPLICAS):
+                    filename = experiment_filename(GRID_WIDTH, GRID_HEIGHT, density, survive, birth, run=run)
+                    write_counts(os.path.join(save_directory, filename),
+                                     GRID_WIDTH, GRID_HEIGHT, density, survive, birth, counts[:, run])
+                pbar.update(1)
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
+def run_rule_space_simulation_gpu(save_directory):
+    """
+    Avanza todas las reglas de RULE_SPACE_RULES a la vez en la GPU (un render por paso)
+    y escribe un archivo por regla.
+        python automate_experiments.py --rules-gpu <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    simulator = RuleSpaceSimulator(GRID_WIDTH, GRID_HEIGHT, RULE_SPACE_RULES)
+    try:
+        simulator.randomize(RULE_SPACE_DENSITY)
+
+        counts = np.empty((NUM_STEPS + 1, len(RULE_SPACE_RULES)), dtype=np.int64)
+        counts[0] = simulator.live_counts()
+        for step in tqdm.tqdm(range(NUM_STEPS), desc="Generaciones"):
+            simulator.step()
+            counts[step + 1] = simulator.live_counts()
+    finally:
+        simulator.release_resources()
+
+    for idx, (survive, birth) in enumerate(RULE_SPACE_RULES):
+        filename = experiment_filename(GRID_WIDTH, GRID_HEIGHT, RULE_SPACE_DENSITY, survive, birth)
+        write_counts(os.path.join(save_directory, filename),
+                         GRID_WIDTH, GRID_HEIGHT, RULE_SPACE_DENSITY, survive, birth, counts[:, idx])
+    print("Todos los experimentos han sido completados.")
+
+
+def run_long_simulation_hashlife(save_directory):
+    """
+    Barrido de simulaciones muy largas (LONG_NUM_STEPS generaciones) con HashLife.
+    Solo se escriben las filas de LONG_SAMPLE_TIMES.
+    OJO: HashLife usa un universo infinito, no periodico como el del shader.
+        python automate_experiments.py --hashlife <carpeta>
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    total_experiments = len(DENSITIES) * len(BIRTH_RULES) * len(SURVIVE_RULES)
+    pbar = tqdm.tqdm(total=total_experiments, desc="Experimentos completados")
+
+    for density in DENSITIES:
+        for survive in SURVIVE_RULES:
+            for birth in BIRTH_RULES:
+                engine = HashLife(survive=survive, birth=birth)
+                engine.randomize(GRID_WIDTH, GRID_HEIGHT, density)
+
+                counts = engine.run_sampled(LONG_SAMPLE_TIMES)
+
+                filename = experiment_filename(GRID_WIDTH, GRID_HEIGHT, density, survive, birth)
+                write_counts(os.path.join(save_directory, filename),
+                                 GRID_WIDTH, GRID_HEIGHT, density, survive, birth, counts,
+                                 iterations=LONG_SAMPLE_TIMES)
+                pbar.update(1)
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
+def sweep_points(densities, survive_rules, birth_rules):
+    """
+    Puntos (densidad, survive, birth) del barrido, en el mismo orden que los bucles anidados
+    """
+    return [(density, survive, birth) for density in densities
+            for survive in survive_rules for birth in birth_rules]
+
+
+def census_filename(file_path):
+    """
+    Tabla de objetos de un experimento: el mismo nombre con _census.csv
+    """
+    return os.path.splitext(file_path)[0] + "_census.csv"
+
+
+def write_census_table(file_path, censuses, kinds):
+    """
+    Escribe la frecuencia de cada objeto en cada censo: filas (iteracion, objeto, tipo, numero)
+    """
+    with open(file_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CENSUS_HEADER)
+        for iteration, census in censuses:
+            writer.writerows([iteration, name, kinds.get(name, ''), count]
+                             for name, count in sorted(census.items()))
+
+
+def is_experiment_complete(file_path, num_steps, census_interval=0):
+    """
+    Un experimento esta completo si su archivo existe y tiene las num_steps + 1 iteraciones
+    (y su tabla de objetos si se hace censo)
+    """
+    if not os.path.exists(file_path):
+        return False
+    if census_interval and not os.path.exists(census_filename(file_path)):
+        return False
+    try:
+        if file_path.endswith(SERIES_EXTENSION):
+            return len(read_series(file_path)) >= num_steps + 1
+        with open(file_path, 'rb') as f:
+            return sum(1 for _ in f) >= num_steps + 2 # Cabecera y una fila por iteracion
+    except Exception:
+        return False
+
+
+def _process_alive(pid):
+    """
+    Si el proceso pid sigue en marcha. En Windows os.kill(pid, 0) no comprueba nada
+    (manda un Ctrl+C), asi que ahi se supone que sigue vivo
+    """
+    if pid == os.getpid() or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True # Existe pero es de otro usuario
+    return True
+
+
+_worker_context = None # Contexto de OpenGL de cada proceso del pool (motor 'gpu')
+
+
+def _sweep_context():
+    """
+    Crear un contexto por punto no funciona con todos los drivers, cada proceso reutiliza el suyo
+    """
+    global _worker_context
+    if _worker_context is None:
+        _worker_context = create_headless_context()
+    return _worker_context
+
+
+def _run_sweep_point(file_path, width, height, density, survive, birth, num_steps, engine, census_interval=0):
+    """
+    Simula un punto del barrido en un proceso del pool. El archivo se escribe con otro
+    nombre y se renombra al terminar, asi que si el proceso muere no queda a medias.
+    Con census_interval > 0 se hace un censo de objetos cada census_interval generaciones.
+    Devuelve las generaciones que se han simulado de verdad (sin las rellenadas con el ciclo)
+    """
+    seed = np.random.SeedSequence([SWEEP_SEED, width, height, int(round(density * 1000)), survive, birth])
+    rng = np.random.default_rng(seed)
+
+    if engine == 'gpu':
+        # Motor de GPU sin ventana: el atlas de reglas con una sola casilla
+        simulator = RuleSpaceSimulator(width, height, [(survive, birth)], ctx=_sweep_context())
+        try:
+            simulator.set_cells((rng.random((height, width)) < density)[None])
+            counts = np.empty(num_steps + 1, dtype=np.int64)
+            counts[0] = simulator.live_counts()[0]
+            counts[1:] = simulator.run(num_steps)[:, 0]
+            simulated = num_steps
+        finally:
+            simulator.release_resources()
+    else:
+        engine_class = SparseBitLifeEngine if engine == 'sparse' else BitLifeEngine
+        life = engine_class(width, height, survive, birth)
+        life.randomize(density, rng)
+        counts = np.empty(num_steps + 1, dtype=np.int64)
+        counts[0] = life.live_count()
+        if not census_interval:
+            counts[1:] = life.run(num_steps, max_period=MAX_CYCLE_PERIOD)
+        else:
+            census = ObjectCensus(survive, birth)
+            censuses = [] # La sopa inicial no tiene objetos que contar, el primero es en census_interval
+            for first_step in range(0, num_steps, census_interval):
+                last_step = min(first_step + census_interval, num_steps)
+                counts[first_step + 1:last_step + 1] = life.run(last_step - first_step, max_period=MAX_CYCLE_PERIOD)
+                censuses.append((last_step, census.census_engine(life)))
+
+                lag = last_step - life.iteration_count
+                if lag > 0:
+                    # La sopa ha entrado en un ciclo y el motor se ha quedado en la iteracion en
+                    # la que lo detecto. El resto de la serie sale del ciclo y los objetos ya no
+                    # cambian (como mucho de fase), asi que los censos que faltan son el mismo
+                    if last_step < num_steps:
+                        counts[last_step + 1:] = life.run(lag + num_steps - last_step, max_period=MAX_CYCLE_PERIOD)[lag:]
+                    for iteration in range(last_step + census_interval, num_steps + census_interval, census_interval):
+                        censuses.append((min(iteration, num_steps), censuses[-1][1]))
+                    break
+            census_path = census_filename(file_path)
+            census_temp = f"{os.path.splitext(census_path)[0]}.tmp{os.getpid()}.csv"
+            write_census_table(census_temp, censuses, census.kinds)
+            os.replace(census_temp, census_path)
+        simulated = life.iteration_count
+
+    root, extension = os.path.splitext(file_path)
+    temp_path = f"{root}.tmp{os.getpid()}{extension}"
+    write_counts(temp_path, width, height, density, survive, birth, counts)
+    os.replace(temp_path, file_path)
+    return simulated
+
+
+def run_parallel_sweep(save_directory, densities=DENSITIES, survive_rules=SWEEP_SURVIVE_RULES,
+                       birth_rules=SWEEP_BIRTH_RULES, num_steps=NUM_STEPS, engine='cpu', workers=None,
+                       census_interval=CENSUS_INTERVAL):
+    """
+    Barrido sin ventana repartido entre un pool de procesos (por defecto uno por nucleo).
+    Los puntos cuyo archivo ya esta completo se saltan, asi que si se corta se puede
+    volver a lanzar con los mismos parametros y sigue por donde iba.
+    Con census_interval > 0 se escribe tambien la tabla de objetos de cada punto (census.py).
+        python automate_experiments.py --sweep <carpeta> [--engine=cpu|sparse|gpu] [--workers=N] [--census=k]
+    """
+    if engine not in SWEEP_ENGINES:
+        raise ValueError(f"Motor desconocido '{engine}', tiene que ser uno de {SWEEP_ENGINES}")
+    if census_interval and engine == 'gpu':
+        raise ValueError("El censo de objetos solo funciona con los motores de CPU ('cpu' o 'sparse')")
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    # Restos de una ejecucion anterior que se corto a medias. Solo se borran los de
+    # procesos que ya no existen: puede haber otro barrido escribiendo en la misma carpeta
+    for filename in os.listdir(save_directory):
+        match = SWEEP_TEMP_PATTERN.match(filename)
+        if match and not _process_alive(int(match.group(1))):
+            try:
+                os.remove(os.path.join(save_directory, filename))
+            except FileNotFoundError:
+                pass
+
+    pending = []
+    for density, survive, birth in sweep_points(densities, survive_rules, birth_rules):
+        file_path = os.path.join(save_directory,
+                                 experiment_filename(GRID_WIDTH, GRID_HEIGHT, density, survive, birth))
+        if not is_experiment_complete(file_path, num_steps, census_interval):
+            pending.append((file_path, density, survive, birth))
+
+    total_points = len(densities) * len(survive_rules) * len(birth_rules)
+    print(f"{total_points - len(pending)} de {total_points} puntos ya estaban completos")
+    if not pending:
+        return
+
+    workers = workers or os.cpu_count()
+    pbar = tqdm.tqdm(total=len(pending), desc="Puntos completados")
+    start_time = time.perf_counter()
+    simulated_cells = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_sweep_point, file_path, GRID_WIDTH, GRID_HEIGHT, density, survive, birth,
+                                   num_steps, engine, census_interval): (density, survive, birth)
+                   for file_path, density, survive, birth in pending}
+        for future in as_completed(futures):
+            density, survive, birth = futures[future]
+            try:
+                simulated_cells += future.result() * GRID_WIDTH * GRID_HEIGHT
+            except Exception as e:
+                print(f"Error en el punto densidad={density}, survive={survive}, birth={birth}: {e}")
+            elapsed = time.perf_counter() - start_time
+            pbar.update(1)
+            pbar.set_postfix_str(f"{pbar.n / elapsed:.2f} puntos/s, {simulated_cells / elapsed:.3g} celdas/s")
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
+def damage_filename(width, height, density, survive, birth):
+    """
+    Curva de propagacion de daño de una regla: el nombre del experimento con _damage.csv
+    """
+    return os.path.splitext(experiment_filename(width, height, density, survive, birth))[0] + "_damage.csv"
+
+
+def _run_damage_point(file_path, width, height, density, survive, birth, num_steps, num_sites):
+    """
+    Avanza una sopa y num_sites copias con una celda cambiada y escribe, en cada
+    generacion, la distancia de Hamming media y la fraccion de copias que siguen distintas
+    """
+    seed = np.random.SeedSequence([SWEEP_SEED, width, height, int(round(density * 1000)), survive, birth])
+    ensemble = DamageSpreadingEnsemble(width, height, num_sites=num_sites, survive=survive, birth=birth)
+    ensemble.randomize(density, np.random.default_rng(seed))
+
+    distances = np.empty((num_steps + 1, num_sites), dtype=np.int64)
+    distances[0] = ensemble.hamming_distances()
+    distances[1:] = ensemble.run(num_steps)
+
+    temp_path = f"{os.path.splitext(file_path)[0]}.tmp{os.getpid()}.csv"
+    with open(temp_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(DAMAGE_HEADER)
+        writer.writerows([iteration, float(mean), float(fraction)] for iteration, mean, fraction
+                         in zip(range(num_steps + 1), distances.mean(axis=1), (distances > 0).mean(axis=1)))
+    os.replace(temp_path, file_path)
+    return num_steps * (num_sites + 1)
+
+
+def run_damage_spreading_sweep(save_directory, density=RULE_SPACE_DENSITY, rules=RULE_SPACE_RULES,
+                               num_steps=DAMAGE_NUM_STEPS, num_sites=DAMAGE_NUM_SITES, workers=None):
+    """
+    Curvas de propagacion de daño de todas las reglas, repartidas entre un pool de procesos.
+    Igual que --sweep, las reglas que ya tienen su archivo se saltan.
+        python automate_experiments.py --damage <carpeta> [--workers=N]
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    pending = []
+    for survive, birth in rules:
+        file_path = os.path.join(save_directory, damage_filename(GRID_WIDTH, GRID_HEIGHT, density, survive, birth))
+        if not os.path.exists(file_path):
+            pending.append((file_path, survive, birth))
+    print(f"{len(rules) - len(pending)} de {len(rules)} reglas ya estaban completas")
+    if not pending:
+        return
+
+    pbar = tqdm.tqdm(total=len(pending), desc="Reglas completadas")
+    start_time = time.perf_counter()
+    simulated_cells = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_run_damage_point, file_path, GRID_WIDTH, GRID_HEIGHT, density, survive, birth,
+                                   num_steps, num_sites): (survive, birth)
+                   for file_path, survive, birth in pending}
+        for future in as_completed(futures):
+            survive, birth = futures[future]
+            try:
+                simulated_cells += future.result() * GRID_WIDTH * GRID_HEIGHT
+            except Exception as e:
+                print(f"Error en la regla survive={survive}, birth={birth}: {e}")
+            elapsed = time.perf_counter() - start_time
+            pbar.update(1)
+            pbar.set_postfix_str(f"{pbar.n / elapsed:.2f} reglas/s, {simulated_cells / elapsed:.3g} celdas/s")
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
+def soup_filename(survive, birth, soup_size=SOUP_SIZE, bounds=SOUP_BOUNDS):
+    """
+    Resultados por sopa de una regla en la busqueda en sopas (el censo va en el mismo nombre con _census.csv)
+    """
+    return f"GoL_soups{soup_size}in{bounds}x{bounds}_survive{survive}_birth{birth}.csv"
+
+
+_worker_censuses = {} # Regla -> ObjectCensus de cada proceso, para no perder las caches entre lotes
+
+
+def _run_soup_batch(survive, birth, batch_index, num_soups):
+    """
+    Simula un lote de sopas de una regla hasta que se estabilizan, con el censo de su ceniza
+    """
+    seed = np.random.SeedSequence([SWEEP_SEED, SOUP_SIZE, SOUP_BOUNDS, survive, birth, batch_index])
+    cells = random_soups(num_soups, np.random.default_rng(seed))
+    census = _worker_censuses.get((survive, birth))
+    if census is None:
+        census = _worker_censuses[(survive, birth)] = ObjectCensus(survive, birth)
+    return run_soups(cells, survive, birth, census=census)
+
+
+def write_soup_results(file_path, results: SoupResults):
+    """
+    Escribe la poblacion final y la generacion de estabilizacion de cada sopa (-1 si no
+    se estabilizo) y, en el archivo de censo, cuantas veces y en cuantas sopas aparece cada objeto
+    """
+    root, extension = os.path.splitext(file_path)
+    temp_path = f"{root}.tmp{os.getpid()}{extension}"
+    with open(temp_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(SOUP_HEADER)
+        writer.writerows(zip(range(len(results)), results.populations.tolist(), results.generations.tolist()))
+
+    census_path = census_filename(file_path)
+    census_temp = f"{os.path.splitext(census_path)[0]}.tmp{os.getpid()}.csv"
+    with open(census_temp, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(SOUP_CENSUS_HEADER)
+        writer.writerows([name, results.kinds.get(name, ''), count, results.soups_with[name]]
+                         for name, count in results.objects.most_common())
+
+    # El archivo de sopas se renombra el ultimo: si existe, la regla esta completa
+    os.replace(census_temp, census_path)
+    os.replace(temp_path, file_path)
+
+
+def run_soup_search(save_directory, rules=SOUP_RULES, num_soups=SOUPS_PER_RULE, workers=None):
+    """
+    Busqueda en sopas: num_soups sopas aleatorias de SOUP_SIZE x SOUP_SIZE en un grid
+    periodico de SOUP_BOUNDS x SOUP_BOUNDS por regla, en lotes de SOUPS_PER_BATCH
+    repartidos entre un pool de procesos. Las reglas que ya tienen sus archivos se saltan.
+        python automate_experiments.py --soups <carpeta> [--count=N] [--workers=N] [--rules=all]
+    """
+    os.makedirs(save_directory, exist_ok=True)
+    print(f"Guardando archivos en: {save_directory}")
+
+    pending = [(survive, birth) for survive, birth in rules
+               if not os.path.exists(os.path.join(save_directory, soup_filename(survive, birth)))]
+    print(f"{len(rules) - len(pending)} de {len(rules)} reglas ya estaban completas")
+    if not pending:
+        return
+
+    batch_sizes = [min(SOUPS_PER_BATCH, num_soups - start) for start in range(0, num_soups, SOUPS_PER_BATCH)]
+    batches = {rule: {} for rule in pending} # Regla -> indice del lote -> SoupResults
+
+    pbar = tqdm.tqdm(total=num_soups * len(pending), desc="Sopas completadas")
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_run_soup_batch, survive, birth, batch_index, batch_size):
+                   ((survive, birth), batch_index, batch_size)
+                   for survive, birth in pending for batch_index, batch_size in enumerate(batch_sizes)}
+        for future in as_completed(futures):
+            rule, batch_index, batch_size = futures[future]
+            try:
+                batches[rule][batch_index] = future.result()
+            except Exception as e:
+                print(f"Error en la regla survive={rule[0]}, birth={rule[1]}, lote {batch_index}: {e}")
+                batches[rule][batch_index] = None
+            pbar.update(batch_size)
+            pbar.set_postfix_str(f"{pbar.n / (time.perf_counter() - start_time):.0f} sopas/s")
+
+            if len(batches[rule]) < len(batch_sizes):
+                continue
+            rule_results = batches.pop(rule)
+            rule_batches = [rule_results[idx] for idx in range(len(batch_sizes))]
+            if any(batch is None for batch in rule_batches):
+                print(f"La regla survive={rule[0]}, birth={rule[1]} tiene lotes con errores, no se guarda")
+                continue
+            results = rule_batches[0]
+            for batch in rule_batches[1:]:
+                results = results.merge(batch)
+            write_soup_results(os.path.join(save_directory, soup_filename(*rule)), results)
+            stable = results.generations >= 0
+            print(f"Regla survive={rule[0]}, birth={rule[1]}: {stable.mean():.1%} estabilizadas, "
+                  f"poblacion final media {results.populations.mean():.1f}, "
+                  f"objetos mas comunes {[name for name, _ in results.objects.most_common(3)]}")
+    pbar.close()
+    print("Todos los experimentos han sido completados.")
+
+
 if __name__ == "__main__":
-    run_batch_simulation()
\ No newline at end of file
+    if len(sys.argv) > 2 and sys.argv[1] == '--cpu':
+        run_batch_simulation_cpu(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--ensemble':
+        run_ensemble_simulation(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--rules-gpu':
+        run_rule_space_simulation_gpu(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--hashlife':
+        run_long_simulation_hashlife(sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == '--damage':
+        options = dict(arg[2:].split('=', 1) for arg in sys.argv[3:] if arg.startswith('--') and '=' in arg)
+        run_damage_spreading_sweep(sys.argv[2], workers=int(options['workers']) if 'workers' in options else None)
+    elif len(sys.argv) > 2 and sys.argv[1] == '--soups':
+        options = dict(arg[2:].split('=', 1) for arg in sys.argv[3:] if arg.startswith('--') and '=' in arg)
+        run_soup_search(sys.argv[2], rules=RULE_SPACE_RULES if options.get('rules') == 'all' else SOUP_RULES,
+                        num_soups=int(options.get('count', SOUPS_PER_RULE)),
+                        workers=int(options['workers']) if 'workers' in options else None)
+    elif len(sys.argv) > 2 and sys.argv[1] == '--sweep':
+        options = dict(arg[2:].split('=', 1) for arg in sys.argv[3:] if arg.startswith('--') and '=' in arg)
+        run_parallel_sweep(sys.argv[2], engine=options.get('engine', 'cpu'),
+                           workers=int(options['workers']) if 'workers' in options else None,
+                           census_interval=int(options.get('census', CENSUS_INTERVAL)))
+    else:
+        run_batch_simulation()
\ No newline at end of file
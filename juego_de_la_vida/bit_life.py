@@ -0,0 +1,267 @@
+"""
+Motor del Juego de la Vida en CPU con el estado empaquetado en bits.
+
+Cada fila del grid se guarda en palabras uint64 (64 celdas por palabra) y el
+numero de vecinos se calcula con sumadores bit a bit, de forma que una sola
+operacion de NumPy avanza 64 celdas a la vez. No necesita ni ventana ni GPU,
+por lo que se puede usar en los experimentos automatizados.
+
+La logica es la misma que la de shaders_modern/life_game.glsl:
+    - Una celda viva sobrevive si tiene u_survive o u_birth vecinos vivos
+    - Una celda muerta nace si tiene u_birth vecinos vivos
+    - Las celdas que han estado vivas alguna vez se quedan en estado 'fantasma' (0.3)
+    - Los bordes son periodicos (la textura usa GL_REPEAT)
+"""
+
+import numpy as np
+
+from cycle_detection import CycleDetector
+
+WORD_BITS = 64
+
+GHOST_VALUE = 0.3 # Valor del estado fantasma en la textura
+
+
+def rule_masks(survive: int, birth: int) -> tuple[int, int]:
+    """
+    Convierte las reglas de supervivencia y nacimiento del shader en mascaras de 9 bits.
+    El bit n de la mascara indica si la regla se cumple con n vecinos vivos.
+    """
+    survive_mask = (1 << survive) | (1 << birth) # En el shader se sobrevive con survive o con birth
+    birth_mask = 1 << birth
+    return survive_mask, birth_mask
+
+
+def pack_rows(cells: np.ndarray) -> np.ndarray:
+    """
+    Empaqueta una matriz booleana (alto, ancho) en palabras uint64 (alto, palabras).
+    El bit j de la palabra k corresponde a la celda x = 64 * k + j.
+    """
+    cells = np.asarray(cells, dtype=bool)
+    height, width = cells.shape[-2:]
+    num_words = (width + WORD_BITS - 1) // WORD_BITS
+
+    padded = np.zeros(cells.shape[:-1] + (num_words * WORD_BITS,), dtype=bool)
+    padded[..., :width] = cells
+
+    packed_bytes = np.packbits(padded, axis=-1, bitorder='little')
+    return packed_bytes.view('<u8').astype(np.uint64, copy=False).reshape(cells.shape[:-1] + (num_words,))
+
+
+def unpack_rows(words: np.ndarray, width: int) -> np.ndarray:
+    """
+    Operacion inversa de pack_rows, devuelve una matriz booleana (alto, ancho)
+    """
+    words = np.ascontiguousarray(words, dtype='<u8')
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder='little')
+    return bits[..., :width].astype(bool)
+
+
+def _half_add(a, b):
+    return a ^ b, a & b
+
+
+def _full_add(a, b, c):
+    partial = a ^ b
+    return partial ^ c, (a & b) | (c & partial)
+
+
+def count_neighbour_bits(neighbours):
+    """
+    Suma 8 planos de bits (uno por vecino) y devuelve el numero de vecinos vivos
+    como 4 planos de bits (bit 0, 1, 2 y 3 del contador, suficiente para llegar a 8)
+    """
+    n0, n1, n2, n3, n4, n5, n6, n7 = neighbours
+
+    sum_a, carry_a = _full_add(n0, n1, n2)
+    sum_b, carry_b = _full_add(n3, n4, n5)
+    sum_c, carry_c = _half_add(n6, n7)
+
+    bit0, carry_d = _full_add(sum_a, sum_b, sum_c)
+
+    # Los acarreos tienen peso 2
+    sum_e, carry_e = _full_add(carry_a, carry_b, carry_c)
+    bit1, carry_f = _half_add(sum_e, carry_d)
+
+    # Los acarreos restantes tienen peso 4
+    bit2, bit3 = _half_add(carry_e, carry_f)
+    return bit0, bit1, bit2, bit3
+
+
+def match_count_mask(count_bits, mask: int):
+    """
+    Devuelve un plano de bits con las celdas cuyo numero de vecinos esta en la mascara
+    """
+    bit0 = count_bits[0]
+    result = np.zeros_like(bit0)
+    if mask == 0:
+        return result
+
+    inverted = [~bit for bit in count_bits]
+
+    for count in range(9):
+        if not (mask >> count) & 1:
+            continue
+        term = None
+        for bit_idx in range(4):
+            plane = count_bits[bit_idx] if (count >> bit_idx) & 1 else inverted[bit_idx]
+            term = plane if term is None else term & plane
+        result |= term
+    return result
+
+
+def step_rows(rows, west_words, east_words, west_bit, east_bit, valid_mask, survive_mask: int, birth_mask: int):
+    """
+    Avanza una generacion un bloque de filas empaquetadas.
+
+    rows, west_words y east_words tienen forma (..., filas + 2, palabras): la primera y
+    la ultima fila son el halo (vecinos de arriba y abajo). west_words/east_words son
+    las palabras de las que vienen los bits que cruzan de una palabra a la siguiente,
+    y west_bit/east_bit la posicion de ese bit (63 salvo en el borde periodico del grid).
+    Devuelve las filas centrales (..., filas, palabras) en la siguiente generacion.
+    """
+    west = (rows << np.uint64(1)) | ((west_words >> west_bit) & np.uint64(1))
+    east = (rows >> np.uint64(1)) | ((east_words & np.uint64(1)) << east_bit)
+    west &= valid_mask
+    east &= valid_mask
+
+    neighbours = (
+        west[..., :-2, :], rows[..., :-2, :], east[..., :-2, :],
+        west[..., 1:-1, :], east[..., 1:-1, :],
+        west[..., 2:, :], rows[..., 2:, :], east[..., 2:, :],
+    )
+    count_bits = count_neighbour_bits(neighbours)
+
+    alive = rows[..., 1:-1, :]
+    survive = match_count_mask(count_bits, survive_mask)
+    birth = match_count_mask(count_bits, birth_mask)
+
+    return ((alive & survive) | (~alive & birth)) & valid_mask
+
+
+class BitLifeEngine:
+    """
+    Juego de la Vida empaquetado en bits (64 celdas por palabra uint64).
+    Tiene la misma interfaz de reglas que el shader (survive_rule, birth_rule)
+    """
+
+    def __init__(self, width: int, height: int, survive: int = 2, birth: int = 3):
+        self.width = width
+        self.height = height
+        self.num_words = (width + WORD_BITS - 1) // WORD_BITS
+
+        self.survive_rule = survive
+        self.birth_rule = birth
+
+        self.iteration_count = 0
+
+        # Planos de bits: celdas vivas y celdas que han estado vivas alguna vez
+        self.alive = np.zeros((height, self.num_words), dtype=np.uint64)
+        self.visited = np.zeros((height, self.num_words), dtype=np.uint64)
+
+        # Palabra de la que viene el bit que cruza hacia el oeste/este y en que bit esta.
+        # En los bordes el grid es periodico, y si el ancho no es multiplo de 64 el
+        # ultimo bit valido de la fila no es el 63.
+        last_bit = (width - 1) % WORD_BITS
+        word_idx = np.arange(self.num_words)
+        self._west_src = np.roll(word_idx, 1)
+        self._east_src = np.roll(word_idx, -1)
+        self._west_bit = np.full(self.num_words, WORD_BITS - 1, dtype=np.uint64)
+        self._west_bit[0] = last_bit
+        self._east_bit = np.full(self.num_words, WORD_BITS - 1, dtype=np.uint64)
+        self._east_bit[-1] = last_bit
+
+        # Mascara de bits validos (la ultima palabra puede tener relleno)
+        self._valid_mask = np.full(self.num_words, np.iinfo(np.uint64).max, dtype=np.uint64)
+        if width % WORD_BITS:
+            self._valid_mask[-1] = np.uint64((1 << (width % WORD_BITS)) - 1)
+
+    @property
+    def rule_masks(self) -> tuple[int, int]:
+        return rule_masks(self.survive_rule, self.birth_rule)
+
+    def randomize(self, density: float, rng: np.random.Generator = None):
+        """
+        Inicializa el grid con celdas vivas aleatorias segun la densidad
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_cells(rng.random((self.height, self.width)) < density)
+
+    def set_cells(self, cells: np.ndarray):
+        """
+        Carga un estado booleano (alto, ancho). Se borra el historial de fantasmas.
+        """
+        cells = np.asarray(cells, dtype=bool)
+        if cells.shape != (self.height, self.width):
+            raise ValueError(f"El estado tiene forma {cells.shape}, se esperaba {(self.height, self.width)}")
+        self.alive = pack_rows(cells)
+        self.visited = self.alive.copy()
+        self.iteration_count = 0
+
+    def set_state_array(self, state: np.ndarray):
+        """
+        Carga un estado con los valores de la textura (1.0 viva, 0.3 fantasma, 0.0 muerta)
+        """
+        state = np.asarray(state)
+        self.set_cells(state > 0.5)
+        self.visited = pack_rows(state > 0.0)
+
+    def get_cells(self) -> np.ndarray:
+        """
+        Devuelve el estado actual como matriz booleana (alto, ancho)
+        """
+        return unpack_rows(self.alive, self.width)
+
+    def get_state_array(self) -> np.ndarray:
+        """
+        Devuelve el estado con los mismos valores que el canal R de la textura
+        """
+        alive = unpack_rows(self.alive, self.width)
+        visited = unpack_rows(self.visited, self.width)
+        state = np.where(visited, GHOST_VALUE, 0.0).astype('f4')
+        state[alive] = 1.0
+        return state
+
+    def live_count(self) -> int:
+        return int(np.bitwise_count(self.alive).sum())
+
+    def state_key(self) -> bytes:
+        """
+        Clave exacta del estado para detectar ciclos (los fantasmas no influyen en la evolucion)
+        """
+        return self.alive.tobytes()
+
+    def step(self):
+        """
+        Avanza una generacion
+        """
+        survive_mask, birth_mask = self.rule_masks
+        # Filas con el halo periodico de arriba y abajo
+        rows = np.concatenate((self.alive[-1:], self.alive, self.alive[:1]), axis=0)
+
+        self.alive = step_rows(rows, rows[:, self._west_src], rows[:, self._east_src],
+                               self._west_bit, self._east_bit, self._valid_mask,
+                               survive_mask, birth_mask)
+        self.visited |= self.alive
+        self.iteration_count += 1
+
+    def run(self, n_steps: int, max_period: int = 0) -> np.ndarray:
+        """
+        Ejecuta n_steps generaciones y devuelve el numero de celdas vivas tras cada una.
+        Si max_period > 0 se para en cuanto el estado se repite con un periodo
+        <= max_period y el resto de la serie se rellena con el ciclo, sin simularlo
+        (iteration_count y el estado se quedan en la iteracion en la que se detecto).
+        """
+        detector = CycleDetector(max_period) if max_period > 0 else None
+        if detector is not None:
+            detector.update(self.iteration_count, self.state_key(), self.live_count())
+
+        counts = np.empty(n_steps, dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            counts[step] = self.live_count()
+            if detector is not None and detector.update(self.iteration_count, self.state_key(), counts[step]):
+                remaining = np.arange(self.iteration_count + 1, self.iteration_count + n_steps - step)
+                counts[step + 1:] = detector.counts_for(remaining)
+                break
+        return counts
@@ -0,0 +1,342 @@
+"""
+Censo de objetos del Juego de la Vida: cuantos bloques, colmenas, parpadeadores,
+planeadores... hay en un estado, ademas del numero total de celdas vivas.
+
+    1. Se etiquetan las componentes conexas de celdas vivas (vecindad de Moore,
+       con los bordes periodicos del grid).
+    2. Cada objeto se recorta y se pasa a una forma canonica: la menor de sus 8
+       rotaciones/reflexiones, para que un planeador sea el mismo objeto vaya hacia
+       donde vaya.
+    3. La forma canonica se busca en una tabla de objetos conocidos (todas sus fases)
+       de la regla clasica B3/S23. Si no esta, se simula el objeto aislado hasta
+       CLASSIFY_MAX_PERIOD generaciones para ver si es una vida estatica, un oscilador
+       o una nave, y se le pone un nombre por su tipo, periodo y poblacion.
+
+Las clasificaciones se guardan en cache (por la forma recortada tal cual y por la
+canonica), asi que en una sopa que ya es ceniza los objetos no se vuelven a
+clasificar en cada censo y el coste es basicamente el del etiquetado.
+
+Los objetos que se tocan (a distancia 1) se cuentan como uno solo.
+"""
+
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from scipy.ndimage import label
+
+from bit_life import BitLifeEngine, unpack_rows
+from pattern_io import parse_rle
+
+CLASSIFY_MAX_PERIOD = 30 # Periodo maximo que se busca al simular un objeto desconocido
+CENSUS_CACHE_SIZE = 100_000 # Formas guardadas antes de vaciar las caches
+BATCH_WIDTH = 4096 # Ancho maximo del grid en el que se simulan juntos los objetos desconocidos
+
+KIND_STILL_LIFE = 'vida estatica'
+KIND_OSCILLATOR = 'oscilador'
+KIND_SPACESHIP = 'nave'
+KIND_OTHER = 'otro'
+
+# Objetos conocidos de B3/S23 (una fase en RLE, el resto se calculan)
+KNOWN_OBJECTS = {
+    'block': '2o$2o!',
+    'beehive': 'b2o$o2bo$b2o!',
+    'loaf': 'b2o$o2bo$bobo$2bo!',
+    'boat': '2o$obo$bo!',
+    'ship': '2o$obo$b2o!',
+    'tub': 'bo$obo$bo!',
+    'pond': 'b2o$o2bo$o2bo$b2o!',
+    'long boat': '2o$obo$bobo$2bo!',
+    'barge': 'bo$obo$bobo$2bo!',
+    'mango': 'b2o$o2bo$bo2bo$2b2o!',
+    'aircraft carrier': '2o$o2bo$2b2o!',
+    'eater 1': '2o$obo$2bo$2b2o!',
+    'snake': '2obo$ob2o!',
+    'blinker': '3o!',
+    'toad': 'b3o$3o!',
+    'clock': '2bo$obo$bobo$bo!',
+    'glider': 'bo$2bo$3o!',
+    'lwss': 'bo2bo$o4b$o3bo$4o!',
+    'mwss': '3bo2b$bo3bo$o5b$o4bo$5o!',
+    'hwss': '3b2o2b$bo4bo$o6b$o5bo$6o!',
+}
+
+
+def canonical_key(cells: np.ndarray):
+    """
+    Clave de la menor de las 8 rotaciones/reflexiones de un objeto recortado
+    """
+    keys = []
+    for flipped in (cells, cells[:, ::-1]):
+        for k in range(4):
+            transformed = np.rot90(flipped, k)
+            keys.append((transformed.shape, np.packbits(transformed).tobytes()))
+    return min(keys)
+
+
+def _crop(cells: np.ndarray) -> np.ndarray:
+    rows, cols = np.nonzero(cells)
+    if len(rows) == 0:
+        return np.zeros((0, 0), dtype=bool)
+    return cells[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+
+
+def _unwrap(coords: np.ndarray, size: int) -> np.ndarray:
+    """
+    Coordenadas de un objeto que puede cruzar el borde periodico, pasadas a un tramo
+    continuo cortando por el mayor hueco sin celdas
+    """
+    values = np.unique(coords)
+    gaps = np.diff(np.concatenate((values, [values[0] + size])))
+    cut = values[(np.argmax(gaps) + 1) % len(values)] # Primera coordenada del tramo
+    return (coords - cut) % size
+
+
+def find_objects(cells: np.ndarray):
+    """
+    Devuelve los objetos (componentes conexas) de un estado booleano en un grid
+    periodico, cada uno recortado a su rectangulo
+    """
+    return find_objects_stack(np.asarray(cells, dtype=bool)[None])[0]
+
+
+def find_objects_stack(cells: np.ndarray):
+    """
+    Objetos de varios estados periodicos independientes (n, alto, ancho) etiquetados de
+    una vez. Devuelve los objetos recortados y el indice del estado de cada uno
+    """
+    cells = np.asarray(cells, dtype=bool)
+    _, height, width = cells.shape
+    # Vecindad de Moore dentro de cada estado, sin conectar un estado con el siguiente
+    structure = np.zeros((3, 3, 3), dtype=int)
+    structure[1] = 1
+    labels, num_labels = label(cells, structure=structure)
+    if num_labels == 0:
+        return [], np.zeros(0, dtype=np.int64)
+
+    # Unir las etiquetas que se tocan a traves de los bordes (union-find)
+    parent = np.arange(num_labels + 1)
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    crossing = set() # Etiquetas que tocan otra (o a si mismas) a traves de un borde
+    for shift in (-1, 0, 1):
+        for first, second in ((labels[:, 0], np.roll(labels[:, -1], shift, axis=-1)),
+                              (labels[:, :, 0], np.roll(labels[:, :, -1], shift, axis=-1))):
+            touching = (first > 0) & (second > 0)
+            for a, b in set(zip(first[touching].tolist(), second[touching].tolist())):
+                crossing.update((a, b))
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    # Solo las etiquetas que cruzan un borde pueden no ser su propia raiz
+    for a in crossing:
+        parent[a] = find(a)
+    labels = parent[labels]
+    crossing = {int(parent[a]) for a in crossing}
+
+    owners, rows, cols = np.nonzero(labels)
+    object_labels = labels[owners, rows, cols]
+    order = np.argsort(object_labels, kind='stable')
+    owners, rows, cols, object_labels = owners[order], rows[order], cols[order], object_labels[order]
+    starts = np.flatnonzero(np.diff(np.concatenate(([-1], object_labels))))
+    ends = np.concatenate((starts[1:], [len(object_labels)]))
+
+    objects = []
+    for start, end in zip(starts, ends):
+        object_rows, object_cols = rows[start:end], cols[start:end]
+        if int(object_labels[start]) in crossing:
+            # El objeto cruza algun borde
+            object_rows, object_cols = _unwrap(object_rows, height), _unwrap(object_cols, width)
+        else:
+            object_rows, object_cols = object_rows - object_rows.min(), object_cols - object_cols.min()
+        obj = np.zeros((object_rows.max() + 1, object_cols.max() + 1), dtype=bool)
+        obj[object_rows, object_cols] = True
+        objects.append(obj)
+    return objects, owners[starts]
+
+
+def simulate_objects(objects, survive: int, birth: int, max_period: int = CLASSIFY_MAX_PERIOD):
+    """
+    Simula cada objeto aislado y devuelve una lista de (tipo, periodo). Si un objeto no
+    vuelve a su forma en max_period generaciones (o se sale de su zona) el tipo es
+    KIND_OTHER y el periodo 0.
+
+    Todos los objetos se avanzan a la vez en un mismo grid, cada uno en su caja con un
+    margen de max_period + 2 celdas: en max_period generaciones lo que crece uno no
+    llega a tocar a los demas.
+    """
+    objects = [_crop(np.asarray(obj, dtype=bool)) for obj in objects]
+    results = [(KIND_OTHER, 0)] * len(objects)
+    if not objects:
+        return results
+
+    # Colocar las cajas por filas de como mucho BATCH_WIDTH celdas
+    pad = max_period + 2
+    boxes = [] # (fila, columna, alto, ancho) de la caja de cada objeto
+    row0 = col0 = shelf_height = 0
+    for obj in objects:
+        box_height, box_width = obj.shape[0] + 2 * pad, obj.shape[1] + 2 * pad
+        if col0 and col0 + box_width > BATCH_WIDTH:
+            row0, col0, shelf_height = row0 + shelf_height, 0, 0
+        boxes.append((row0, col0, box_height, box_width))
+        col0 += box_width
+        shelf_height = max(shelf_height, box_height)
+    height = row0 + shelf_height
+    width = max(box[1] + box[3] for box in boxes)
+
+    grid = np.zeros((height, width), dtype=bool)
+    for obj, (box_row, box_col, _, _) in zip(objects, boxes):
+        grid[box_row + pad:box_row + pad + obj.shape[0], box_col + pad:box_col + pad + obj.shape[1]] = obj
+    engine = BitLifeEngine(width, height, survive, birth)
+    engine.set_cells(grid)
+
+    pending = list(range(len(objects)))
+    for period in range(1, max_period + 1):
+        engine.step()
+        state = unpack_rows(engine.alive, width)
+        still_pending = []
+        for idx in pending:
+            box_row, box_col, box_height, box_width = boxes[idx]
+            rows, cols = np.nonzero(state[box_row:box_row + box_height, box_col:box_col + box_width])
+            if len(rows) == 0 or rows.min() == 0 or cols.min() == 0 or \
+                    rows.max() == box_height - 1 or cols.max() == box_width - 1:
+                continue # Se ha muerto o se sale de su caja
+            obj = objects[idx]
+            if (rows.max() - rows.min() + 1, cols.max() - cols.min() + 1) == obj.shape and np.array_equal(
+                    state[box_row + rows.min():box_row + rows.max() + 1, box_col + cols.min():box_col + cols.max() + 1], obj):
+                if (rows.min(), cols.min()) != (pad, pad):
+                    results[idx] = (KIND_SPACESHIP, period)
+                else:
+                    results[idx] = (KIND_STILL_LIFE if period == 1 else KIND_OSCILLATOR, period)
+                continue
+            still_pending.append(idx)
+        pending = still_pending
+        if not pending:
+            break
+    return results
+
+
+def object_name(kind: str, period: int, population: int) -> str:
+    """
+    Nombre generico de un objeto que no esta en la tabla: xs (estatico), xp (oscilador)
+    o xq (nave) con el periodo y la poblacion, como en los censos de apgsearch
+    """
+    if kind == KIND_STILL_LIFE:
+        return f"xs{population}"
+    if kind == KIND_OSCILLATOR:
+        return f"xp{period}_{population}"
+    if kind == KIND_SPACESHIP:
+        return f"xq{period}_{population}"
+    return f"otro_{population}"
+
+
+@lru_cache(maxsize=None)
+def _known_table(survive: int, birth: int) -> dict:
+    """
+    Forma canonica de cada fase de los objetos conocidos -> (nombre, tipo, periodo).
+    Solo tiene sentido para la regla clasica, para las demas esta vacia
+    """
+    if (survive, birth) != (2, 3):
+        return {}
+    table = {}
+    for name, rle in KNOWN_OBJECTS.items():
+        phase = _crop(parse_rle(rle)[0])
+        kind, period = simulate_objects([phase], survive, birth)[0]
+        # Recorrer todas las fases del objeto
+        pad = period + 2
+        engine = BitLifeEngine(phase.shape[1] + 2 * pad, phase.shape[0] + 2 * pad, survive, birth)
+        grid = np.zeros((engine.height, engine.width), dtype=bool)
+        grid[pad:pad + phase.shape[0], pad:pad + phase.shape[1]] = phase
+        engine.set_cells(grid)
+        for _ in range(max(period, 1)):
+            table[canonical_key(_crop(engine.get_cells()))] = (name, kind, period)
+            engine.step()
+    return table
+
+
+class ObjectCensus:
+    """
+    Cuenta los objetos de estados de una simulacion con la regla survive/birth del shader
+    """
+
+    def __init__(self, survive: int = 2, birth: int = 3, max_period: int = CLASSIFY_MAX_PERIOD):
+        self.survive_rule = survive
+        self.birth_rule = birth
+        self.max_period = max_period
+        self.known = _known_table(survive, birth) # Compartida, no se modifica
+        self.kinds = {} # Nombre -> tipo de todos los objetos vistos
+
+        self._shape_cache = {} # Forma recortada tal cual -> (nombre, tipo, periodo)
+        self._canonical_cache = dict(self.known)
+
+    def classify(self, obj: np.ndarray):
+        """
+        Devuelve (nombre, tipo, periodo) de un objeto recortado
+        """
+        return self.classify_objects([obj])[0]
+
+    def classify_objects(self, objects):
+        """
+        Clasifica una lista de objetos recortados. Los que no estan en cache se simulan
+        todos juntos (una vez por forma canonica)
+        """
+        results = [None] * len(objects)
+        unknown = {} # Forma canonica -> indices de los objetos que la tienen
+        shape_keys = []
+        for idx, obj in enumerate(objects):
+            shape_key = (obj.shape, np.packbits(obj).tobytes())
+            shape_keys.append(shape_key)
+            results[idx] = self._shape_cache.get(shape_key)
+            if results[idx] is None:
+                key = canonical_key(obj)
+                results[idx] = self._canonical_cache.get(key)
+                if results[idx] is None:
+                    unknown.setdefault(key, []).append(idx)
+
+        if unknown:
+            if len(self._canonical_cache) + len(unknown) > CENSUS_CACHE_SIZE:
+                self._canonical_cache = dict(self.known)
+            keys = list(unknown)
+            simulated = simulate_objects([objects[unknown[key][0]] for key in keys],
+                                         self.survive_rule, self.birth_rule, self.max_period)
+            for key, (kind, period) in zip(keys, simulated):
+                indices = unknown[key]
+                result = (object_name(kind, period, int(objects[indices[0]].sum())), kind, period)
+                self._canonical_cache[key] = result
+                for idx in indices:
+                    results[idx] = result
+
+        if len(self._shape_cache) + len(objects) > CENSUS_CACHE_SIZE:
+            self._shape_cache.clear()
+        for shape_key, result in zip(shape_keys, results):
+            self._shape_cache[shape_key] = result
+            self.kinds[result[0]] = result[1]
+        return results
+
+    def census(self, cells: np.ndarray) -> Counter:
+        """
+        Numero de objetos de cada tipo (por nombre) en un estado booleano periodico
+        """
+        return Counter(name for name, _, _ in self.classify_objects(find_objects(cells)))
+
+    def census_stack(self, cells: np.ndarray) -> list:
+        """
+        Censo de cada uno de varios estados periodicos independientes (n, alto, ancho),
+        etiquetados y clasificados de una vez
+        """
+        objects, owners = find_objects_stack(cells)
+        censuses = [Counter() for _ in range(len(cells))]
+        for owner, (name, _, _) in zip(owners.tolist(), self.classify_objects(objects)):
+            censuses[owner][name] += 1
+        return censuses
+
+    def census_engine(self, engine: BitLifeEngine) -> Counter:
+        """
+        Censo del estado actual de un motor empaquetado en bits
+        """
+        return self.census(engine.get_cells())
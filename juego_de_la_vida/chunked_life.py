@@ -0,0 +1,199 @@
+"""
+Universo del Juego de la Vida sin bordes, guardado por chunks.
+
+El plano se divide en chunks de CHUNK_SIZE x CHUNK_SIZE celdas y solo se guardan
+los que tienen alguna celda viva, empaquetados en bits como en bit_life (cada fila
+del chunk es una palabra uint64). En cada paso se avanzan los chunks vivos y sus
+vecinos (que es donde pueden nacer celdas) y se descartan los que se quedan
+vacios, asi que la memoria y el coste de cada paso dependen del numero de chunks
+vivos y no del tamaño de la zona que ocupa el patron. Los planeadores pueden
+alejarse todo lo que quieran sin chocar con ningun borde.
+
+Igual que en HashLife, todo lo que esta fuera de los chunks esta muerto y no se
+guarda el estado 'fantasma'. Las coordenadas son (fila, columna) y pueden ser negativas.
+"""
+
+import numpy as np
+
+from bit_life import WORD_BITS, rule_masks, pack_rows, unpack_rows, step_rows
+
+CHUNK_SIZE = WORD_BITS # Cada fila de un chunk es una palabra
+
+_ALL_BITS = np.uint64(np.iinfo(np.uint64).max)
+_LAST_BIT = np.uint64(WORD_BITS - 1)
+_NEIGHBOUR_OFFSETS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+
+class ChunkedLifeUniverse:
+    """
+    Juego de la Vida en un plano infinito con las reglas survive/birth del shader
+    """
+
+    def __init__(self, survive: int = 2, birth: int = 3):
+        self.survive_rule = survive
+        self.birth_rule = birth
+
+        self.chunks = {} # (fila del chunk, columna del chunk) -> array (CHUNK_SIZE,) de uint64
+        self.generation = 0
+
+    @property
+    def birth_rule(self) -> int:
+        return self._birth_rule
+
+    @birth_rule.setter
+    def birth_rule(self, birth: int):
+        if birth == 0:
+            # Con B0 todo el plano vacio se llenaria de celdas
+            raise ValueError("El universo sin bordes no admite reglas en las que se nace con 0 vecinos")
+        self._birth_rule = birth
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunks)
+
+    def clear(self):
+        self.chunks = {}
+        self.generation = 0
+
+    def set_cells(self, cells: np.ndarray, origin=(0, 0)):
+        """
+        Carga un estado booleano (alto, ancho) con la celda (0, 0) del array en origin.
+        Se borra todo lo que hubiera antes.
+        """
+        self.clear()
+        self.add_cells(cells, origin)
+
+    def add_cells(self, cells: np.ndarray, origin=(0, 0)):
+        """
+        Sobrescribe la zona del universo que ocupa el array (alto, ancho) a partir de origin
+        """
+        cells = np.asarray(cells, dtype=bool)
+        height, width = cells.shape
+        if height == 0 or width == 0:
+            return
+        row0, col0 = origin
+
+        # Alinear la zona con los chunks
+        first_cy, first_cx = row0 // CHUNK_SIZE, col0 // CHUNK_SIZE
+        last_cy, last_cx = (row0 + height - 1) // CHUNK_SIZE, (col0 + width - 1) // CHUNK_SIZE
+        pad_y, pad_x = row0 - first_cy * CHUNK_SIZE, col0 - first_cx * CHUNK_SIZE
+        num_cy, num_cx = last_cy - first_cy + 1, last_cx - first_cx + 1
+
+        region = self.get_window((first_cy * CHUNK_SIZE, first_cx * CHUNK_SIZE),
+                                 (num_cy * CHUNK_SIZE, num_cx * CHUNK_SIZE))
+        region[pad_y:pad_y + height, pad_x:pad_x + width] = cells
+
+        words = pack_rows(region).reshape(num_cy, CHUNK_SIZE, num_cx).transpose(0, 2, 1)
+        for cy in range(num_cy):
+            for cx in range(num_cx):
+                key = (first_cy + cy, first_cx + cx)
+                chunk = words[cy, cx]
+                if chunk.any():
+                    self.chunks[key] = chunk.copy()
+                else:
+                    self.chunks.pop(key, None)
+
+    def randomize(self, width: int, height: int, density: float, rng: np.random.Generator = None):
+        """
+        Sopa aleatoria de ancho x alto con la esquina en el origen
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_cells(rng.random((height, width)) < density)
+
+    def get_window(self, origin, shape) -> np.ndarray:
+        """
+        Devuelve la zona (alto, ancho) = shape del universo a partir de origin como matriz booleana
+        """
+        row0, col0 = origin
+        height, width = shape
+        if height <= 0 or width <= 0:
+            return np.zeros((max(height, 0), max(width, 0)), dtype=bool)
+
+        first_cy, first_cx = row0 // CHUNK_SIZE, col0 // CHUNK_SIZE
+        last_cy, last_cx = (row0 + height - 1) // CHUNK_SIZE, (col0 + width - 1) // CHUNK_SIZE
+        num_cy, num_cx = last_cy - first_cy + 1, last_cx - first_cx + 1
+
+        words = np.zeros((num_cy, CHUNK_SIZE, num_cx), dtype=np.uint64)
+        if num_cy * num_cx <= len(self.chunks):
+            keys = ((first_cy + cy, first_cx + cx) for cy in range(num_cy) for cx in range(num_cx))
+        else:
+            keys = self.chunks.keys()
+        for key in keys:
+            chunk = self.chunks.get(key)
+            cy, cx = key[0] - first_cy, key[1] - first_cx
+            if chunk is not None and 0 <= cy < num_cy and 0 <= cx < num_cx:
+                words[cy, :, cx] = chunk
+
+        cells = unpack_rows(words.reshape(num_cy * CHUNK_SIZE, num_cx), num_cx * CHUNK_SIZE)
+        pad_y, pad_x = row0 - first_cy * CHUNK_SIZE, col0 - first_cx * CHUNK_SIZE
+        return cells[pad_y:pad_y + height, pad_x:pad_x + width]
+
+    def live_count(self) -> int:
+        if not self.chunks:
+            return 0
+        return int(np.bitwise_count(np.stack(list(self.chunks.values()))).sum())
+
+    def live_cells(self) -> np.ndarray:
+        """
+        Coordenadas (fila, columna) de las celdas vivas
+        """
+        coords = []
+        for (cy, cx), chunk in self.chunks.items():
+            rows, cols = np.nonzero(unpack_rows(chunk[:, None], CHUNK_SIZE))
+            coords.append(np.stack((rows + cy * CHUNK_SIZE, cols + cx * CHUNK_SIZE), axis=1))
+        if not coords:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.concatenate(coords).astype(np.int64)
+
+    def bounding_box(self):
+        """
+        (fila minima, columna minima, fila maxima, columna maxima) de las celdas vivas, o None
+        """
+        cells = self.live_cells()
+        if len(cells) == 0:
+            return None
+        return (*cells.min(axis=0), *cells.max(axis=0))
+
+    def step(self):
+        """
+        Avanza una generacion los chunks vivos y sus vecinos
+        """
+        if not self.chunks:
+            self.generation += 1
+            return
+        survive_mask, birth_mask = rule_masks(self.survive_rule, self.birth_rule)
+
+        # Posicion de cada chunk vivo en la pila (la 0 es un chunk vacio)
+        keys = list(self.chunks)
+        index = {key: idx + 1 for idx, key in enumerate(keys)}
+        stack = np.zeros((len(keys) + 1, CHUNK_SIZE), dtype=np.uint64)
+        stack[1:] = np.stack([self.chunks[key] for key in keys])
+
+        candidates = {(cy + dy, cx + dx) for cy, cx in keys for dy, dx in _NEIGHBOUR_OFFSETS}
+        candidates = list(candidates)
+        neighbour_idx = np.array([[index.get((cy + dy, cx + dx), 0) for dy, dx in _NEIGHBOUR_OFFSETS]
+                                  for cy, cx in candidates])
+
+        # (candidatos, 3, 3, filas): el chunk y sus 8 vecinos
+        around = stack[neighbour_idx].reshape(len(candidates), 3, 3, CHUNK_SIZE)
+
+        def column(dx):
+            # Filas del chunk con la ultima fila del de arriba y la primera del de abajo
+            return np.concatenate((around[:, 0, dx, -1:], around[:, 1, dx, :], around[:, 2, dx, :1]), axis=1)[..., None]
+
+        new_chunks = step_rows(column(1), column(0), column(2), _LAST_BIT, _LAST_BIT, _ALL_BITS,
+                               survive_mask, birth_mask)[..., 0]
+
+        alive = new_chunks.any(axis=1)
+        self.chunks = {candidates[idx]: new_chunks[idx] for idx in np.flatnonzero(alive)}
+        self.generation += 1
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps generaciones y devuelve el numero de celdas vivas tras cada una
+        """
+        counts = np.empty(n_steps, dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            counts[step] = self.live_count()
+        return counts
@@ -7,9 +7,12 @@ class Config:
         - Tamaño de la red
         - Velocidad inicial
         - Densidad inicial de células vivas
+        - Modo por bloques (solo se recalculan las zonas activas)
+        - Universo sin bordes (el grid es la ventana que se ve)
     """
     def __init__(self, grid_width=100, grid_height=100, initial_speed=24, initial_density=0.3,
-                survive=2, birth=3, save_csv=False, csv_filename=None):
+                survive=2, birth=3, save_csv=False, csv_filename=None, sparse_tiles=False,
+                unbounded=False):
         self.grid_width = grid_width
         self.grid_height = grid_height
         self.speed = initial_speed # frames por segundo
@@ -17,4 +20,6 @@ class Config:
         self.survive = survive
         self.birth = birth
         self.save_csv = save_csv
-        self.csv_filename = csv_filename
\ No newline at end of file
+        self.csv_filename = csv_filename
+        self.sparse_tiles = sparse_tiles # Recalcular solo los bloques con actividad
+        self.unbounded = unbounded # Simular un universo infinito por chunks
\ No newline at end of file
@@ -23,11 +23,11 @@ class ConfigTab(QtWidgets.QDialog):
         config_to_use = actual_config if actual_config else Config()
 
         self.height_spinbox = QtWidgets.QSpinBox()
-        self.height_spinbox.setRange(2, 1000)
+        self.height_spinbox.setRange(2, 8192)
         self.height_spinbox.setValue(config_to_use.grid_height)
 
         self.width_spinbox = QtWidgets.QSpinBox()
-        self.width_spinbox.setRange(2, 1000)
+        self.width_spinbox.setRange(2, 8192)
         self.width_spinbox.setValue(config_to_use.grid_width)
 
         self.density_spinbox = QtWidgets.QSpinBox()
@@ -52,6 +52,12 @@ class ConfigTab(QtWidgets.QDialog):
         self.birth_spinbox.setRange(0, 8)
         self.birth_spinbox.setValue(config_to_use.birth)
 
+        self.sparse_tiles_checkbox = QtWidgets.QCheckBox()
+        self.sparse_tiles_checkbox.setChecked(config_to_use.sparse_tiles)
+
+        self.unbounded_checkbox = QtWidgets.QCheckBox()
+        self.unbounded_checkbox.setChecked(config_to_use.unbounded)
+
         self.save_csv_checkbox = QtWidgets.QCheckBox()
         self.save_csv_checkbox.setChecked(config_to_use.save_csv)
         self.save_csv_checkbox.toggled.connect(self.toggle_csv_selection)
@@ -79,6 +85,8 @@ class ConfigTab(QtWidgets.QDialog):
         form_layout.addRow("Velocidad inicial:", self.speed_spinbox)
         form_layout.addRow("Vecinos vivos para sobrevivir:", self.survive_spinbox)
         form_layout.addRow("Vecinos vivos para nacer:", self.birth_spinbox)
+        form_layout.addRow("Recalcular solo zonas activas:", self.sparse_tiles_checkbox)
+        form_layout.addRow("Universo sin bordes:", self.unbounded_checkbox)
         form_layout.addRow("Guardar datos en CSV:", self.save_csv_checkbox)
 
         self.csv_path_label = QtWidgets.QLabel("Ruta del archivo:")
@@ -169,7 +177,7 @@ class ConfigTab(QtWidgets.QDialog):
             self,
             "Guardar archivo CSV",
             suggestion,
-            "Archivos CSV (*.csv);;Todos los archivos (*)"
+            "Archivos CSV (*.csv);;Series binarias (*.gol);;Todos los archivos (*)"
         )
 
         if file_path:
@@ -190,5 +198,7 @@ class ConfigTab(QtWidgets.QDialog):
             survive = self.survive_spinbox.value(),
             birth = self.birth_spinbox.value(),
             save_csv = self.save_csv_checkbox.isChecked(),
-            csv_filename = self.csv_lineedit.text()
+            csv_filename = self.csv_lineedit.text(),
+            sparse_tiles = self.sparse_tiles_checkbox.isChecked(),
+            unbounded = self.unbounded_checkbox.isChecked()
         )
@@ -0,0 +1,123 @@
+"""
+Escritura de CSV en un hilo aparte.
+
+GridWidget genera una fila por generacion desde el hilo de la interfaz. Abrir y
+cerrar el archivo en cada fila hace que guardar los datos baje los FPS, asi que
+las filas se meten en una cola y un hilo escritor las escribe por lotes con el
+archivo siempre abierto. Los datos se vuelcan a disco cada FLUSH_ROWS filas o
+cada FLUSH_INTERVAL segundos, lo que pase antes.
+
+La cola tiene un tamaño maximo: si el disco no da abasto, write_rows se bloquea
+hasta que haya sitio (no se pierde ninguna fila).
+"""
+
+import csv
+import queue
+import threading
+import time
+
+LOG_QUEUE_SIZE = 4096 # Lotes de filas que puede haber en la cola antes de bloquear
+FLUSH_ROWS = 8192 # Filas pendientes a partir de las que se escriben y se vuelcan a disco
+FLUSH_INTERVAL = 1.0 # Segundos maximos que pasan entre volcados si hay filas pendientes
+
+_STOP = object()
+
+
+class CsvLogger:
+    """
+    Añade filas a un CSV desde un hilo escritor. Si el archivo no existe y se da
+    header, se escribe primero la cabecera
+    """
+
+    def __init__(self, file_path, header=None, queue_size=LOG_QUEUE_SIZE,
+                 flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.file_path = file_path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.error = None # Primera excepcion del hilo escritor
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = open(file_path, mode='a', newline='')
+        self._writer = csv.writer(self._file)
+        if header is not None and self._file.tell() == 0:
+            self._writer.writerow(header)
+
+        self._thread = threading.Thread(target=self._run, name="CsvLogger", daemon=True)
+        self._thread.start()
+
+    def write_row(self, row):
+        self._queue.put([row])
+
+    def write_rows(self, rows):
+        """
+        Encola un lote de filas. Se bloquea si la cola esta llena
+        """
+        rows = list(rows)
+        if rows:
+            self._queue.put(rows)
+
+    def flush(self):
+        """
+        Espera a que todas las filas encoladas esten escritas en el archivo
+        """
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        pending = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # Coger todos los lotes que ya esten en la cola sin esperar.
+            # Al salir item es None o una orden (volcar o parar)
+            while isinstance(item, list):
+                pending.extend(item)
+                item = None
+                if len(pending) >= self.flush_rows:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if (item is not None or len(pending) >= self.flush_rows
+                    or time.monotonic() - last_flush >= self.flush_interval):
+                self._write(pending)
+                pending = []
+                last_flush = time.monotonic()
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                break
+
+        try:
+            self._file.close()
+        except Exception as e:
+            print(f"Error al cerrar el archivo CSV: {e}")
+
+    def _write(self, rows):
+        try:
+            if rows:
+                self._writer.writerows(rows)
+            self._file.flush()
+        except Exception as e:
+            # Se siguen vaciando la cola para no bloquear a quien escribe
+            if self.error is None:
+                print(f"Error al escribir en el archivo CSV: {e}")
+            self.error = e
@@ -0,0 +1,75 @@
+"""
+Deteccion de ciclos y estados estacionarios en el Juego de la Vida.
+
+Casi todas las sopas acaban en ceniza: vidas estaticas y osciladores de periodo
+corto. En cuanto el estado en la iteracion t es igual al de la iteracion t - p,
+todo lo que queda de la simulacion se repite con periodo p, asi que no hace falta
+simularlo: el resto de la serie de celdas vivas se rellena con el ciclo.
+
+El estado se identifica con una clave: los bytes del estado empaquetado (bit_life,
+comparacion exacta) o un hash calculado en la GPU (GridWidget).
+"""
+
+from collections import deque
+
+import numpy as np
+
+DEFAULT_MAX_PERIOD = 64 # Periodo maximo que se busca por defecto
+
+
+class CycleDetector:
+    """
+    Recibe la clave del estado y el numero de celdas vivas de cada iteracion
+    (todas seguidas) y detecta cuando el estado se repite con periodo <= max_period
+    """
+
+    def __init__(self, max_period: int = DEFAULT_MAX_PERIOD):
+        if max_period < 1:
+            raise ValueError("El periodo maximo tiene que ser al menos 1")
+        self.max_period = max_period
+        self.reset()
+
+    def reset(self):
+        self._last_seen = {} # Clave -> ultima iteracion en la que se ha visto
+        self._history = deque() # (iteracion, clave, celdas vivas) de las ultimas max_period iteraciones
+        self.period = None
+        self.detected_iteration = None # Iteracion en la que se ha cerrado el ciclo
+        self._cycle_counts = None
+
+    def update(self, iteration: int, key, count: int):
+        """
+        Añade una iteracion. Devuelve el periodo si el estado ya se habia visto, si no None.
+        Una vez detectado el ciclo las siguientes llamadas no hacen nada.
+        """
+        if self.period is not None:
+            return self.period
+
+        previous = self._last_seen.get(key)
+        self._last_seen[key] = iteration
+        self._history.append((iteration, key, count))
+
+        if previous is not None and iteration - previous <= self.max_period:
+            self.period = iteration - previous
+            self.detected_iteration = iteration
+            # Celdas vivas de las iteraciones detected_iteration - period + 1 .. detected_iteration
+            self._cycle_counts = np.array([entry[2] for entry in self._history][-self.period:], dtype=np.int64)
+            # Ya no hacen falta las claves (pueden ser estados completos)
+            self._last_seen.clear()
+            self._history.clear()
+            return self.period
+
+        # Olvidar las iteraciones que ya no pueden cerrar un ciclo de periodo <= max_period
+        while len(self._history) > self.max_period:
+            old_iteration, old_key, _ = self._history.popleft()
+            if self._last_seen.get(old_key) == old_iteration:
+                del self._last_seen[old_key]
+        return None
+
+    def counts_for(self, iterations) -> np.ndarray:
+        """
+        Celdas vivas de iteraciones posteriores a detected_iteration, sacadas del ciclo
+        """
+        if self.period is None:
+            raise RuntimeError("Todavia no se ha detectado ningun ciclo")
+        offsets = (np.asarray(iterations, dtype=np.int64) - self.detected_iteration - 1) % self.period
+        return self._cycle_counts[offsets]
@@ -0,0 +1,74 @@
+"""
+Propagacion de daño (damage spreading) en el Juego de la Vida.
+
+Se avanzan a la vez una sopa y copias de ella con una sola celda cambiada, con la
+misma regla, y se mide en cada generacion la distancia de Hamming entre cada copia
+y la original. En las reglas ordenadas el daño se queda localizado o desaparece, y
+en las caoticas se extiende por todo el grid.
+
+Usa LifeEnsemble: la replica 0 es la sopa original y la replica i (i >= 1) es la
+sopa con la celda sites[i - 1] cambiada. Como cada celda es una palabra con una
+replica por bit, la distancia de todas las copias sale de un XOR de cada palabra con
+el bit de la replica 0 extendido a toda la palabra y un recuento de bits por
+replica, sin desempaquetar nada.
+"""
+
+import numpy as np
+
+from bit_life import WORD_BITS
+from life_ensemble import LifeEnsemble, replica_popcounts
+
+DEFAULT_NUM_SITES = WORD_BITS - 1 # Con la original caben justas en una palabra
+
+
+class DamageSpreadingEnsemble(LifeEnsemble):
+    """
+    Sopa original (replica 0) y num_sites copias con una celda cambiada cada una
+    """
+
+    def __init__(self, width: int, height: int, num_sites: int = DEFAULT_NUM_SITES, survive: int = 2, birth: int = 3):
+        super().__init__(width, height, num_replicas=num_sites + 1, survive=survive, birth=birth)
+        self.num_sites = num_sites
+        self.sites = np.zeros((num_sites, 2), dtype=np.int64) # (fila, columna) de la celda cambiada en cada copia
+
+    def set_soup(self, cells: np.ndarray, sites):
+        """
+        Carga la sopa original (alto, ancho) y las celdas (fila, columna) que se cambian en cada copia
+        """
+        cells = np.asarray(cells, dtype=bool)
+        sites = np.asarray(sites, dtype=np.int64).reshape(-1, 2)
+        if len(sites) != self.num_sites:
+            raise ValueError(f"Hay {len(sites)} celdas que cambiar, se esperaban {self.num_sites}")
+
+        replicas = np.broadcast_to(cells, (self.num_replicas,) + cells.shape).copy()
+        copies = np.arange(1, self.num_replicas)
+        replicas[copies, sites[:, 0], sites[:, 1]] ^= True
+        self.set_cells(replicas)
+        self.sites = sites
+
+    def randomize(self, density: float, rng: np.random.Generator = None):
+        """
+        Sopa aleatoria de la densidad dada, con las celdas que se cambian elegidas al azar (sin repetir)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        cells = rng.random((self.height, self.width)) < density
+        flat_sites = rng.choice(self.height * self.width, size=self.num_sites, replace=False)
+        self.set_soup(cells, np.stack(np.divmod(flat_sites, self.width), axis=1))
+
+    def hamming_distances(self) -> np.ndarray:
+        """
+        Distancia de Hamming de cada copia a la sopa original (num_sites,)
+        """
+        # Bit de la replica 0 extendido a las 64 replicas de la palabra: 0 - 1 = todo unos
+        reference = np.uint64(0) - (self.alive[0] & np.uint64(1))
+        return replica_popcounts(self.alive ^ reference, self.num_replicas)[1:]
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps generaciones y devuelve las distancias (pasos, num_sites) tras cada una
+        """
+        distances = np.empty((n_steps, self.num_sites), dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            distances[step] = self.hamming_distances()
+        return distances
@@ -0,0 +1,26 @@
+"""
+Utilidades de OpenGL compartidas por GridWidget y las simulaciones sin ventana.
+
+No importa Qt, asi que se puede usar desde rule_space_gpu y los barridos en
+maquinas sin pantalla.
+"""
+
+from pathlib import Path
+
+# Reduccion en la GPU para contar las celdas vivas: cada pasada suma bloques de
+# REDUCE_BLOCK x REDUCE_BLOCK y el resultado final se guarda en un buffer circular
+# de COUNT_RING_SIZE pasos que se lee de golpe
+REDUCE_BLOCK = 16
+COUNT_RING_SIZE = 1024
+
+
+def load_shader_source(shader_file: str) -> str:
+    """
+    Lee el contenido de un archivo de shader
+    """
+    shader_path = Path(__file__).parent / shader_file
+    try:
+        with open(shader_path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Error Crítico: No se pudo encontrar el archivo de shader: {shader_path}")
@@ -1,5 +1,3 @@
-import pandas as pd
-import re
 from PySide6 import QtWidgets
 import sys
 import os
@@ -9,46 +7,60 @@ from pathlib import Path
 from collections import defaultdict
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes, mark_inset
 
+from series_store import load_experiment
+from results_index import ResultsIndex
+from stability import MAX_STABLE_ITERATIONS, MIN_RELATIVE_CHANGE, stable_cutoff
 
-MAX_STABLE_ITERATIONS = 50
-MIN_RELATIVE_CHANGE = 0.001
 
+STABLE_TAIL_MARGIN = 50 # Puntos que se muestran despues del corte para ver que es constante
 
-def trim_stable_tail(series, max_stable_iterations=MAX_STABLE_ITERATIONS, min_relative_change=MIN_RELATIVE_CHANGE):
+
+def trim_stable_tail(series, max_stable_iterations=MAX_STABLE_ITERATIONS, min_relative_change=MIN_RELATIVE_CHANGE,
+                     cutoff_index=None):
     """
     Recorta el final de una serie cuando lleva demasiadas iteraciones sin cambio
     porcentual apreciable. Retorna la serie recortada y el índice de corte.
+    Si ya se conoce el corte (el que guarda SeriesWriter al escribir) se pasa en cutoff_index.
     """
-    if len(series) <= 1:
-        return series, len(series)
-
     values = np.asarray(series)
-    stable_count = 0
-    cutoff_index = len(values)
-
-    for idx in range(1, len(values)):
-        previous_value = values[idx - 1]
-        current_value = values[idx]
+    if len(values) <= 1:
+        return values, len(values)
 
-        if previous_value == 0:
-            relative_change = abs(current_value - previous_value)
-        else:
-            relative_change = abs(current_value - previous_value) / abs(previous_value)
-
-        if relative_change <= min_relative_change:
-            stable_count += 1
-            if stable_count >= max_stable_iterations:
-                cutoff_index = idx - max_stable_iterations + 1
-                break
-        else:
-            stable_count = 0
+    if cutoff_index is None:
+        cutoff_index = stable_cutoff(values, max_stable_iterations, min_relative_change)
 
     # Extender el gráfico unos cuantos puntos más allá del corte para verificar
-    # que es constante (mostrar 50 puntos adicionales después del corte)
-    extend_idx = min(cutoff_index + 50, len(values))
+    # que es constante
+    extend_idx = min(cutoff_index + STABLE_TAIL_MARGIN, len(values))
     return values[:extend_idx], cutoff_index
 
 
+def average_live_proportion(series_list):
+    """
+    Promedia la proporcion de celdas vivas de varias replicas del mismo experimento
+    (LifeSeries de series_store), cada una dividida por sus propias celdas. Retorna las
+    iteraciones y la media, recortadas a la replica mas corta. Las replicas tienen que
+    estar guardadas en las mismas iteraciones, si no se lanza ValueError.
+    """
+    length = min(len(series) for series in series_list)
+    iterations = np.asarray(series_list[0].iterations[:length])
+    for series in series_list[1:]:
+        if not np.array_equal(series.iterations[:length], iterations):
+            raise ValueError("las replicas no estan guardadas en las mismas iteraciones")
+    live_prop = np.mean([np.asarray(series.counts[:length]) / series.total_cells for series in series_list], axis=0)
+    return iterations, live_prop
+
+
+def find_rule_files(results, density_percent, survive, birth):
+    """
+    Devuelve los archivos de un experimento (una o varias replicas _run{i}), tanto CSV
+    como series binarias, a partir del ResultsIndex de la carpeta, en un dict
+    (width, height) -> rutas, porque las replicas de distinto tamaño no se promedian
+    """
+    groups = results.group_by_rule(density=density_percent, survive=survive, birth=birth)
+    return {(width, height): [entry.path for entry in entries] for (width, height, _, _), entries in sorted(groups.items())}
+
+
 def plot_life_evolution_by_density():
     """
     Lee archivos CSV del Juego de la Vida y grafica la evolución del número de 
@@ -65,21 +77,14 @@ def plot_life_evolution_by_density():
         print("No se seleccionó ninguna carpeta. Saliendo.")
         return
     
-    # Agrupar archivos por densidad
+    # Agrupar archivos por densidad (los parametros salen del indice de la carpeta)
     densities_data = defaultdict(list)
     
-    # Expresión regular para extraer densidad del nombre del archivo
-    pattern = re.compile(r'GoL_size(\d+)x(\d+)_density(\d+)_survive(\d+)_birth(\d+)\.csv$')
-    
     print(f"Buscando archivos CSV en: {folder_path}")
     
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.csv'):
-            match = pattern.match(filename)
-            if match:
-                size_w, size_h, density, survive, birth = map(int, match.groups())
-                densities_data[density].append((filename, survive, birth))
-                print(f"Encontrado: {filename}")
+    for entry in ResultsIndex(folder_path).find():
+        densities_data[entry.density].append((entry.filename, entry.width, entry.height, entry.survive, entry.birth))
+        print(f"Encontrado: {entry.filename}")
     
     if not densities_data:
         print("No se encontraron archivos CSV con el patrón esperado.")
@@ -124,14 +129,13 @@ def plot_life_evolution_by_density():
     for idx, density in enumerate(sorted_densities):
         ax = axes_flat[idx]
         
-        # Leer todos los CSVs de esta densidad y promediar si hay varios
-        all_data = []
+        # Leer todos los CSVs de esta densidad, agrupados por tamaño y regla (puede haber varias replicas)
+        all_data = defaultdict(list)
         
-        for filename, survive, birth in densities_data[density]:
+        for filename, width, height, survive, birth in densities_data[density]:
             full_path = os.path.join(folder_path, filename)
             try:
-                df = pd.read_csv(full_path)
-                all_data.append(df)
+                all_data[(width, height, survive, birth)].append(load_experiment(full_path))
                 print(f"  Leyendo: {filename}")
             except Exception as e:
                 print(f"  Error al leer {filename}: {e}")
@@ -142,30 +146,34 @@ def plot_life_evolution_by_density():
             ax.set_title(f'Densidad inicial {density}%', fontsize=16)
             continue
         
-        # Si hay múltiples archivos (diferentes survive/birth), graficar todos
-        # o promediar
+        # Si hay múltiples archivos (diferentes survive/birth), graficar todos.
+        # Las replicas de la misma regla se promedian
         density_percent = density / 100
-        for df in all_data:
-            survive = int(df.iloc[0]['Survive'])
-            birth = int(df.iloc[0]['Birth'])
-            live_prop = df['Live Cells'] / (df.iloc[0]['Width'] * df.iloc[0]['Height'])
-            live_prop_trimmed, cutoff_idx = trim_stable_tail(live_prop)
-            iterations = df['Iteration'].iloc[:len(live_prop_trimmed)]
-            ax.plot(iterations, live_prop_trimmed, linewidth=0.8, alpha=0.7,
-                   label=f'B{birth}/S{survive}')
+        curves = {}
+        # Si en la carpeta hay varios tamaños de grid se indica en la leyenda
+        multiple_sizes = len({(width, height) for width, height, _, _ in all_data}) > 1
+        for (width, height, survive, birth), series_list in sorted(all_data.items()):
+            label = f'B{birth}/S{survive}' + (f' {width}x{height}' if multiple_sizes else '')
+            try:
+                iterations, live_prop = average_live_proportion(series_list)
+            except ValueError as e:
+                print(f"  No se puede promediar {label}: {e}")
+                continue
+            # Con una sola replica el corte puede venir ya calculado en la serie binaria
+            known_cutoff = series_list[0].stable_cutoff if len(series_list) == 1 else None
+            live_prop_trimmed, cutoff_idx = trim_stable_tail(live_prop, cutoff_index=known_cutoff)
+            curves[(width, height, survive, birth)] = (iterations[:len(live_prop_trimmed)], live_prop_trimmed)
+            ax.plot(*curves[(width, height, survive, birth)], linewidth=0.8, alpha=0.7, label=label)
             # Marcar visualmente el punto de corte (donde comienza la región estable)
             if cutoff_idx < len(live_prop):
                 continue
-                # ax.axvline(x=df['Iteration'].iloc[cutoff_idx], color='red', 
+                # ax.axvline(x=iterations[cutoff_idx], color='red', 
                 #           linestyle='--', linewidth=0.5, alpha=0.5)
 
         cfg = inset_config.get(density, {"width": "45%", "height": "32%", "loc": "upper right", "x0": 0, "x1": 100, "y0": 0.0, "y1": 0.5})
         axins = inset_axes(ax, width=cfg["width"], height=cfg["height"], loc=cfg["loc"])
 
-        for df in all_data:
-            live_prop = df['Live Cells'] / (df.iloc[0]['Width'] * df.iloc[0]['Height'])
-            live_prop_trimmed, _ = trim_stable_tail(live_prop)
-            iterations = df['Iteration'].iloc[:len(live_prop_trimmed)]
+        for iterations, live_prop_trimmed in curves.values():
             axins.plot(iterations, live_prop_trimmed, linewidth=0.7, alpha=0.8)
 
         axins.set_xlim(cfg["x0"], cfg["x1"])
@@ -231,6 +239,8 @@ def plot_rules_grouped_by_rule():
     density_percents = [int(d * 100) for d in densities]
     colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
 
+    results = ResultsIndex(folder_path)
+
     fig, axes = plt.subplots(2, 2, figsize=(12, 9))
     axes = axes.flatten()
 
@@ -238,23 +248,23 @@ def plot_rules_grouped_by_rule():
         survive, birth = rule
         matched_any = False
         ref_length = None
+        curves = {} # (densidad, tamaño) -> (iteraciones, proporcion), para no volver a leerlas en el inset
 
         for i, dp in enumerate(density_percents):
-            pattern = re.compile(rf"GoL_size(\d+)x(\d+)_density{dp}_survive{survive}_birth{birth}\.csv$")
-            matched = None
-            for fn in os.listdir(folder_path):
-                if pattern.match(fn):
-                    matched = os.path.join(folder_path, fn)
-                    break
-            if not matched:
-                continue
-            matched_any = True
-            df = pd.read_csv(matched)
-            if ref_length is None:
-                ref_length = len(df)
-            total_cells = df.iloc[0]['Width'] * df.iloc[0]['Height']
-            live_prop = df['Live Cells'] / total_cells
-            ax.plot(df['Iteration'], live_prop, label=f"{dp}%", color=colors[i % len(colors)], linewidth=0.9)
+            matched = find_rule_files(results, dp, survive, birth)
+            # Una curva por tamaño de grid; el tamaño solo se pone en la leyenda si hay varios
+            for (width, height), paths in matched.items():
+                label = f"{dp}%" + (f" {width}x{height}" if len(matched) > 1 else "")
+                try:
+                    iterations, live_prop = average_live_proportion([load_experiment(path) for path in paths])
+                except ValueError as e:
+                    print(f"No se puede promediar B{birth}/S{survive} con densidad {label}: {e}")
+                    continue
+                matched_any = True
+                curves[(i, (width, height))] = (iterations, live_prop)
+                if ref_length is None:
+                    ref_length = len(iterations)
+                ax.plot(iterations, live_prop, label=label, color=colors[i % len(colors)], linewidth=0.9)
 
         if not matched_any:
             ax.text(0.5, 0.5, "No se encontraron CSVs para esta regla", ha='center')
@@ -278,19 +288,8 @@ def plot_rules_grouped_by_rule():
         x1 = cfg["x1"]
 
         axins = inset_axes(ax, width=cfg["width"], height=cfg["height"], loc=cfg["loc"])
-        for i, dp in enumerate(density_percents):
-            pattern = re.compile(rf"GoL_size(\d+)x(\d+)_density{dp}_survive{survive}_birth{birth}\.csv$")
-            matched = None
-            for fn in os.listdir(folder_path):
-                if pattern.match(fn):
-                    matched = os.path.join(folder_path, fn)
-                    break
-            if not matched:
-                continue
-            df = pd.read_csv(matched)
-            total_cells = df.iloc[0]['Width'] * df.iloc[0]['Height']
-            live_prop = df['Live Cells'] / total_cells
-            axins.plot(df['Iteration'], live_prop, color=colors[i % len(colors)], linewidth=0.8)
+        for (i, _), (iterations, live_prop) in curves.items():
+            axins.plot(iterations, live_prop, color=colors[i % len(colors)], linewidth=0.8)
 
         axins.set_xlim(x0, x1)
         axins.set_ylim(cfg["y0"], cfg["y1"])
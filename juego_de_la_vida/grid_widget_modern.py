@@ -6,26 +6,34 @@ from PySide6.QtCore import Signal
 import numpy as np
 import moderngl
 from config_modern import Config
+from gl_utils import REDUCE_BLOCK, COUNT_RING_SIZE, load_shader_source
+from chunked_life import ChunkedLifeUniverse
+from pattern_io import read_pattern, write_pattern, rule_string, parse_rule
+from series_store import SERIES_EXTENSION, SeriesWriter
+from csv_logger import CsvLogger
+from trajectory import TrajectoryRecorder
 from PIL import Image
 import numpy as np
 import os
 from pathlib import Path
 import csv
 
-def load_shader_source(shader_file: str) -> str:
-    """
-    Lee el contenido de un archivo de shader
-    """
-    shader_path = Path(__file__).parent / shader_file
-    try:
-        with open(shader_path, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error Crítico: No se pudo encontrar el archivo de shader: {shader_path}")
+# Estados de la textura de estado (R8UI, un byte por celda). Tienen que
+# coincidir con los de shaders_modern/life_game.glsl
+STATE_DEAD = 0
+STATE_ALIVE = 1
+STATE_GHOST = 2
+# Gris con el que se guardan/leen las celdas fantasma en las imagenes (0.3 * 255)
+GHOST_PIXEL_VALUE = 76
+
+# Lado de los bloques del modo por bloques (solo se recalculan los bloques activos)
+SPARSE_TILE_SIZE = 32
 
 class GridWidget(QOpenGLWidget):
 
     live_count_changed = Signal(int)
+    # (generacion mostrada, generaciones grabadas) cuando se graba la trayectoria
+    recording_changed = Signal(int, int)
 
     def __init__(self, config: Config):
         super().__init__()
@@ -36,15 +44,51 @@ class GridWidget(QOpenGLWidget):
         self.display_program = None
         self.flip_program = None
         self.life_program = None
+        self.count_program = None
+        self.reduce_program = None
         # VAOs
         self.init_vao = None
         self.display_vao = None
         self.flip_vao = None
         self.life_vao = None
+        self.count_vao = None
+        self.reduce_vao = None
         # FBOs y Texturas
         self.fbos = []
         self.textures = []
         self.current_texture_idx = 0
+        # Texturas de la reduccion y buffer circular con el numero de celdas vivas por paso
+        self.reduce_textures = []
+        self.reduce_fbos = []
+        self.count_ring_texture = None
+        self.count_ring_fbo = None
+        self.pending_count_iterations = [] # Iteracion de cada posicion ocupada del buffer circular
+        # Detector de ciclos (CycleDetector) con el hash del estado que se calcula en la
+        # reduccion. Es None salvo que se active, p. ej. desde automate_experiments.py
+        self.cycle_detector = None
+        # Modo por bloques: cada paso solo recalcula los bloques en los que (o junto a los que)
+        # hubo cambios en el paso anterior. Las texturas de cambios tienen un texel por bloque
+        self.use_sparse_tiles = self.config.sparse_tiles
+        self.tile_life_program = None
+        self.tile_life_vao = None
+        self.activity_program = None
+        self.activity_vao = None
+        self.changed_textures = []
+        self.changed_fbos = []
+        self.changed_idx = 0
+        self.tiles = (0, 0)
+        self._sparse_rule = None # Regla con la que se calcularon los cambios
+        # Universo sin bordes: la simulacion se hace en la CPU por chunks (chunked_life) y la
+        # textura es solo la ventana de grid_width x grid_height que se ve, empezando en
+        # window_origin (fila, columna). Al arrastrar se mueve la ventana por el universo
+        self.universe = None
+        if self.config.unbounded:
+            try:
+                self.universe = ChunkedLifeUniverse(self.config.survive, self.config.birth)
+            except ValueError as e:
+                print(f"No se puede usar el universo sin bordes: {e}")
+        self.window_origin = [0, 0]
+        self._pan_remainder = [0.0, 0.0] # Desplazamiento acumulado de menos de una celda
         # Variables para zoom y paneo
         self.zoom_level = 1.0
         self.view_offset_x = self.config.grid_width / 2.0
@@ -74,6 +118,15 @@ class GridWidget(QOpenGLWidget):
         # el tamaño de la red puede crashear por falta de RAM.
         self.csv_buffer = []
         self.use_buffer_mode = False
+        # Si csv_filename termina en SERIES_EXTENSION se guarda una serie binaria (series_store)
+        # en vez del CSV, y los recuentos van directamente a un array tipado por bloques
+        self.series_writer = None
+        # Fuera del modo buffer las filas del CSV se escriben desde un hilo aparte (csv_logger)
+        self.csv_logger = None
+
+        # Grabacion de la trayectoria (trajectory.py) para poder volver atras
+        self.recorder = None
+        self.recorded_generation = 0 # Generacion de la trayectoria que se esta mostrando
 
     def initializeGL(self):
         """
@@ -86,10 +139,14 @@ class GridWidget(QOpenGLWidget):
             display_source = load_shader_source("shaders_modern/display.glsl")
             flip_source = load_shader_source("shaders_modern/flip.glsl")
             life_source = load_shader_source("shaders_modern/life_game.glsl")
+            count_source = load_shader_source("shaders_modern/count_alive.glsl")
+            reduce_source = load_shader_source("shaders_modern/reduce_sum.glsl")
             # Crear los programas de shaders
             self.display_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=display_source)
             self.flip_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=flip_source)
             self.life_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=life_source)
+            self.count_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=count_source)
+            self.reduce_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=reduce_source)
             # Crear los VAOs
             vertices = np.array([-1, -1, 1, -1, 1, 1, -1, 1], dtype='f4')
             indices = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
@@ -100,17 +157,80 @@ class GridWidget(QOpenGLWidget):
             self.display_vao = self.ctx.vertex_array(self.display_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
             self.flip_vao = self.ctx.vertex_array(self.flip_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
             self.life_vao = self.ctx.vertex_array(self.life_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
-            # Crear las texturas y FBOs
+            self.count_vao = self.ctx.vertex_array(self.count_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
+            self.reduce_vao = self.ctx.vertex_array(self.reduce_program, [(vbo, '2f', 'aPos')], index_buffer=ebo)
+            # Crear las texturas y FBOs. El estado es un entero de un byte por celda
+            # (16 veces menos memoria y ancho de banda que RGBA en float)
             for _ in range(2):
-                tex = self.ctx.texture((self.config.grid_width, self.config.grid_height), 4, dtype='f4')
+                tex = self.ctx.texture((self.config.grid_width, self.config.grid_height), 1, dtype='u1')
                 tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
                 self.textures.append(tex)
                 self.fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+            self._create_reduction_textures()
+            if self.use_sparse_tiles:
+                self._create_tile_resources(vertex_source, life_source)
             QtCore.QTimer.singleShot(0, self.perform_initial_render)
         except Exception as e:
             print(f"Error durante la inicialización de OpenGL: {e}")
             self.window().close()
 
+    def _create_reduction_textures(self):
+        """
+        Crea las texturas intermedias de la reduccion hasta que quede un bloque
+        de como mucho REDUCE_BLOCK x REDUCE_BLOCK, y el buffer circular de resultados
+        """
+        width, height = self.config.grid_width, self.config.grid_height
+        while width > REDUCE_BLOCK or height > REDUCE_BLOCK:
+            width = (width + REDUCE_BLOCK - 1) // REDUCE_BLOCK
+            height = (height + REDUCE_BLOCK - 1) // REDUCE_BLOCK
+            tex = self.ctx.texture((width, height), 4, dtype='u4') # Celdas vivas y hash del estado
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.reduce_textures.append(tex)
+            self.reduce_fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+
+        self.count_ring_texture = self.ctx.texture((COUNT_RING_SIZE, 1), 4, dtype='u4')
+        self.count_ring_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.count_ring_fbo = self.ctx.framebuffer(color_attachments=[self.count_ring_texture])
+
+    def _create_tile_resources(self, vertex_source: str, life_source: str):
+        """
+        Crea los programas y texturas del modo por bloques. El shader de la vida es
+        el mismo, solo cambia el vertex shader, que dibuja un cuadrado por bloque activo
+        """
+        tile_vertex_source = load_shader_source("shaders_modern/tile_vertex.glsl")
+        activity_source = load_shader_source("shaders_modern/tile_activity.glsl")
+        self.tile_life_program = self.ctx.program(vertex_shader=tile_vertex_source, fragment_shader=life_source)
+        self.activity_program = self.ctx.program(vertex_shader=vertex_source, fragment_shader=activity_source)
+
+        # Esquinas del bloque (de 0 a 1), cada instancia las coloca en su bloque
+        corners = np.array([0, 0, 1, 0, 1, 1, 0, 1], dtype='f4')
+        indices = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
+        self.tile_life_vao = self.ctx.vertex_array(self.tile_life_program, [(self.ctx.buffer(corners), '2f', 'aPos')],
+                                                   index_buffer=self.ctx.buffer(indices))
+        vertices = np.array([-1, -1, 1, -1, 1, 1, -1, 1], dtype='f4')
+        self.activity_vao = self.ctx.vertex_array(self.activity_program, [(self.ctx.buffer(vertices), '2f', 'aPos')],
+                                                  index_buffer=self.ctx.buffer(indices))
+
+        self.tiles = ((self.config.grid_width + SPARSE_TILE_SIZE - 1) // SPARSE_TILE_SIZE,
+                      (self.config.grid_height + SPARSE_TILE_SIZE - 1) // SPARSE_TILE_SIZE)
+        for _ in range(2):
+            tex = self.ctx.texture(self.tiles, 1, dtype='u1')
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.changed_textures.append(tex)
+            self.changed_fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+        self._mark_all_tiles_active()
+
+    def _mark_all_tiles_active(self):
+        """
+        Fuerza a recalcular todo el grid en el siguiente paso. Hace falta cada vez que
+        se escribe el estado sin pasar por el shader de la vida (inicio, importar,
+        cambiar una celda) o se cambia la regla, porque la otra textura queda desfasada
+        """
+        if not self.use_sparse_tiles:
+            return
+        ones = np.ones((self.tiles[1], self.tiles[0]), dtype=np.uint8)
+        self.changed_textures[self.changed_idx].write(ones.tobytes(), alignment=1)
+
     def perform_initial_render(self):
         self.run_init_shader()
         self._is_initialized = True
@@ -135,6 +255,19 @@ class GridWidget(QOpenGLWidget):
 
     def release_resources(self):
 
+        if self.pending_count_iterations and self.ctx:
+            # Los recuentos que queden en el buffer circular se escriben antes de cerrar
+            self.makeCurrent()
+            try:
+                self._flush_live_counts()
+            finally:
+                self.doneCurrent()
+        if self.series_writer is not None:
+            self.series_writer.close()
+            self.series_writer = None
+        self._close_csv_logger()
+        self.stop_recording()
+
         #print("Liberando recursos de ModernGL...")
         for fbo in self.fbos: 
             fbo.release()
@@ -152,6 +285,34 @@ class GridWidget(QOpenGLWidget):
             self.life_program.release()
         if self.life_vao: 
             self.life_vao.release()
+        for fbo in self.reduce_fbos:
+            fbo.release()
+        for texture in self.reduce_textures:
+            texture.release()
+        if self.count_ring_fbo:
+            self.count_ring_fbo.release()
+        if self.count_ring_texture:
+            self.count_ring_texture.release()
+        if self.count_program:
+            self.count_program.release()
+        if self.count_vao:
+            self.count_vao.release()
+        if self.reduce_program:
+            self.reduce_program.release()
+        if self.reduce_vao:
+            self.reduce_vao.release()
+        for fbo in self.changed_fbos:
+            fbo.release()
+        for texture in self.changed_textures:
+            texture.release()
+        if self.tile_life_program:
+            self.tile_life_program.release()
+        if self.tile_life_vao:
+            self.tile_life_vao.release()
+        if self.activity_program:
+            self.activity_program.release()
+        if self.activity_vao:
+            self.activity_vao.release()
         if self.ctx: 
             self.ctx.release()
         #print("Recursos liberados.")
@@ -160,13 +321,48 @@ class GridWidget(QOpenGLWidget):
         self.run_life_shader()
         self.update()
 
+    def next_generations(self, n: int):
+        """
+        Avanza n generaciones y solo repinta una vez
+        """
+        self.run_life_steps(n)
+        self.update()
+
     def restart_grid(self):
+        if self.save_csv_bool:
+            # Escribir los pasos que queden pendientes de la simulacion anterior
+            self.makeCurrent()
+            try:
+                self._flush_live_counts()
+            finally:
+                self.doneCurrent()
+
+        if self.cycle_detector is not None:
+            self.cycle_detector.reset()
+
         self.run_init_shader()
 
+        if self.recorder is not None:
+            # La trayectoria empieza de nuevo con el estado inicial
+            self.recorder.truncate(0)
+            self._record_current_state()
+
         if self.save_csv_bool:
             self.iteration_count = 0
 
-            if not os.path.exists(self.csv_filename):
+            if self.series_writer is not None:
+                self.series_writer.close()
+                self.series_writer = None
+
+            if self.csv_filename.endswith(SERIES_EXTENSION):
+                # Una serie por simulacion, al reiniciar se empieza el archivo de nuevo
+                try:
+                    self.series_writer = SeriesWriter(self.csv_filename, self.width, self.height, self.density,
+                                                      self.survive_rule, self.birth_rule)
+                except Exception as e:
+                    print(f"Error al crear el archivo de la serie: {e}")
+                    return
+            elif not os.path.exists(self.csv_filename):
                 try:
                     with open(self.csv_filename, mode='w', newline='') as file:
                         writer = csv.writer(file)
@@ -177,15 +373,11 @@ class GridWidget(QOpenGLWidget):
                 
             self.makeCurrent()
             try:
-                initial_data = self.textures[self.current_texture_idx].read(alignment=1)
+                self._queue_live_count(self.current_texture_idx)
+                self._flush_live_counts()
             finally:
                 self.doneCurrent()
 
-            float_array = np.frombuffer(initial_data, dtype=np.float32)
-            initial_live_count = int(np.sum(float_array[::4] > 0.5))  # Contar células vivas en el canal R
-            self._write_count_to_csv(initial_live_count)
-            self.live_count_changed.emit(initial_live_count)
-
         self.update()
 
     def flip_cell(self, x, y):
@@ -193,6 +385,13 @@ class GridWidget(QOpenGLWidget):
         Funcion para alternar el estado de una celda en (x, y)
         0 -> 1 o 1 -> 0
         """
+        if self.universe is not None:
+            cell = (self.window_origin[0] + y, self.window_origin[1] + x)
+            self.universe.add_cells(~self.universe.get_window(cell, (1, 1)), cell)
+            self._upload_universe_window()
+            self.update()
+            return
+
         self.makeCurrent()
         try:
             source_idx = self.current_texture_idx
@@ -208,6 +407,7 @@ class GridWidget(QOpenGLWidget):
 
             self.flip_vao.render(moderngl.TRIANGLES)
             self.current_texture_idx = dest_idx
+            self._mark_all_tiles_active()
         finally:
             self.doneCurrent()
         self.update()
@@ -216,24 +416,25 @@ class GridWidget(QOpenGLWidget):
         """
         Funcion para ejecutar el shader de inicializacion
         """
+        if self.universe is not None:
+            # La sopa inicial ocupa la ventana, luego puede crecer sin limite
+            self.universe.randomize(self.config.grid_width, self.config.grid_height, self.config.density)
+            self.window_origin = [0, 0]
+            self._upload_universe_window()
+            return
+
         self.makeCurrent()
         try:
             dest_idx = 1 - self.current_texture_idx
-            # Inicializar una matriz con 1 y 0 aleatorios segun la densidad
-            initial_state = np.random.choice([0.0, 1.0], size=(self.config.grid_height, self.config.grid_width), 
-                            p=[1 - self.config.density, self.config.density]).astype('f4')
-
-            # Generar la textura RGBA a partir del estado inicial
-            rgba_grid = np.zeros((self.config.grid_height, self.config.grid_width, 4), dtype='f4')
-            rgba_grid[..., 0] = initial_state  # R
-            rgba_grid[..., 1] = initial_state  # G
-            rgba_grid[..., 2] = initial_state  # B
-            rgba_grid[..., 3] = 1.0  # A
+            # Inicializar una matriz con celdas vivas y muertas aleatorias segun la densidad
+            initial_state = np.random.choice([STATE_DEAD, STATE_ALIVE], size=(self.config.grid_height, self.config.grid_width),
+                            p=[1 - self.config.density, self.config.density]).astype(np.uint8)
 
             # Escribir los datos de la textura en bytes
-            self.textures[dest_idx].write(rgba_grid.tobytes(), alignment=1)
+            self.textures[dest_idx].write(initial_state.tobytes(), alignment=1)
 
             self.current_texture_idx = dest_idx
+            self._mark_all_tiles_active()
         finally:
             self.doneCurrent()
 
@@ -241,53 +442,285 @@ class GridWidget(QOpenGLWidget):
         """
         Funcion para ejecutar el shader de la vida
         """
-        self.makeCurrent()
-        try:
-            source_idx = self.current_texture_idx
-            dest_idx = 1 - source_idx
+        self.run_life_steps(1)
 
-            self.fbos[dest_idx].use()
+    def run_life_steps(self, n: int):
+        """
+        Ejecuta n pasos del shader de la vida en un solo contexto GL.
+        Los uniforms se configuran una sola vez, mucho mas rapido que llamar a
+        run_life_shader() n veces.
+        """
+        if self.universe is not None:
+            self._run_universe_steps(n)
+            return
 
-            self.life_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
+        if self.recorder is not None and self.recorded_generation < len(self.recorder) - 1:
+            # Se ha vuelto atras: la trayectoria sigue desde la generacion mostrada
+            self.recorder.truncate(self.recorded_generation + 1)
 
-            self.textures[source_idx].use(location=0)
+        self.makeCurrent()
+        try:
+            # Configurar uniforms constantes una sola vez
+            self.life_program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
             self.life_program['u_state_texture'].value = 0
-
             self.life_program['u_survive'].value = self.survive_rule
             self.life_program['u_birth'].value = self.birth_rule
+            if self.use_sparse_tiles:
+                self._set_tile_uniforms()
+
+            for _ in range(n):
+                source_idx = self.current_texture_idx
+                dest_idx = 1 - source_idx
+
+                self.fbos[dest_idx].use()
+                # Hay que volver a enlazar la textura en cada paso, la reduccion usa la misma unidad
+                self.textures[source_idx].use(location=0)
+                if self.use_sparse_tiles:
+                    self._run_tile_step(source_idx, dest_idx)
+                else:
+                    self.life_vao.render(moderngl.TRIANGLES)
+
+                if self.save_csv_bool:
+                    # El recuento se hace en la GPU, solo se leen los resultados cuando se llena
+                    # el buffer circular (o al parar, reiniciar o cerrar, con flush_csv_buffer)
+                    self.iteration_count += 1
+                    self._queue_live_count(dest_idx)
+                    if len(self.pending_count_iterations) == COUNT_RING_SIZE:
+                        self._flush_live_counts()
+
+                self.current_texture_idx = dest_idx
+
+                if self.recorder is not None:
+                    self.recorder.append(self._read_alive_cells())
+                    self.recorded_generation += 1
 
-            self.life_vao.render(moderngl.TRIANGLES)
+        finally:
+            self.doneCurrent()
 
-            self.ctx.finish()
+        if self.recorder is not None:
+            # Para que los scripts de analisis puedan leer la trayectoria mientras se graba
+            self.recorder.flush()
+            self.recording_changed.emit(self.recorded_generation, len(self.recorder))
 
+    def _run_universe_steps(self, n: int):
+        """
+        Avanza n pasos el universo sin bordes y vuelve a subir la ventana visible
+        """
+        if self.birth_rule != self.universe.birth_rule:
+            try:
+                self.universe.birth_rule = self.birth_rule
+            except ValueError as e:
+                # Se sigue con la regla anterior
+                print(f"No se puede cambiar la regla del universo sin bordes: {e}")
+                self.birth_rule = self.universe.birth_rule
+        self.universe.survive_rule = self.survive_rule
+        for _ in range(n):
+            self.universe.step()
             if self.save_csv_bool:
-                dest_texture = self.textures[dest_idx]
-                raw_data = dest_texture.read(alignment=1)
-                float_array = np.frombuffer(raw_data, dtype=np.float32)
-                live_count = int(np.sum(float_array[::4] > 0.5))  # Contar células vivas en el canal R
                 self.iteration_count += 1
-                self._write_count_to_csv(live_count)
-                self.live_count_changed.emit(live_count)
+                self._write_count_to_csv(self.universe.live_count())
+        self._upload_universe_window()
+        self.live_count_changed.emit(self.universe.live_count())
 
-            self.current_texture_idx = dest_idx
+    def _upload_universe_window(self):
+        """
+        Escribe en la textura actual la zona del universo que cae en la ventana
+        """
+        window = self.universe.get_window(tuple(self.window_origin), (self.config.grid_height, self.config.grid_width))
+        state = np.where(window, STATE_ALIVE, STATE_DEAD).astype(np.uint8)
+        self.makeCurrent()
+        try:
+            self.textures[self.current_texture_idx].write(state.tobytes(), alignment=1)
+        finally:
+            self.doneCurrent()
+
+    def _pan_universe(self, delta_grid_x: float, delta_grid_y: float):
+        """
+        Mueve la ventana por el universo, solo cuando el arrastre acumulado llega a una celda
+        """
+        self._pan_remainder[0] += delta_grid_y
+        self._pan_remainder[1] -= delta_grid_x
+        shift = [int(value) for value in self._pan_remainder]
+        if shift == [0, 0]:
+            return
+        self._pan_remainder = [value - moved for value, moved in zip(self._pan_remainder, shift)]
+        self.window_origin = [origin + moved for origin, moved in zip(self.window_origin, shift)]
+        self._upload_universe_window()
+
+    def _set_tile_uniforms(self):
+        """
+        Uniforms constantes del modo por bloques. Hay que llamarla con el contexto activo
+        """
+        if self._sparse_rule != (self.survive_rule, self.birth_rule):
+            # Con otra regla los bloques quietos pueden dejar de estarlo
+            self._mark_all_tiles_active()
+            self._sparse_rule = (self.survive_rule, self.birth_rule)
+
+        program = self.tile_life_program
+        program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
+        program['u_state_texture'].value = 0
+        program['u_changed_texture'].value = 1
+        program['u_survive'].value = self.survive_rule
+        program['u_birth'].value = self.birth_rule
+        program['u_tiles'].value = self.tiles
+        program['u_tile_size'].value = (SPARSE_TILE_SIZE, SPARSE_TILE_SIZE)
+
+        program = self.activity_program
+        program['u_previous_texture'].value = 0
+        program['u_changed_texture'].value = 1
+        program['u_next_texture'].value = 2
+        program['u_tiles'].value = self.tiles
+        program['u_tile_size'].value = (SPARSE_TILE_SIZE, SPARSE_TILE_SIZE)
+        program['u_grid_size'].value = (self.config.grid_width, self.config.grid_height)
+
+    def _run_tile_step(self, source_idx: int, dest_idx: int):
+        """
+        Un paso del modo por bloques, con el FBO de destino y la textura de origen ya enlazados.
+        Los bloques que no se dibujan se quedan con lo que tenia la textura de destino (el
+        estado de hace dos pasos), que es correcto porque no ha cambiado en el ultimo paso.
+        """
+        changed_texture = self.changed_textures[self.changed_idx]
+        changed_texture.use(location=1)
+        self.tile_life_vao.render(moderngl.TRIANGLES, instances=self.tiles[0] * self.tiles[1])
+
+        # Que bloques han cambiado, para el siguiente paso
+        self.textures[dest_idx].use(location=2)
+        self.changed_fbos[1 - self.changed_idx].use()
+        self.activity_vao.render(moderngl.TRIANGLES)
+        self.changed_idx = 1 - self.changed_idx
+
+    def _queue_live_count(self, texture_idx: int):
+        """
+        Cuenta las celdas vivas de una textura en la GPU y guarda el resultado en la
+        siguiente posicion del buffer circular. Hay que llamarla con el contexto activo.
+        """
+        slot = len(self.pending_count_iterations)
+
+        source = self.textures[texture_idx]
+        source.use(location=0)
+        program, vao = self.count_program, self.count_vao
+        targets = self.reduce_fbos + [self.count_ring_fbo]
+
+        for level, fbo in enumerate(targets):
+            is_last = level == len(targets) - 1
+            if is_last:
+                # La ultima pasada escribe un unico texel en el buffer circular
+                fbo.viewport = (slot, 0, 1, 1)
+            fbo.use()
+
+            program['u_source_texture'].value = 0
+            program['u_source_size'].value = source.size
+            program['u_block'].value = REDUCE_BLOCK
+            program['u_output_offset'].value = (slot, 0) if is_last else (0, 0)
+            vao.render(moderngl.TRIANGLES)
+
+            if not is_last:
+                source = self.reduce_textures[level]
+                source.use(location=0)
+                program, vao = self.reduce_program, self.reduce_vao
+
+        self.pending_count_iterations.append(self.iteration_count)
+
+    def _flush_live_counts(self):
+        """
+        Lee de golpe los recuentos pendientes del buffer circular y los escribe.
+        Hay que llamarla con el contexto activo.
+        """
+        if not self.pending_count_iterations:
+            return
+
+        num_counts = len(self.pending_count_iterations)
+        raw_data = self.count_ring_fbo.read(viewport=(0, 0, num_counts, 1), components=4, dtype='u4')
+        ring_data = np.frombuffer(raw_data, dtype=np.uint32).reshape(num_counts, 4)
+        counts = ring_data[:, 0]
+
+        self._write_counts(counts, self.pending_count_iterations)
+        if self.cycle_detector is not None:
+            for iteration, (count, hash_a, hash_b, _) in zip(self.pending_count_iterations, ring_data):
+                self.cycle_detector.update(iteration, (int(hash_a), int(hash_b)), int(count))
+        self.pending_count_iterations.clear()
+
+        self.live_count_changed.emit(int(counts[-1]))
 
+    def detected_cycle_period(self):
+        """
+        Lee los recuentos pendientes y devuelve el periodo del ciclo si el estado
+        ya se ha repetido (None si no, o si no hay detector de ciclos)
+        """
+        if self.cycle_detector is None:
+            return None
+        self.makeCurrent()
+        try:
+            self._flush_live_counts()
         finally:
             self.doneCurrent()
+        return self.cycle_detector.period
 
-    def _write_count_to_csv(self, count: int):
+    def fill_csv_from_cycle(self, last_iteration: int):
+        """
+        Escribe las filas desde la iteracion actual hasta last_iteration sacando las
+        celdas vivas del ciclo detectado, sin simular esos pasos
+        """
+        if self.cycle_detector is None or self.cycle_detector.period is None:
+            return
+        iterations = np.arange(self.iteration_count + 1, last_iteration + 1)
+        self._write_counts(self.cycle_detector.counts_for(iterations), iterations)
 
-        if self.use_buffer_mode:
-            self.csv_buffer.append([
-                self.height, self.width, self.density, 
-                self.survive_rule, self.birth_rule, 
-                self.iteration_count, count
-            ])
+    def _write_count_to_csv(self, count: int, iteration: int = None):
+
+        if iteration is None:
+            iteration = self.iteration_count
+
+        if self.series_writer is not None:
+            self.series_writer.append(count)
         else:
-            with open(self.csv_filename, mode='a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([self.height, self.width, self.density, self.survive_rule, self.birth_rule, self.iteration_count, count])
+            self._write_counts([count], [iteration])
+
+    def _write_counts(self, counts, iterations):
+        """
+        Guarda un lote de recuentos: en la serie binaria, en el buffer o en la cola
+        del hilo escritor del CSV
+        """
+        if self.series_writer is not None:
+            self.series_writer.extend(counts)
+            return
+
+        rows = [[self.height, self.width, self.density, self.survive_rule, self.birth_rule, int(iteration), int(count)]
+                for iteration, count in zip(iterations, counts)]
+        if self.use_buffer_mode:
+            self.csv_buffer.extend(rows)
+            return
+
+        if self.csv_logger is None or self.csv_logger.file_path != self.csv_filename:
+            self._close_csv_logger()
+            try:
+                self.csv_logger = CsvLogger(self.csv_filename)
+            except Exception as e:
+                print(f"Error al abrir el archivo CSV: {e}")
+                return
+        self.csv_logger.write_rows(rows)
+
+    def _close_csv_logger(self):
+        """
+        Espera a que el hilo escritor termine de escribir las filas pendientes y lo cierra
+        """
+        if self.csv_logger is not None:
+            self.csv_logger.close()
+            self.csv_logger = None
 
     def flush_csv_buffer(self):
+        if self.pending_count_iterations:
+            self.makeCurrent()
+            try:
+                self._flush_live_counts()
+            finally:
+                self.doneCurrent()
+
+        if self.series_writer is not None:
+            self.series_writer.flush()
+        if self.csv_logger is not None:
+            self.csv_logger.flush()
+
         if not self.csv_buffer:
             return
 
@@ -350,8 +783,11 @@ class GridWidget(QOpenGLWidget):
             delta_grid_x = (delta.x()) * grid_units_visible_x / self.width()
             delta_grid_y = (delta.y()) * grid_units_visible_y / self.height()
 
-            self.view_offset_x -= delta_grid_x
-            self.view_offset_y += delta_grid_y
+            if self.universe is not None:
+                self._pan_universe(delta_grid_x, delta_grid_y)
+            else:
+                self.view_offset_x -= delta_grid_x
+                self.view_offset_y += delta_grid_y
 
             self.update()
 
@@ -397,14 +833,18 @@ class GridWidget(QOpenGLWidget):
             texture = self.textures[self.current_texture_idx]
             raw_data = texture.read(alignment=1)
             width, height = texture.size
-            components = texture.components
             #print("Guardando patrón")
-            
-            float_array = np.frombuffer(raw_data, dtype=np.float32) # El dtype es f32 para 4 componentes (RGBA)
-            float_array = float_array.reshape((height, width, components))
-            uint8_array = (float_array * 255).astype(np.uint8)
-                
-            image = Image.fromarray(uint8_array, 'RGBA' if components == 4 else 'RGB')
+
+            state = np.frombuffer(raw_data, dtype=np.uint8).reshape((height, width))
+            # Se guarda con los mismos colores que se ven en pantalla
+            gray = np.zeros((height, width), dtype=np.uint8)
+            gray[state == STATE_GHOST] = GHOST_PIXEL_VALUE
+            gray[state == STATE_ALIVE] = 255
+            uint8_array = np.empty((height, width, 4), dtype=np.uint8)
+            uint8_array[..., :3] = gray[..., None]
+            uint8_array[..., 3] = 255
+
+            image = Image.fromarray(uint8_array, 'RGBA')
 
             image = image.transpose(Image.FLIP_TOP_BOTTOM)
             image.save(file_path)
@@ -429,15 +869,24 @@ class GridWidget(QOpenGLWidget):
             image = image.convert("RGBA") 
             image = image.transpose(method=Image.Transpose.FLIP_TOP_BOTTOM) # ModernGL tiene el eje y cambiado
 
-            uint8_array = np.array(image)
-            float_array = (uint8_array / 255.0).astype(np.float32)
+            # Canal rojo: claro es viva, gris oscuro fantasma y negro muerta
+            red = np.array(image)[..., 0]
+            state = np.full(red.shape, STATE_DEAD, dtype=np.uint8)
+            state[red > 0] = STATE_GHOST
+            state[red > 127] = STATE_ALIVE
+
+            if self.universe is not None:
+                # Se pega en la zona del universo que se esta viendo
+                self.universe.add_cells(state == STATE_ALIVE, tuple(self.window_origin))
+                state = np.where(state == STATE_ALIVE, STATE_ALIVE, STATE_DEAD).astype(np.uint8)
 
-            data_for_texture = float_array.tobytes()
+            data_for_texture = state.tobytes()
 
             dest_idx = 1 - self.current_texture_idx
             self.textures[dest_idx].write(data_for_texture, alignment=1)
 
             self.current_texture_idx = dest_idx
+            self._mark_all_tiles_active()
 
             print(f"Patrón importado desde {file_path}")
 
@@ -447,4 +896,147 @@ class GridWidget(QOpenGLWidget):
         finally:
             self.doneCurrent()
 
-            self.update()
\ No newline at end of file
+            self.update()
+
+    def import_life_pattern(self, file_path: str, offset=None):
+        """
+        Importa un patron RLE o macrocell sin reescalarlo. offset es la (columna, fila)
+        de la esquina superior izquierda contando desde arriba; por defecto se centra
+        """
+        try:
+            cells, rule = read_pattern(file_path)
+        except (OSError, ValueError) as e:
+            print(f"Error al importar el patrón: {e}")
+            return
+
+        if rule and parse_rule(rule) != (self.survive_rule, self.birth_rule):
+            print(f"Aviso: el patrón es para la regla {rule} y se está usando "
+                  f"{rule_string(self.survive_rule, self.birth_rule)}")
+        self.paste_cells(cells, offset)
+        print(f"Patrón importado desde {file_path}")
+
+    def paste_cells(self, cells: np.ndarray, offset=None):
+        """
+        Pega una matriz booleana (alto, ancho) con la fila 0 arriba. Solo se escribe
+        en la textura el rectangulo que ocupa el patron
+        """
+        cells = np.asarray(cells, dtype=bool)
+        grid_width, grid_height = self.config.grid_width, self.config.grid_height
+        if offset is None:
+            offset = ((grid_width - cells.shape[1]) // 2, (grid_height - cells.shape[0]) // 2)
+        col0, row0 = offset
+
+        # Recortar lo que se sale del grid
+        top, left = max(0, -row0), max(0, -col0)
+        bottom = min(cells.shape[0], grid_height - row0)
+        right = min(cells.shape[1], grid_width - col0)
+        if bottom <= top or right <= left:
+            print("El patrón queda fuera del grid")
+            return
+        if (top, left, bottom, right) != (0, 0) + cells.shape:
+            print("Aviso: el patrón no cabe en el grid y se ha recortado")
+        cells = cells[top:bottom, left:right]
+        col0, row0 = col0 + left, row0 + top
+
+        # En la textura la fila 0 es la de abajo
+        texture_row0 = grid_height - row0 - cells.shape[0]
+        block = np.flipud(cells)
+
+        if self.universe is not None:
+            self.universe.add_cells(block, (self.window_origin[0] + texture_row0, self.window_origin[1] + col0))
+            self._upload_universe_window()
+            self.update()
+            return
+
+        state = np.where(block, STATE_ALIVE, STATE_DEAD).astype(np.uint8)
+        self.makeCurrent()
+        try:
+            self.textures[self.current_texture_idx].write(
+                state.tobytes(), viewport=(col0, texture_row0, state.shape[1], state.shape[0]), alignment=1)
+            self._mark_all_tiles_active()
+        finally:
+            self.doneCurrent()
+        self.update()
+
+    def export_life_pattern(self, file_path: str):
+        """
+        Guarda las celdas vivas en RLE (o macrocell si la extension es .mc), recortadas
+        al rectangulo que ocupan y con la regla actual
+        """
+        self.makeCurrent()
+        try:
+            raw_data = self.textures[self.current_texture_idx].read(alignment=1)
+        finally:
+            self.doneCurrent()
+        state = np.frombuffer(raw_data, dtype=np.uint8).reshape(self.config.grid_height, self.config.grid_width)
+        alive = np.flipud(state == STATE_ALIVE)
+
+        rows, cols = np.nonzero(alive)
+        if len(rows):
+            alive = alive[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+        else:
+            alive = np.zeros((0, 0), dtype=bool)
+        try:
+            write_pattern(file_path, alive, rule_string(self.survive_rule, self.birth_rule))
+        except OSError as e:
+            print(f"Se ha producido un error: {e}")
+
+    def _read_alive_cells(self) -> np.ndarray:
+        """
+        Celdas vivas de la textura actual como matriz booleana con la fila 0 arriba.
+        Hay que llamarla con el contexto activo.
+        """
+        raw_data = self.textures[self.current_texture_idx].read(alignment=1)
+        state = np.frombuffer(raw_data, dtype=np.uint8).reshape(self.config.grid_height, self.config.grid_width)
+        return np.flipud(state == STATE_ALIVE)
+
+    def _record_current_state(self):
+        self.makeCurrent()
+        try:
+            self.recorder.append(self._read_alive_cells())
+        finally:
+            self.doneCurrent()
+        self.recorder.flush()
+        self.recorded_generation = len(self.recorder) - 1
+        self.recording_changed.emit(self.recorded_generation, len(self.recorder))
+
+    def start_recording(self, file_path: str):
+        """
+        Empieza a grabar la trayectoria en file_path, desde el estado actual (generacion 0).
+        Cada paso lee el estado de la GPU, asi que la simulacion va mas lenta mientras se graba
+        """
+        if self.universe is not None:
+            print("No se puede grabar la trayectoria del universo sin bordes")
+            return
+        self.stop_recording()
+        try:
+            self.recorder = TrajectoryRecorder(file_path, self.config.grid_width, self.config.grid_height)
+        except OSError as e:
+            print(f"Error al crear el archivo de la trayectoria: {e}")
+            return
+        self._record_current_state()
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            self.recorded_generation = 0
+
+    def seek_generation(self, generation: int):
+        """
+        Muestra una generacion ya grabada. Si despues se avanza la simulacion, se sigue
+        desde ella y se descartan las generaciones grabadas posteriores
+        """
+        if self.recorder is None or not 0 <= generation < len(self.recorder):
+            return
+        cells = self.recorder.frame(generation)
+        state = np.where(np.flipud(cells), STATE_ALIVE, STATE_DEAD).astype(np.uint8)
+        self.makeCurrent()
+        try:
+            self.textures[self.current_texture_idx].write(state.tobytes(), alignment=1)
+            self._mark_all_tiles_active()
+        finally:
+            self.doneCurrent()
+        self.recorded_generation = generation
+        self.live_count_changed.emit(int(cells.sum()))
+        self.update()
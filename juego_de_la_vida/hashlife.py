@@ -0,0 +1,278 @@
+"""
+Motor HashLife para simulaciones muy largas del Juego de la Vida.
+
+El universo se guarda como un quadtree en el que los nodos iguales se comparten
+(canonicalizados en una tabla hash) y el resultado de avanzar cada nodo se
+memoiza. Asi se pueden saltar 2^k generaciones de golpe: cuando una sopa
+aleatoria se ha quedado en ceniza y osciladores, avanzar 10^6 generaciones
+cuesta muy poco.
+
+OJO: a diferencia del shader (y de bit_life), el universo es infinito y todo
+lo que hay fuera esta muerto, no es periodico. Mientras nada llegue al borde
+del grid los resultados son los mismos, pero los planeadores que escapan no
+vuelven a entrar por el otro lado. Tampoco se guarda el estado 'fantasma',
+solo las celdas vivas.
+"""
+
+import numpy as np
+
+from bit_life import rule_masks
+
+
+class Node:
+    """
+    Nodo del quadtree. Un nodo de nivel k representa un cuadrado de 2^k x 2^k celdas.
+    Los nodos de nivel 0 son las celdas (viva o muerta).
+    """
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population')
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class HashLife:
+    """
+    Juego de la Vida con el algoritmo HashLife y las reglas survive/birth del shader
+    """
+
+    def __init__(self, survive: int = 2, birth: int = 3, max_nodes: int = 5_000_000):
+        if birth == 0:
+            # Con B0 el espacio vacio se llena de celdas y el universo infinito no tiene sentido
+            raise ValueError("HashLife no admite reglas en las que se nace con 0 vecinos")
+
+        self.survive_rule = survive
+        self.birth_rule = birth
+        self.survive_mask, self.birth_mask = rule_masks(survive, birth)
+        self.max_nodes = max_nodes # Tamaño maximo de la tabla de nodos antes de limpiarla
+
+        self.off = Node(None, None, None, None, 0, 0)
+        self.on = Node(None, None, None, None, 0, 1)
+
+        self._nodes = {}
+        self._empty = [self.off]
+        self._cache = {}
+
+        self.root = self.empty(3)
+        self.generation = 0
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """
+        Devuelve el nodo canonico con esos cuatro hijos
+        """
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1,
+                        nw.population + ne.population + sw.population + se.population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level: int) -> Node:
+        """
+        Nodo vacio de un nivel dado
+        """
+        while len(self._empty) <= level:
+            previous = self._empty[-1]
+            self._empty.append(self.join(previous, previous, previous, previous))
+        return self._empty[level]
+
+    def centre(self, node: Node) -> Node:
+        """
+        Devuelve un nodo un nivel mayor con el nodo dado en el centro
+        """
+        border = self.empty(node.level - 1)
+        return self.join(self.join(border, border, border, node.nw),
+                         self.join(border, border, node.ne, border),
+                         self.join(border, node.sw, border, border),
+                         self.join(node.se, border, border, border))
+
+    def _inner(self, node: Node) -> Node:
+        """
+        Nodo un nivel menor que cubre el centro del nodo dado
+        """
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _is_padded(self, node: Node) -> bool:
+        return node.level >= 2 and self._inner(node).population == node.population
+
+    def _life_4x4(self, node: Node) -> Node:
+        """
+        Caso base: avanza una generacion el centro 2x2 de un nodo 4x4
+        """
+        cells = np.zeros((4, 4), dtype=int)
+        for row_half, (left, right) in enumerate(((node.nw, node.ne), (node.sw, node.se))):
+            for col_half, quad in enumerate((left, right)):
+                cells[2 * row_half, 2 * col_half] = quad.nw.population
+                cells[2 * row_half, 2 * col_half + 1] = quad.ne.population
+                cells[2 * row_half + 1, 2 * col_half] = quad.sw.population
+                cells[2 * row_half + 1, 2 * col_half + 1] = quad.se.population
+
+        result = []
+        for row in (1, 2):
+            for col in (1, 2):
+                neighbours = cells[row - 1:row + 2, col - 1:col + 2].sum() - cells[row, col]
+                mask = self.survive_mask if cells[row, col] else self.birth_mask
+                result.append(self.on if (mask >> neighbours) & 1 else self.off)
+        return self.join(*result)
+
+    def successor(self, node: Node, j: int) -> Node:
+        """
+        Devuelve el centro (nivel k-1) del nodo de nivel k avanzado 2^j generaciones, con j <= k-2
+        """
+        if node.population == 0:
+            return node.nw
+
+        key = (node, j)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        level = node.level
+        if level == 2:
+            result = self._life_4x4(node)
+        else:
+            j = min(j, level - 2)
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+
+            # Los 9 subnodos solapados de nivel k-1, avanzados 2^j (o 2^(k-3)) generaciones
+            sub_j = min(j, level - 3)
+            c1 = self.successor(nw, sub_j)
+            c2 = self.successor(self.join(nw.ne, ne.nw, nw.se, ne.sw), sub_j)
+            c3 = self.successor(ne, sub_j)
+            c4 = self.successor(self.join(nw.sw, nw.se, sw.nw, sw.ne), sub_j)
+            c5 = self.successor(self._inner(node), sub_j)
+            c6 = self.successor(self.join(ne.sw, ne.se, se.nw, se.ne), sub_j)
+            c7 = self.successor(sw, sub_j)
+            c8 = self.successor(self.join(sw.ne, se.nw, sw.se, se.sw), sub_j)
+            c9 = self.successor(se, sub_j)
+
+            if j < level - 2:
+                # Ya se ha avanzado todo lo pedido, solo hay que recomponer el centro
+                result = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw),
+                                   self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                                   self.join(c4.se, c5.sw, c7.ne, c8.nw),
+                                   self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                # Velocidad maxima: dos saltos de 2^(k-3) generaciones
+                result = self.join(self.successor(self.join(c1, c2, c4, c5), j),
+                                   self.successor(self.join(c2, c3, c5, c6), j),
+                                   self.successor(self.join(c4, c5, c7, c8), j),
+                                   self.successor(self.join(c5, c6, c8, c9), j))
+
+        self._cache[key] = result
+        return result
+
+    def set_cells(self, cells: np.ndarray):
+        """
+        Carga un estado booleano (alto, ancho). La celda (0, 0) del array queda en la esquina
+        superior izquierda del nodo raiz, que esta centrado en el origen.
+        """
+        cells = np.asarray(cells, dtype=bool)
+        height, width = cells.shape
+        level = max(3, int(np.ceil(np.log2(max(height, width, 1)))))
+        size = 1 << level
+
+        padded = np.zeros((size, size), dtype=bool)
+        padded[:height, :width] = cells
+
+        # Construir el quadtree de abajo arriba combinando bloques de 2x2
+        nodes = np.where(padded, self.on, self.off).astype(object)
+        join = np.frompyfunc(self.join, 4, 1)
+        while nodes.shape[0] > 1:
+            nodes = join(nodes[0::2, 0::2], nodes[0::2, 1::2], nodes[1::2, 0::2], nodes[1::2, 1::2])
+
+        self.root = nodes[0, 0]
+        self.generation = 0
+
+    def randomize(self, width: int, height: int, density: float, rng: np.random.Generator = None):
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_cells(rng.random((height, width)) < density)
+
+    def live_count(self) -> int:
+        return self.root.population
+
+    def _step_pow2(self, j: int):
+        """
+        Avanza 2^j generaciones
+        """
+        root = self.root
+        while root.level < j + 2 or not self._is_padded(root):
+            root = self.centre(root)
+        # Un nivel mas para que el patron no pueda salir del resultado
+        root = self.centre(root)
+        self.root = self.successor(root, j)
+        self.generation += 1 << j
+
+        if len(self._nodes) > self.max_nodes:
+            self.collect()
+
+    def advance(self, n_steps: int):
+        """
+        Avanza n_steps generaciones, descomponiendo el salto en potencias de 2
+        """
+        j = 0
+        while n_steps > 0:
+            if n_steps & 1:
+                self._step_pow2(j)
+            n_steps >>= 1
+            j += 1
+
+    def run_sampled(self, sample_times) -> np.ndarray:
+        """
+        Devuelve el numero de celdas vivas en cada una de las generaciones pedidas.
+        Las generaciones tienen que estar ordenadas y no ser anteriores a la actual.
+        """
+        counts = np.empty(len(sample_times), dtype=np.int64)
+        for idx, time in enumerate(sample_times):
+            time = int(time)
+            if time < self.generation:
+                raise ValueError(f"La generacion {time} ya ha pasado (generacion actual {self.generation})")
+            self.advance(time - self.generation)
+            counts[idx] = self.live_count()
+        return counts
+
+    def live_cells(self) -> np.ndarray:
+        """
+        Devuelve las coordenadas (fila, columna) de las celdas vivas, relativas al origen
+        """
+        coords = []
+        half = 1 << (self.root.level - 1)
+        stack = [(self.root, -half, -half)]
+        while stack:
+            node, row, col = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                coords.append((row, col))
+                continue
+            quarter = 1 << (node.level - 1)
+            stack.append((node.nw, row, col))
+            stack.append((node.ne, row, col + quarter))
+            stack.append((node.sw, row + quarter, col))
+            stack.append((node.se, row + quarter, col + quarter))
+        return np.array(coords, dtype=np.int64).reshape(-1, 2)
+
+    def collect(self):
+        """
+        Vacia la cache y la tabla de nodos, conservando solo los nodos del estado actual
+        """
+        self._cache = {}
+        self._nodes = {}
+        self._empty = [self.off]
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in self._nodes:
+                continue
+            self._nodes[key] = node
+            stack.extend(key)
+        self.empty(self.root.level)
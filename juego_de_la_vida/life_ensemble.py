@@ -0,0 +1,145 @@
+"""
+Conjunto de replicas independientes del Juego de la Vida empaquetadas en bits.
+
+Cada celda del grid es una palabra uint64 y el bit i de la palabra es la celda
+en la replica i. Con los mismos sumadores bit a bit que bit_life, una sola
+pasada avanza 64 sopas distintas con la misma regla survive/birth. Se pueden
+apilar varias palabras por celda (lotes) para tener mas de 64 replicas.
+
+Igual que el shader, los bordes son periodicos. No se guarda el estado fantasma.
+"""
+
+import numpy as np
+
+from bit_life import WORD_BITS, count_neighbour_bits, match_count_mask, rule_masks
+
+# Tabla con los bits de cada byte, para contar por replica con histogramas
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder='little').astype(np.int64)
+
+
+def pack_replicas(cells: np.ndarray) -> np.ndarray:
+    """
+    Empaqueta estados booleanos (replicas, alto, ancho) en palabras (lotes, alto, ancho),
+    con la replica i en el bit i % 64 del lote i // 64
+    """
+    cells = np.asarray(cells, dtype=bool)
+    num_replicas, height, width = cells.shape
+    num_batches = (num_replicas + WORD_BITS - 1) // WORD_BITS
+
+    padded = np.zeros((num_batches * WORD_BITS, height, width), dtype=bool)
+    padded[:num_replicas] = cells
+    padded = np.moveaxis(padded.reshape(num_batches, WORD_BITS, height, width), 1, -1)
+
+    packed = np.packbits(padded, axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').astype(np.uint64, copy=False)[..., 0]
+
+
+def unpack_replicas(words: np.ndarray, num_replicas: int) -> np.ndarray:
+    """
+    Operacion inversa de pack_replicas, devuelve (replicas, alto, ancho)
+    """
+    words = np.ascontiguousarray(words, dtype='<u8')
+    num_batches, height, width = words.shape
+    bits = np.unpackbits(words.view(np.uint8).reshape(num_batches, height, width, 8), axis=-1, bitorder='little')
+    bits = np.moveaxis(bits, -1, 1).reshape(num_batches * WORD_BITS, height, width)
+    return bits[:num_replicas].astype(bool)
+
+
+def replica_popcounts(words: np.ndarray, num_replicas: int) -> np.ndarray:
+    """
+    Cuenta los bits a 1 de cada replica. Se hace un histograma de cada byte de las
+    palabras en vez de desempaquetar, asi no se crea un array 64 veces mas grande.
+    """
+    words = np.ascontiguousarray(words, dtype='<u8')
+    num_batches = words.shape[0]
+    byte_view = words.view(np.uint8).reshape(num_batches, -1, 8)
+
+    counts = np.empty((num_batches, WORD_BITS), dtype=np.int64)
+    for batch in range(num_batches):
+        for byte_idx in range(8):
+            histogram = np.bincount(byte_view[batch, :, byte_idx], minlength=256)
+            counts[batch, 8 * byte_idx:8 * byte_idx + 8] = histogram @ _BYTE_BITS
+    return counts.reshape(-1)[:num_replicas]
+
+
+class LifeEnsemble:
+    """
+    num_replicas sopas independientes con la misma regla, avanzadas a la vez
+    """
+
+    def __init__(self, width: int, height: int, num_replicas: int = WORD_BITS, survive: int = 2, birth: int = 3):
+        self.width = width
+        self.height = height
+        self.num_replicas = num_replicas
+        self.num_batches = (num_replicas + WORD_BITS - 1) // WORD_BITS
+
+        self.survive_rule = survive
+        self.birth_rule = birth
+
+        self.iteration_count = 0
+        self.alive = np.zeros((self.num_batches, height, width), dtype=np.uint64)
+
+        # Mascara de las replicas que existen (el ultimo lote puede estar incompleto)
+        replica_mask = np.full(self.num_batches, np.iinfo(np.uint64).max, dtype=np.uint64)
+        if num_replicas % WORD_BITS:
+            replica_mask[-1] = np.uint64((1 << (num_replicas % WORD_BITS)) - 1)
+        self._replica_mask = replica_mask[:, None, None]
+
+    def randomize(self, density: float, rng: np.random.Generator = None):
+        """
+        Cada replica empieza con una sopa aleatoria distinta de la densidad dada
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_cells(rng.random((self.num_replicas, self.height, self.width)) < density)
+
+    def set_cells(self, cells: np.ndarray):
+        """
+        Carga los estados booleanos (replicas, alto, ancho)
+        """
+        cells = np.asarray(cells, dtype=bool)
+        if cells.shape != (self.num_replicas, self.height, self.width):
+            raise ValueError(f"El estado tiene forma {cells.shape}, se esperaba "
+                             f"{(self.num_replicas, self.height, self.width)}")
+        self.alive = pack_replicas(cells)
+        self.iteration_count = 0
+
+    def get_cells(self) -> np.ndarray:
+        return unpack_replicas(self.alive, self.num_replicas)
+
+    def live_counts(self) -> np.ndarray:
+        """
+        Numero de celdas vivas de cada replica
+        """
+        return replica_popcounts(self.alive, self.num_replicas)
+
+    def step(self):
+        """
+        Avanza una generacion todas las replicas
+        """
+        survive_mask, birth_mask = rule_masks(self.survive_rule, self.birth_rule)
+        alive = self.alive
+
+        up = np.roll(alive, 1, axis=-2)
+        down = np.roll(alive, -1, axis=-2)
+        neighbours = (
+            np.roll(up, 1, axis=-1), up, np.roll(up, -1, axis=-1),
+            np.roll(alive, 1, axis=-1), np.roll(alive, -1, axis=-1),
+            np.roll(down, 1, axis=-1), down, np.roll(down, -1, axis=-1),
+        )
+        count_bits = count_neighbour_bits(neighbours)
+
+        survive = match_count_mask(count_bits, survive_mask)
+        birth = match_count_mask(count_bits, birth_mask)
+
+        self.alive = ((alive & survive) | (~alive & birth)) & self._replica_mask
+        self.iteration_count += 1
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps generaciones y devuelve las celdas vivas (pasos, replicas) tras cada una
+        """
+        counts = np.empty((n_steps, self.num_replicas), dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            counts[step] = self.live_counts()
+        return counts
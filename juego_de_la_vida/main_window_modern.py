@@ -1,7 +1,15 @@
+import time
 from PySide6 import QtWidgets, QtCore, QtGui
 from grid_widget_modern import GridWidget
 from config_modern import Config
 from config_tab import ConfigTab
+from pattern_io import PATTERN_EXTENSIONS
+from trajectory import TRAJECTORY_EXTENSION
+
+# Limites del modo rendimiento (generaciones por frame mostrado)
+MAX_STEPS_PER_FRAME = 4096
+# Margen sobre el intervalo objetivo antes de reducir las generaciones por frame
+FRAME_TIME_TOLERANCE = 1.25
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, config: Config):
@@ -48,15 +56,34 @@ class MainWindow(QtWidgets.QMainWindow):
         self.timer_button.setCheckable(True)
         self.timer_button.clicked.connect(self.toggle_timer)
 
+        # Modo rendimiento: se avanzan varias generaciones por frame, tantas como
+        # quepan en el intervalo de la velocidad configurada (FPS objetivo)
+        self.throughput_button = QtWidgets.QPushButton("Modo rendimiento")
+        self.throughput_button.setCheckable(True)
+        self.throughput_button.toggled.connect(self.toggle_throughput_mode)
+        self.steps_per_frame = 1
+        self.last_frame_time = None
+
+        # Grabacion de la trayectoria y barra para volver a cualquier generacion grabada
+        self.record_button = QtWidgets.QPushButton("Grabar trayectoria")
+        self.record_button.setCheckable(True)
+        self.record_button.toggled.connect(self.toggle_recording)
+        self.time_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self.time_slider.setEnabled(False)
+        self.time_slider.valueChanged.connect(self.seek_generation)
+
         self.layout = QtWidgets.QVBoxLayout(container)
         self.layout.addWidget(self.grid_widget)
         self.layout.addWidget(self.next_button)
         self.layout.addWidget(self.timer_button)
+        self.layout.addWidget(self.throughput_button)
+        self.layout.addWidget(self.record_button)
+        self.layout.addWidget(self.time_slider)
         self.layout.addWidget(self.restart_button)
 
         self.timer = QtCore.QTimer()
         self.timer.setInterval(1000/self.config.speed) # Intervalo entre frames en ms
-        self.timer.timeout.connect(self.grid_widget.next_generation)
+        self.timer.timeout.connect(self.advance_frame)
         self.connect_signals()
 
     def connect_signals(self):
@@ -73,7 +100,90 @@ class MainWindow(QtWidgets.QMainWindow):
         self.restart_button.clicked.connect(self.grid_widget.restart_grid)
         self.timer_button.clicked.connect(self.toggle_timer)
         self.timer.setInterval(1000/self.config.speed) # Intervalo entre frames en ms
-        self.timer.timeout.connect(self.grid_widget.next_generation)
+        self.timer.timeout.connect(self.advance_frame)
+        self.steps_per_frame = 1
+        self.last_frame_time = None
+
+        # El widget nuevo no esta grabando
+        self.grid_widget.recording_changed.connect(self.update_time_slider)
+        self.record_button.setChecked(False)
+
+    @QtCore.Slot()
+    def advance_frame(self):
+        """
+        Avanza la simulacion en cada tick del temporizador. En modo rendimiento
+        se ajusta el numero de generaciones por frame para mantener los FPS objetivo
+        """
+        if not self.throughput_button.isChecked():
+            self.grid_widget.next_generation()
+            return
+
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            # El tiempo entre ticks incluye el render y el pintado del frame anterior
+            frame_time = now - self.last_frame_time
+            target_time = 1.0 / self.config.speed
+            if frame_time > target_time * FRAME_TIME_TOLERANCE:
+                self.steps_per_frame = max(1, int(self.steps_per_frame * target_time / frame_time))
+            else:
+                # Hay margen: subir poco a poco para no pasarse del intervalo
+                self.steps_per_frame = min(MAX_STEPS_PER_FRAME, self.steps_per_frame + self.steps_per_frame // 4 + 1)
+        self.last_frame_time = now
+
+        self.grid_widget.next_generations(self.steps_per_frame)
+        self.statusBar().showMessage(f"{self.steps_per_frame} generaciones por frame")
+
+    @QtCore.Slot(bool)
+    def toggle_throughput_mode(self, enabled):
+        """
+        Activa/desactiva el modo rendimiento, empezando siempre con una generacion por frame
+        """
+        self.steps_per_frame = 1
+        self.last_frame_time = None
+        if not enabled:
+            self.statusBar().clearMessage()
+
+    @QtCore.Slot(bool)
+    def toggle_recording(self, enabled):
+        """
+        Empieza o para la grabacion de la trayectoria
+        """
+        if not enabled:
+            self.grid_widget.stop_recording()
+            self.time_slider.setEnabled(False)
+            return
+
+        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(self,
+                        "Grabar trayectoria",
+                        "",
+                        f"Trayectoria (*{TRAJECTORY_EXTENSION});;Todos los archivos (*)")
+        if not file_path:
+            self.record_button.setChecked(False)
+            return
+        self.grid_widget.start_recording(file_path)
+        self.time_slider.setEnabled(self.grid_widget.recorder is not None)
+
+    @QtCore.Slot(int, int)
+    def update_time_slider(self, generation, num_generations):
+        """
+        Sigue la generacion mostrada sin volver a lanzar seek_generation
+        """
+        self.time_slider.blockSignals(True)
+        self.time_slider.setRange(0, max(0, num_generations - 1))
+        self.time_slider.setValue(generation)
+        self.time_slider.blockSignals(False)
+
+    @QtCore.Slot(int)
+    def seek_generation(self, generation):
+        """
+        Muestra una generacion grabada (al mover la barra se para la animacion)
+        """
+        if self.timer.isActive():
+            self.timer.stop()
+            self.timer_button.setChecked(False)
+            self.timer_button.setText("Iniciar animación")
+            self.grid_widget.flush_csv_buffer()
+        self.grid_widget.seek_generation(generation)
 
     @QtCore.Slot()
     def reconfigure_simulation(self):
@@ -109,11 +219,14 @@ class MainWindow(QtWidgets.QMainWindow):
         Funcion para iniciar/detener la animacion
         """
         if self.timer_button.isChecked():
+            self.last_frame_time = None
             self.timer.start()
             self.timer_button.setText("Detener animación")
         else:
             self.timer.stop()
             self.timer_button.setText("Iniciar animación")
+            # Al parar se escriben los recuentos que quedan en el buffer circular de la GPU
+            self.grid_widget.flush_csv_buffer()
 
     @QtCore.Slot()
     def save_texture(self):
@@ -124,10 +237,14 @@ class MainWindow(QtWidgets.QMainWindow):
         file_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 
                         "Guardar patrón", 
                         "", 
-                        "Imagen PNG (*.png);;Imagen BMP (*.bmp);;Imagen JPEG (*.jpg *.jpeg);;Todos los archivos (*)")
+                        "Imagen PNG (*.png);;Imagen BMP (*.bmp);;Imagen JPEG (*.jpg *.jpeg);;"
+                        "Patrón RLE (*.rle);;Macrocell (*.mc);;Todos los archivos (*)")
 
         if file_path:
-            self.grid_widget.save_pattern(file_path)
+            if file_path.lower().endswith(PATTERN_EXTENSIONS):
+                self.grid_widget.export_life_pattern(file_path)
+            else:
+                self.grid_widget.save_pattern(file_path)
 
     @QtCore.Slot()
     def import_texture(self):
@@ -138,7 +255,12 @@ class MainWindow(QtWidgets.QMainWindow):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, 
                         "Importar patrón", 
                         "", 
-                        "Imagen PNG (*.png);;Imagen BMP (*.bmp);;Imagen JPEG (*.jpg *.jpeg);;Todos los archivos (*)")
+                        "Imagen PNG (*.png);;Imagen BMP (*.bmp);;Imagen JPEG (*.jpg *.jpeg);;"
+                        "Patrón RLE o macrocell (*.rle *.mc);;Todos los archivos (*)")
 
         if file_path:
-            self.grid_widget.import_pattern(file_path)
\ No newline at end of file
+            if file_path.lower().endswith(PATTERN_EXTENSIONS):
+                # Sin reescalar, centrado en el grid
+                self.grid_widget.import_life_pattern(file_path)
+            else:
+                self.grid_widget.import_pattern(file_path)
\ No newline at end of file
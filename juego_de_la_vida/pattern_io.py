@@ -0,0 +1,279 @@
+"""
+Lectura y escritura de patrones en los formatos estandar del Juego de la Vida.
+
+    - RLE (.rle): el formato de Golly/LifeWiki, con cabecera 'x = ..., y = ..., rule = B3/S23'
+      y las filas codificadas por longitud de rachas ('b' muerta, 'o' viva, '$' fin de fila).
+    - Macrocell (.mc): el quadtree de HashLife con los nodos compartidos, sirve para
+      patrones enormes que en RLE ocuparian demasiado.
+
+Los patrones se devuelven como matrices booleanas (alto, ancho) con la fila 0 arriba,
+sin reescalar. Las lecturas se guardan en cache (ruta y fecha de modificacion), asi
+que volver a cargar una coleccion de patrones no vuelve a leer los archivos.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+RLE_LINE_LENGTH = 70 # Longitud maxima de las lineas al escribir RLE
+PATTERN_EXTENSIONS = ('.rle', '.mc')
+
+_RLE_HEADER = re.compile(r'^\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?', re.IGNORECASE)
+_RLE_TOKEN = re.compile(r'(\d*)([^\d\s])')
+_LEAF_SIZE = 8 # Los nodos hoja del formato macrocell son de 8x8
+
+
+def rule_string(survive: int, birth: int) -> str:
+    """
+    Regla del shader en notacion B/S (se sobrevive con survive o con birth vecinos)
+    """
+    survive_counts = ''.join(str(n) for n in sorted({survive, birth}))
+    return f"B{birth}/S{survive_counts}"
+
+
+def parse_rule(rule: str):
+    """
+    Convierte una regla B/S (o S/B) en (survive, birth) del shader. Devuelve None si
+    la regla no se puede expresar con un solo numero de nacimiento y uno de supervivencia
+    """
+    rule = rule.strip().upper()
+    match = re.fullmatch(r'B(\d*)/S(\d*)', rule) or re.fullmatch(r'S(\d*)/B(\d*)', rule)
+    if match is None:
+        match = re.fullmatch(r'(\d*)/(\d*)', rule) # Notacion antigua S/B
+        if match is None:
+            return None
+        survive_digits, birth_digits = match.groups()
+    elif rule.startswith('B'):
+        birth_digits, survive_digits = match.groups()
+    else:
+        survive_digits, birth_digits = match.groups()
+
+    births = {int(d) for d in birth_digits}
+    survives = {int(d) for d in survive_digits}
+    if len(births) != 1:
+        return None
+    birth = births.pop()
+    # En el shader siempre se sobrevive con birth vecinos, y como mucho con otro numero mas
+    others = survives - {birth}
+    if birth not in survives or len(others) > 1:
+        return None
+    survive = others.pop() if others else birth
+    return survive, birth
+
+
+def parse_rle(text: str):
+    """
+    Devuelve (celdas, regla) de un texto RLE. La regla es el texto de la cabecera o None
+    """
+    width = height = 0
+    rule = None
+    body = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        header = _RLE_HEADER.match(stripped)
+        if header and not body:
+            width, height = int(header.group(1)), int(header.group(2))
+            rule = header.group(3)
+            continue
+        body.append(stripped)
+        if '!' in stripped:
+            break
+
+    # Rachas de celdas vivas: (fila, columna inicial, longitud)
+    run_rows, run_cols, run_lengths = [], [], []
+    row = col = 0
+    for count, tag in _RLE_TOKEN.findall(''.join(body)):
+        n = int(count) if count else 1
+        if tag == '!':
+            break
+        if tag == '$':
+            row += n
+            col = 0
+        elif tag in 'b.':
+            col += n
+        else: # 'o' o cualquier estado distinto de 0 de los formatos multiestado
+            run_rows.append(row)
+            run_cols.append(col)
+            run_lengths.append(n)
+            col += n
+
+    run_rows = np.array(run_rows, dtype=np.int64)
+    run_cols = np.array(run_cols, dtype=np.int64)
+    run_lengths = np.array(run_lengths, dtype=np.int64)
+    if len(run_lengths):
+        width = max(width, int((run_cols + run_lengths).max()))
+        height = max(height, int(run_rows.max()) + 1)
+
+    cells = np.zeros((height, width), dtype=bool)
+    if len(run_lengths):
+        # Expandir las rachas sin bucles: cada celda es el inicio de su racha mas su posicion en ella
+        starts = np.cumsum(run_lengths) - run_lengths
+        position = np.arange(run_lengths.sum()) - np.repeat(starts, run_lengths)
+        cells[np.repeat(run_rows, run_lengths), np.repeat(run_cols, run_lengths) + position] = True
+    return cells, rule
+
+
+def format_rle(cells: np.ndarray, rule: str = None) -> str:
+    """
+    Codifica una matriz booleana (alto, ancho) en RLE
+    """
+    cells = np.asarray(cells, dtype=bool)
+    height, width = cells.shape
+    header = f"x = {width}, y = {height}" + (f", rule = {rule}" if rule else "")
+
+    tokens = []
+    pending_rows = 0 # Filas terminadas que aun no se han escrito ('$')
+    for row in cells:
+        # Limites de las rachas de la fila
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False])).astype(np.int8)))
+        if len(edges) == 0:
+            pending_rows += 1
+            continue
+        if pending_rows:
+            # Fin de la fila anterior mas las filas vacias (tambien las de arriba del todo)
+            tokens.append(f"{pending_rows if pending_rows > 1 else ''}$")
+        pending_rows = 1
+        col = 0
+        for start, end in zip(edges[0::2], edges[1::2]):
+            if start > col:
+                tokens.append(f"{start - col if start - col > 1 else ''}b")
+            tokens.append(f"{end - start if end - start > 1 else ''}o")
+            col = end
+    tokens.append('!')
+
+    lines, current = [], ''
+    for token in tokens:
+        if len(current) + len(token) > RLE_LINE_LENGTH:
+            lines.append(current)
+            current = ''
+        current += token
+    lines.append(current)
+    return header + '\n' + '\n'.join(lines) + '\n'
+
+
+def parse_macrocell(text: str):
+    """
+    Devuelve (celdas, regla) de un texto macrocell, recortado a las celdas vivas
+    """
+    rule = None
+    nodes = [np.zeros((0, 2), dtype=np.int64)] # Celdas vivas de cada nodo, el 0 es el nodo vacio
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('['):
+            continue
+        if line.startswith('#'):
+            if line[:2].upper() == '#R':
+                rule = line[2:].strip()
+            continue
+
+        if line[0] in '.*$':
+            # Hoja de 8x8: filas de '.' y '*' separadas por '$'
+            coords = [(row, col) for row, row_text in enumerate(line.split('$'))
+                      for col, char in enumerate(row_text) if char == '*']
+            nodes.append(np.array(coords, dtype=np.int64).reshape(-1, 2))
+            continue
+
+        level, nw, ne, sw, se = (int(value) for value in line.split()[:5])
+        half = 1 << (level - 1)
+        nodes.append(np.concatenate((nodes[nw], nodes[ne] + (0, half),
+                                     nodes[sw] + (half, 0), nodes[se] + (half, half))))
+
+    coords = nodes[-1]
+    if len(coords) == 0:
+        return np.zeros((0, 0), dtype=bool), rule
+    coords = coords - coords.min(axis=0)
+    cells = np.zeros(tuple(coords.max(axis=0) + 1), dtype=bool)
+    cells[coords[:, 0], coords[:, 1]] = True
+    return cells, rule
+
+
+def format_macrocell(cells: np.ndarray, rule: str = None) -> str:
+    """
+    Codifica una matriz booleana (alto, ancho) en macrocell, compartiendo los nodos repetidos
+    """
+    cells = np.asarray(cells, dtype=bool)
+    size = _LEAF_SIZE
+    while size < max(cells.shape + (1,)):
+        size *= 2
+    padded = np.zeros((size, size), dtype=bool)
+    padded[:cells.shape[0], :cells.shape[1]] = cells
+
+    lines = ["[M2] (juego_de_la_vida)"]
+    if rule:
+        lines.append(f"#R {rule}")
+    table = {} # Contenido del nodo -> indice (empezando en 1)
+
+    def add_node(key, line):
+        index = table.get(key)
+        if index is None:
+            lines.append(line)
+            index = table[key] = len(table) + 1
+        return index
+
+    # Hojas de 8x8
+    num_leaves = size // _LEAF_SIZE
+    blocks = padded.reshape(num_leaves, _LEAF_SIZE, num_leaves, _LEAF_SIZE).transpose(0, 2, 1, 3)
+    ids = np.zeros((num_leaves, num_leaves), dtype=np.int64)
+    for by, bx in zip(*np.nonzero(blocks.any(axis=(2, 3)))):
+        block = blocks[by, bx]
+        rows = [''.join('*' if cell else '.' for cell in row).rstrip('.') for row in block]
+        leaf = '$'.join(rows).rstrip('$') + '$'
+        ids[by, bx] = add_node(leaf, leaf)
+
+    level = 3
+    while ids.shape[0] > 1:
+        level += 1
+        parents = np.zeros((ids.shape[0] // 2, ids.shape[1] // 2), dtype=np.int64)
+        for py, px in zip(*np.nonzero(ids.reshape(parents.shape[0], 2, parents.shape[1], 2).any(axis=(1, 3)))):
+            children = (ids[2 * py, 2 * px], ids[2 * py, 2 * px + 1], ids[2 * py + 1, 2 * px], ids[2 * py + 1, 2 * px + 1])
+            parents[py, px] = add_node((level,) + tuple(int(c) for c in children),
+                                       f"{level} {' '.join(str(c) for c in children)}")
+        ids = parents
+
+    if not table:
+        lines.append('$') # Patron vacio: una hoja sin celdas
+    return '\n'.join(lines) + '\n'
+
+
+@lru_cache(maxsize=4096)
+def _read_pattern_cached(file_path: str, mtime: float):
+    with open(file_path, 'r') as f:
+        text = f.read()
+    if file_path.lower().endswith('.mc'):
+        cells, rule = parse_macrocell(text)
+    else:
+        cells, rule = parse_rle(text)
+    cells.flags.writeable = False # Se comparte entre llamadas
+    return cells, rule
+
+
+def read_pattern(file_path: str):
+    """
+    Lee un patron .rle o .mc y devuelve (celdas, regla). Las celdas son de solo lectura
+    """
+    file_path = os.path.abspath(file_path)
+    return _read_pattern_cached(file_path, os.path.getmtime(file_path))
+
+
+def write_pattern(file_path: str, cells: np.ndarray, rule: str = None):
+    """
+    Escribe un patron, en macrocell si la extension es .mc y si no en RLE
+    """
+    text = format_macrocell(cells, rule) if file_path.lower().endswith('.mc') else format_rle(cells, rule)
+    with open(file_path, 'w') as f:
+        f.write(text)
+
+
+def load_pattern_collection(folder_path: str) -> dict:
+    """
+    Lee todos los patrones de una carpeta: {nombre del archivo: (celdas, regla)}
+    """
+    patterns = {}
+    for filename in sorted(os.listdir(folder_path)):
+        if filename.lower().endswith(PATTERN_EXTENSIONS):
+            patterns[filename] = read_pattern(os.path.join(folder_path, filename))
+    return patterns
@@ -0,0 +1,31 @@
+import numpy as np
+
+from pattern_io import format_rle, parse_rle
+
+
+def test_rle_round_trip():
+    """
+    Comprueba que format_rle y parse_rle dejan el patron donde estaba, tambien con
+    filas y columnas vacias al principio y al final
+    """
+    grid = np.zeros((4, 3), dtype=bool)
+    grid[2, 1] = True
+    text = format_rle(grid)
+    assert text == "x = 3, y = 4\n2$bo!\n", text
+
+    rng = np.random.default_rng(0)
+    grids = [grid, np.zeros((5, 4), dtype=bool), np.ones((3, 3), dtype=bool)]
+    for _ in range(200):
+        cells = rng.random(tuple(rng.integers(1, 12, size=2))) < rng.random()
+        cells[:rng.integers(0, cells.shape[0] + 1)] = False # Filas vacias arriba
+        grids.append(cells)
+
+    for cells in grids:
+        parsed, _ = parse_rle(format_rle(cells))
+        assert parsed.shape == cells.shape, (parsed.shape, cells.shape)
+        assert (parsed == cells).all(), format_rle(cells)
+    print(f"RLE: {len(grids)} patrones leidos igual que se escribieron")
+
+
+if __name__ == "__main__":
+    test_rle_round_trip()
@@ -0,0 +1,243 @@
+"""
+Indice de una carpeta de resultados de experimentos.
+
+graphs.py y 3d_graphs.py buscaban los archivos de cada regla y densidad con una
+expresion regular sobre os.listdir (una vez por punto) y leian cada CSV entero con
+pandas para quedarse con las ultimas filas. Con miles de simulaciones casi todo el
+tiempo se iba en eso.
+
+ResultsIndex recorre la carpeta una sola vez, saca los parametros del nombre de
+cada archivo y guarda en un manifiesto (MANIFEST_NAME, JSON dentro de la misma
+carpeta) los parametros y las ultimas TAIL_ROWS filas de cada resultado. Cada
+entrada guarda tambien la fecha de modificacion y el tamaño del archivo: al abrir
+el indice solo se vuelven a leer los archivos nuevos o que han cambiado, y para
+leerlos se usa read_tail, que lee solo el final del archivo.
+"""
+
+import io
+import json
+import os
+import re
+
+import numpy as np
+
+from series_store import SERIES_EXTENSION, read_series
+
+MANIFEST_NAME = '.gol_index.json'
+_MANIFEST_VERSION = 1
+TAIL_ROWS = 100 # Filas finales que se guardan en el manifiesto (las que promedian las superficies 3D)
+TAIL_BLOCK_SIZE = 65536 # Bytes que se leen de cada vez desde el final de un CSV
+
+KIND_SERIES = 'series' # Celdas vivas por iteracion (CSV de GridWidget o serie binaria)
+KIND_CENSUS = 'census' # Tabla de objetos (_census.csv)
+KIND_DAMAGE = 'damage' # Curva de propagacion de daño (_damage.csv)
+
+# Columna cuyo final se guarda en el manifiesto para cada tipo de resultado
+TAIL_COLUMNS = {KIND_SERIES: 'Live Cells', KIND_DAMAGE: 'Mean Distance'}
+
+FILENAME_PATTERN = re.compile(
+    r'GoL_size(\d+)x(\d+)_density(\d+)_survive(\d+)_birth(\d+)(?:_run(\d+))?(?:_(census|damage))?\.(csv|gol)$')
+
+
+def parse_result_filename(filename):
+    """
+    Parametros de un resultado a partir de su nombre, o None si no es un resultado
+    """
+    match = FILENAME_PATTERN.match(filename)
+    if not match:
+        return None
+    width, height, density, survive, birth, run, kind, extension = match.groups()
+    if kind is not None and extension != 'csv':
+        return None
+    return {'width': int(width), 'height': int(height), 'density': int(density),
+            'survive': int(survive), 'birth': int(birth),
+            'run': None if run is None else int(run), 'kind': kind or KIND_SERIES}
+
+
+def read_tail(file_path, num_rows, column='Live Cells'):
+    """
+    Ultimas num_rows filas de una columna de un CSV o de las celdas vivas de una
+    serie binaria, sin leer el resto del archivo
+    """
+    if str(file_path).endswith(SERIES_EXTENSION):
+        counts = read_series(file_path).counts
+        return np.array(counts[max(0, len(counts) - num_rows):])
+
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        columns = header.decode().strip().split(',')
+        if column not in columns:
+            raise ValueError(f"{file_path} no tiene la columna '{column}'")
+        data_start = f.tell()
+
+        # Leer bloques desde el final hasta tener num_rows lineas completas
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > data_start and data.rstrip(b'\r\n').count(b'\n') < num_rows:
+            block_size = min(TAIL_BLOCK_SIZE, position - data_start)
+            position -= block_size
+            f.seek(position)
+            data = f.read(block_size) + data
+
+    lines = data.rstrip(b'\r\n').split(b'\n')
+    if position > data_start:
+        lines = lines[1:] # La primera linea puede estar cortada
+    lines = [line for line in lines[-num_rows:] if line.strip()]
+    if not lines:
+        return np.empty(0)
+    table = np.loadtxt(io.BytesIO(b'\n'.join(lines)), delimiter=',', ndmin=2,
+                       usecols=columns.index(column))
+    return table.ravel()
+
+
+class ResultEntry:
+    """
+    Un archivo de resultados de la carpeta con los parametros de su nombre y sus ultimas filas
+    """
+
+    def __init__(self, path, width, height, density, survive, birth, run, kind, tail=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.density = density # Densidad inicial en porcentaje, como en el nombre del archivo
+        self.survive = survive
+        self.birth = birth
+        self.run = run
+        self.kind = kind
+        self.tail = tail # Ultimas TAIL_ROWS filas de TAIL_COLUMNS[kind] (None si no se guardan)
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def total_cells(self) -> int:
+        return self.width * self.height
+
+
+class ResultsIndex:
+    """
+    Resultados de una carpeta agrupados por parametros. Se guarda en el manifiesto al
+    abrirlo si algo ha cambiado desde la ultima vez
+    """
+
+    def __init__(self, folder_path, tail_rows=TAIL_ROWS, save=True):
+        self.folder_path = folder_path
+        self.tail_rows = tail_rows
+        self.save_manifest = save
+        self.entries = {} # Nombre del archivo -> ResultEntry
+        self._stats = {} # Nombre del archivo -> [mtime_ns, tamaño]
+        self._load_manifest()
+        self.refresh()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder_path, MANIFEST_NAME)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error al leer el indice {self.manifest_path}, se vuelve a generar: {e}")
+            return
+        if manifest.get('version') != _MANIFEST_VERSION or manifest.get('tail_rows') != self.tail_rows:
+            return
+
+        for filename, item in manifest['files'].items():
+            tail = item['tail']
+            self.entries[filename] = ResultEntry(
+                os.path.join(self.folder_path, filename), item['width'], item['height'], item['density'],
+                item['survive'], item['birth'], item['run'], item['kind'],
+                None if tail is None else np.asarray(tail))
+            self._stats[filename] = item['stat']
+
+    def refresh(self) -> int:
+        """
+        Recorre la carpeta y vuelve a leer solo los archivos nuevos o modificados.
+        Devuelve cuantas entradas han cambiado
+        """
+        changed = 0
+        present = set()
+        with os.scandir(self.folder_path) as it:
+            for dir_entry in it:
+                params = parse_result_filename(dir_entry.name)
+                if params is None or not dir_entry.is_file():
+                    continue
+                present.add(dir_entry.name)
+                stat = dir_entry.stat()
+                file_stat = [stat.st_mtime_ns, stat.st_size]
+                if self._stats.get(dir_entry.name) == file_stat:
+                    continue
+
+                tail = None
+                column = TAIL_COLUMNS.get(params['kind'])
+                if column is not None:
+                    try:
+                        tail = read_tail(dir_entry.path, self.tail_rows, column)
+                    except Exception as e:
+                        print(f"Error al leer {dir_entry.name}: {e}")
+                self.entries[dir_entry.name] = ResultEntry(dir_entry.path, tail=tail, **params)
+                self._stats[dir_entry.name] = file_stat
+                changed += 1
+
+        for filename in set(self.entries) - present:
+            del self.entries[filename]
+            del self._stats[filename]
+            changed += 1
+
+        if changed and self.save_manifest:
+            self.save()
+        return changed
+
+    def save(self):
+        """
+        Escribe el manifiesto (en un temporal que luego se renombra)
+        """
+        files = {}
+        for filename, entry in self.entries.items():
+            files[filename] = {'width': entry.width, 'height': entry.height, 'density': entry.density,
+                               'survive': entry.survive, 'birth': entry.birth, 'run': entry.run,
+                               'kind': entry.kind, 'stat': self._stats[filename],
+                               'tail': None if entry.tail is None else entry.tail.tolist()}
+        temp_path = f"{self.manifest_path}.tmp{os.getpid()}"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'version': _MANIFEST_VERSION, 'tail_rows': self.tail_rows, 'files': files}, f)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            # Sin permisos de escritura el indice sigue sirviendo, solo que no se reutiliza
+            print(f"No se pudo guardar el indice {self.manifest_path}: {e}")
+
+    def find(self, kind=KIND_SERIES, **params):
+        """
+        Entradas del tipo dado cuyos parametros coinciden (density en porcentaje),
+        ordenadas por nombre. Por ejemplo find(density=30, survive=2, birth=3)
+        """
+        return [self.entries[filename] for filename in sorted(self.entries)
+                if self.entries[filename].kind == kind
+                and all(getattr(self.entries[filename], name) == value for name, value in params.items())]
+
+    def group_by_rule(self, kind=KIND_SERIES, **params):
+        """
+        Entradas agrupadas por (width, height, survive, birth) en un dict (las replicas
+        _run{i} van juntas, las de distinto tamaño de grid no)
+        """
+        groups = {}
+        for entry in self.find(kind, **params):
+            groups.setdefault((entry.width, entry.height, entry.survive, entry.birth), []).append(entry)
+        return groups
+
+    def densities(self, kind=KIND_SERIES):
+        return sorted({entry.density for entry in self.entries.values() if entry.kind == kind})
+
+    def tail(self, entry, num_rows=TAIL_ROWS) -> np.ndarray:
+        """
+        Ultimas num_rows filas de una entrada: del manifiesto si caben, si no del archivo
+        """
+        if entry.tail is not None and num_rows <= self.tail_rows:
+            return entry.tail[max(0, len(entry.tail) - num_rows):]
+        return read_tail(entry.path, num_rows, TAIL_COLUMNS[entry.kind])
@@ -0,0 +1,182 @@
+"""
+Evaluacion de muchas reglas survive/birth del Juego de la Vida en una sola pasada de GPU.
+
+Todas las reglas se colocan en un atlas: una textura dividida en casillas del
+mismo tamaño, cada una con su propio grid y su regla (mascaras de 9 bits en
+una textura de reglas). Un solo render avanza todas las reglas y dos pasadas de
+suma por bloques dan la poblacion de cada casilla, asi que solo se leen unos
+pocos bytes por paso.
+
+Usa un contexto de ModernGL sin ventana, no necesita Qt ni pantalla.
+"""
+
+import numpy as np
+import moderngl
+
+from bit_life import rule_masks
+from gl_utils import load_shader_source
+
+
+def create_headless_context() -> moderngl.Context:
+    """
+    Crea un contexto de OpenGL sin ventana. Si no hay servidor X se intenta con EGL.
+    """
+    try:
+        return moderngl.create_standalone_context(require=330)
+    except Exception:
+        return moderngl.create_standalone_context(require=330, backend='egl')
+
+
+class RuleSpaceSimulator:
+    """
+    Avanza a la vez un grid de tile_width x tile_height por cada regla (survive, birth)
+    """
+
+    def __init__(self, tile_width: int, tile_height: int, rules, ctx: moderngl.Context = None):
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.rules = list(rules)
+        self.num_rules = len(self.rules)
+
+        # Colocar las casillas en un atlas lo mas cuadrado posible
+        self.tiles_x = int(np.ceil(np.sqrt(self.num_rules)))
+        self.tiles_y = int(np.ceil(self.num_rules / self.tiles_x))
+        self.atlas_size = (self.tiles_x * tile_width, self.tiles_y * tile_height)
+
+        self.iteration_count = 0
+
+        self._owns_ctx = ctx is None
+        self.ctx = create_headless_context() if ctx is None else ctx
+
+        vertex_source = load_shader_source("shaders_modern/vertex.glsl")
+        self.life_program = self.ctx.program(vertex_shader=vertex_source,
+                                             fragment_shader=load_shader_source("shaders_modern/life_game_rules.glsl"))
+        self.sum_program = self.ctx.program(vertex_shader=vertex_source,
+                                            fragment_shader=load_shader_source("shaders_modern/tile_sum.glsl"))
+
+        vertices = np.array([-1, -1, 1, -1, 1, 1, -1, 1], dtype='f4')
+        indices = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
+        self.vbo = self.ctx.buffer(vertices)
+        self.ebo = self.ctx.buffer(indices)
+        self.life_vao = self.ctx.vertex_array(self.life_program, [(self.vbo, '2f', 'aPos')], index_buffer=self.ebo)
+        self.sum_vao = self.ctx.vertex_array(self.sum_program, [(self.vbo, '2f', 'aPos')], index_buffer=self.ebo)
+
+        # Texturas de estado (ping-pong)
+        self.textures = []
+        self.fbos = []
+        for _ in range(2):
+            tex = self.ctx.texture(self.atlas_size, 1, dtype='u1') # Un byte por celda, como en GridWidget
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+            self.textures.append(tex)
+            self.fbos.append(self.ctx.framebuffer(color_attachments=[tex]))
+        self.current_texture_idx = 0
+
+        # Mascaras de cada regla, las casillas sobrantes no tienen regla (todo muere)
+        masks = np.zeros((self.tiles_y * self.tiles_x, 2), dtype=np.uint32)
+        for idx, (survive, birth) in enumerate(self.rules):
+            masks[idx] = rule_masks(survive, birth)
+        self.rule_texture = self.ctx.texture((self.tiles_x, self.tiles_y), 2, data=masks.tobytes(), dtype='u4')
+        self.rule_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+        # Texturas para la suma: primero por filas de cada casilla y luego por columnas
+        self.row_sum_texture = self.ctx.texture((self.tiles_x, self.atlas_size[1]), 1, dtype='u4')
+        self.row_sum_fbo = self.ctx.framebuffer(color_attachments=[self.row_sum_texture])
+        self.tile_sum_texture = self.ctx.texture((self.tiles_x, self.tiles_y), 1, dtype='u4')
+        self.tile_sum_fbo = self.ctx.framebuffer(color_attachments=[self.tile_sum_texture])
+        for tex in (self.row_sum_texture, self.tile_sum_texture):
+            tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+    def set_cells(self, cells: np.ndarray):
+        """
+        Carga un estado booleano (reglas, alto, ancho), uno por regla
+        """
+        cells = np.asarray(cells, dtype=bool)
+        if cells.shape != (self.num_rules, self.tile_height, self.tile_width):
+            raise ValueError(f"El estado tiene forma {cells.shape}, se esperaba "
+                             f"{(self.num_rules, self.tile_height, self.tile_width)}")
+
+        atlas = np.zeros((self.tiles_y * self.tiles_x, self.tile_height, self.tile_width), dtype='u1')
+        atlas[:self.num_rules] = cells
+        # (casillas_y, casillas_x, alto, ancho) -> (casillas_y * alto, casillas_x * ancho)
+        atlas = atlas.reshape(self.tiles_y, self.tiles_x, self.tile_height, self.tile_width)
+        atlas = atlas.transpose(0, 2, 1, 3).reshape(self.atlas_size[1], self.atlas_size[0])
+
+        self.textures[self.current_texture_idx].write(np.ascontiguousarray(atlas).tobytes(), alignment=1)
+        self.iteration_count = 0
+
+    def randomize(self, density: float, rng: np.random.Generator = None):
+        """
+        Cada regla empieza con una sopa aleatoria distinta de la densidad dada
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        self.set_cells(rng.random((self.num_rules, self.tile_height, self.tile_width)) < density)
+
+    def step(self):
+        """
+        Avanza una generacion todas las reglas con un solo render
+        """
+        source_idx = self.current_texture_idx
+        dest_idx = 1 - source_idx
+
+        self.fbos[dest_idx].use()
+
+        self.textures[source_idx].use(location=0)
+        self.life_program['u_state_texture'].value = 0
+        self.rule_texture.use(location=1)
+        self.life_program['u_rule_texture'].value = 1
+        self.life_program['u_tile_size'].value = (self.tile_width, self.tile_height)
+
+        self.life_vao.render(moderngl.TRIANGLES)
+
+        self.current_texture_idx = dest_idx
+        self.iteration_count += 1
+
+    def live_counts(self) -> np.ndarray:
+        """
+        Numero de celdas vivas de cada regla, calculado en la GPU
+        """
+        # Suma de cada fila de cada casilla
+        self.row_sum_fbo.use()
+        self.textures[self.current_texture_idx].use(location=0)
+        self.sum_program['u_source_texture'].value = 0
+        self.sum_program['u_block'].value = (self.tile_width, 1)
+        self.sum_program['u_step'].value = (1, 0)
+        self.sum_program['u_length'].value = self.tile_width
+        self.sum_program['u_count_alive'].value = True
+        self.sum_vao.render(moderngl.TRIANGLES)
+
+        # Suma de las filas de cada casilla
+        self.tile_sum_fbo.use()
+        self.row_sum_texture.use(location=0)
+        self.sum_program['u_block'].value = (1, self.tile_height)
+        self.sum_program['u_step'].value = (0, 1)
+        self.sum_program['u_length'].value = self.tile_height
+        self.sum_program['u_count_alive'].value = False
+        self.sum_vao.render(moderngl.TRIANGLES)
+
+        counts = np.frombuffer(self.tile_sum_texture.read(alignment=1), dtype=np.uint32)
+        return counts[:self.num_rules].astype(np.int64)
+
+    def run(self, n_steps: int) -> np.ndarray:
+        """
+        Ejecuta n_steps generaciones y devuelve las celdas vivas (pasos, reglas) tras cada una
+        """
+        counts = np.empty((n_steps, self.num_rules), dtype=np.int64)
+        for step in range(n_steps):
+            self.step()
+            counts[step] = self.live_counts()
+        return counts
+
+    def release_resources(self):
+        for fbo in self.fbos + [self.row_sum_fbo, self.tile_sum_fbo]:
+            fbo.release()
+        for texture in self.textures + [self.rule_texture, self.row_sum_texture, self.tile_sum_texture]:
+            texture.release()
+        self.life_vao.release()
+        self.sum_vao.release()
+        self.life_program.release()
+        self.sum_program.release()
+        self.vbo.release()
+        self.ebo.release()
+        if self._owns_ctx:
+            self.ctx.release()
@@ -0,0 +1,247 @@
+"""
+Formato binario para las series de celdas vivas de los experimentos.
+
+En el CSV cada fila repite Height, Width, Density, Survive y Birth, y leer un
+barrido entero con pandas es casi todo parseo de texto. En este formato cada
+simulacion es un archivo con:
+
+    - Una cabecera fija de HEADER_SIZE bytes con los parametros del experimento.
+    - Las celdas vivas de cada iteracion como un array uint32 (uint64 si el grid
+      tiene 2^32 celdas o mas), empezando en first_iteration y de una en una.
+      Si las iteraciones no son seguidas (muestreo de HashLife) se guardan
+      registros (iteracion uint64, celdas vivas).
+
+La longitud de la serie sale del tamaño del archivo, asi que los datos se pueden
+ir añadiendo por bloques sin reescribir la cabecera, y para leerlos basta con un
+np.memmap, sin parsear nada.
+
+Al cerrar la serie se guarda en el relleno de la cabecera el indice donde empieza
+su tramo final estable (stability.py), calculado mientras se escribia, para que
+graphs.py no tenga que recorrer la serie para recortarla.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from stability import StableTailTracker
+
+SERIES_EXTENSION = '.gol'
+EXPERIMENT_EXTENSIONS = ('.csv', SERIES_EXTENSION) # Formatos que leen graphs.py y 3d_graphs.py
+SERIES_CHUNK_SIZE = 65536 # Valores que se guardan en memoria antes de escribirlos
+
+HEADER_SIZE = 64
+_MAGIC = b'GOLSERIE'
+_VERSION = 1
+# magic, version, bytes por valor, iteraciones explicitas, alto, ancho, densidad,
+# survive, birth, primera iteracion (el resto de la cabecera es relleno)
+_HEADER_FORMAT = '<8sHBBIIdBB6xQ'
+# Corte del tramo estable + 1, justo despues de los campos anteriores (0 si no se conoce,
+# por ejemplo si la escritura no llego a cerrarse)
+_STABLE_FORMAT = '<Q'
+_STABLE_OFFSET = struct.calcsize(_HEADER_FORMAT)
+
+
+def count_dtype(width: int, height: int) -> np.dtype:
+    """
+    Tipo mas pequeño en el que cabe el numero de celdas vivas del grid
+    """
+    return np.dtype('<u4') if width * height < 2 ** 32 else np.dtype('<u8')
+
+
+def _record_dtype(dtype: np.dtype) -> np.dtype:
+    return np.dtype([('iteration', '<u8'), ('count', dtype)])
+
+
+class LifeSeries:
+    """
+    Serie de celdas vivas de una simulacion con sus parametros.
+    counts e iterations son arrays de numpy (memmap de solo lectura si vienen de un .gol)
+    """
+
+    def __init__(self, height, width, density, survive, birth, iterations, counts, stable_cutoff=None):
+        self.height = height
+        self.width = width
+        self.density = density
+        self.survive = survive
+        self.birth = birth
+        self.iterations = iterations
+        self.counts = counts
+        self.stable_cutoff = stable_cutoff # Indice donde empieza el tramo final estable (None si no se conoce)
+
+    @property
+    def total_cells(self) -> int:
+        return self.width * self.height
+
+    def __len__(self):
+        return len(self.counts)
+
+    def to_dataframe(self):
+        """
+        DataFrame con las mismas columnas que los CSV de GridWidget
+        """
+        import pandas as pd
+        length = len(self.counts)
+        return pd.DataFrame({'Height': np.full(length, self.height), 'Width': np.full(length, self.width),
+                             'Density': np.full(length, self.density), 'Survive': np.full(length, self.survive),
+                             'Birth': np.full(length, self.birth), 'Iteration': self.iterations,
+                             'Live Cells': self.counts})
+
+
+class SeriesWriter:
+    """
+    Escribe una serie binaria por bloques. Los valores se acumulan en un array de
+    chunk_size elementos y se escriben al llenarse, en flush() o al cerrar.
+    Si explicit_iterations es False las iteraciones son first_iteration, first_iteration + 1, ...
+    """
+
+    def __init__(self, file_path, width, height, density, survive, birth,
+                 first_iteration=0, explicit_iterations=False, chunk_size=SERIES_CHUNK_SIZE):
+        self.file_path = file_path
+        self.explicit_iterations = explicit_iterations
+        self.dtype = count_dtype(width, height)
+        self.next_iteration = first_iteration
+        self.num_values = 0
+        self.total_cells = width * height
+        self.stability = StableTailTracker() # Sobre la proporcion de celdas vivas, como en graphs.py
+
+        if explicit_iterations:
+            self._buffer = np.empty(chunk_size, dtype=_record_dtype(self.dtype))
+        else:
+            self._buffer = np.empty(chunk_size, dtype=self.dtype)
+        self._buffered = 0
+
+        header = struct.pack(_HEADER_FORMAT, _MAGIC, _VERSION, self.dtype.itemsize, int(explicit_iterations),
+                             height, width, density, survive, birth, first_iteration)
+        self._file = open(file_path, 'wb')
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, count: int, iteration: int = None):
+        """
+        Añade el numero de celdas vivas de una iteracion
+        """
+        if self._buffered == len(self._buffer):
+            self.flush()
+        if self.explicit_iterations:
+            self._buffer[self._buffered] = (self.next_iteration if iteration is None else iteration, count)
+        else:
+            if iteration is not None and iteration != self.next_iteration:
+                raise ValueError(f"Se esperaba la iteracion {self.next_iteration} y ha llegado la {iteration}")
+            self._buffer[self._buffered] = count
+        self._buffered += 1
+        self.num_values += 1
+        self.stability.update(count / self.total_cells)
+        self.next_iteration = (self.next_iteration if iteration is None else iteration) + 1
+
+    def extend(self, counts, iterations=None):
+        """
+        Añade un array de celdas vivas de golpe (se escribe directamente sin pasar por el buffer)
+        """
+        counts = np.asarray(counts)
+        if len(counts) == 0:
+            return
+        if self.explicit_iterations:
+            if iterations is None:
+                iterations = np.arange(self.next_iteration, self.next_iteration + len(counts))
+            data = np.empty(len(counts), dtype=self._buffer.dtype)
+            data['iteration'] = iterations
+            data['count'] = counts
+            last_iteration = int(data['iteration'][-1])
+        else:
+            if iterations is not None and not np.array_equal(
+                    np.asarray(iterations), np.arange(self.next_iteration, self.next_iteration + len(counts))):
+                raise ValueError("Las iteraciones tienen que ser seguidas en una serie sin iteraciones explicitas")
+            data = counts.astype(self.dtype)
+            last_iteration = self.next_iteration + len(counts) - 1
+
+        self.flush()
+        self._file.write(data.tobytes())
+        self.num_values += len(counts)
+        self.stability.extend(counts / self.total_cells)
+        self.next_iteration = last_iteration + 1
+
+    def flush(self):
+        if self._buffered:
+            self._file.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.seek(_STABLE_OFFSET)
+            self._file.write(struct.pack(_STABLE_FORMAT, self.stability.cutoff_index + 1))
+            self._file.close()
+
+
+def write_series(file_path, width, height, density, survive, birth, counts, iterations=None):
+    """
+    Escribe una serie completa. Con iterations=None las iteraciones son 0, 1, 2, ...
+    """
+    first_iteration = 0
+    explicit = False
+    if iterations is not None:
+        iterations = np.asarray(iterations, dtype=np.int64)
+        first_iteration = int(iterations[0]) if len(iterations) else 0
+        explicit = not np.array_equal(iterations, np.arange(first_iteration, first_iteration + len(iterations)))
+
+    with SeriesWriter(file_path, width, height, density, survive, birth,
+                      first_iteration=first_iteration, explicit_iterations=explicit) as writer:
+        writer.extend(counts, iterations if explicit else None)
+
+
+def read_series(file_path) -> LifeSeries:
+    """
+    Abre una serie binaria. Los datos no se leen, se mapean en memoria (solo lectura)
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"{file_path} no es una serie del Juego de la Vida")
+
+    (_, version, itemsize, explicit, height, width, density,
+     survive, birth, first_iteration) = struct.unpack_from(_HEADER_FORMAT, header)
+    stable_cutoff = struct.unpack_from(_STABLE_FORMAT, header, _STABLE_OFFSET)[0] - 1
+    if version != _VERSION:
+        raise ValueError(f"Version {version} del formato no soportada")
+
+    dtype = np.dtype(f'<u{itemsize}')
+    if explicit:
+        dtype = _record_dtype(dtype)
+    # Si se corto la escritura a medias el ultimo valor puede estar incompleto, se ignora
+    length = (os.path.getsize(file_path) - HEADER_SIZE) // dtype.itemsize
+
+    if length == 0:
+        data = np.empty(0, dtype=dtype)
+    else:
+        data = np.memmap(file_path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(length,))
+
+    if explicit:
+        iterations, counts = data['iteration'], data['count']
+    else:
+        iterations, counts = np.arange(first_iteration, first_iteration + length), data
+    if stable_cutoff < 0 or stable_cutoff > length:
+        stable_cutoff = None
+    return LifeSeries(height, width, density, survive, birth, iterations, counts, stable_cutoff)
+
+
+def load_experiment(file_path) -> LifeSeries:
+    """
+    Lee un experimento guardado como serie binaria o como CSV de GridWidget
+    """
+    if str(file_path).endswith(SERIES_EXTENSION):
+        return read_series(file_path)
+
+    import pandas as pd
+    df = pd.read_csv(file_path)
+    first = df.iloc[0]
+    return LifeSeries(int(first['Height']), int(first['Width']), float(first['Density']),
+                      int(first['Survive']), int(first['Birth']),
+                      df['Iteration'].to_numpy(), df['Live Cells'].to_numpy())
@@ -0,0 +1,43 @@
+#version 330 core
+// Primera pasada de la reduccion: cuenta las celdas vivas de cada bloque
+// de u_block x u_block celdas y escribe el resultado como entero.
+// En g y b se suman dos pesos pseudoaleatorios de cada celda viva (modulo 2^32),
+// que juntos son un hash de 64 bits del estado para detectar ciclos
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_source_texture; // Textura del estado
+uniform ivec2 u_source_size; // Tamaño de la textura de entrada
+uniform int u_block; // Lado del bloque que suma cada fragmento
+uniform ivec2 u_output_offset; // Posicion de la salida (para escribir en el buffer circular)
+
+// Hash entero de 32 bits (lowbias32)
+uint hash_uint(uint x){
+    x ^= x >> 16;
+    x *= 0x7feb352du;
+    x ^= x >> 15;
+    x *= 0x846ca68bu;
+    x ^= x >> 16;
+    return x;
+}
+
+void main(){
+    ivec2 start = (ivec2(gl_FragCoord.xy) - u_output_offset) * u_block;
+
+    uint total = 0u;
+    uvec2 state_hash = uvec2(0u);
+    for (int y = 0; y < u_block; y++){
+        for (int x = 0; x < u_block; x++){
+            ivec2 coord = start + ivec2(x, y);
+            if (coord.x >= u_source_size.x || coord.y >= u_source_size.y){
+                continue; // Fuera de la textura (el ultimo bloque puede estar incompleto)
+            }
+            if (texelFetch(u_source_texture, coord, 0).r == 1u){ // Estado vivo
+                total += 1u;
+                uint weight = hash_uint(uint(coord.y * u_source_size.x + coord.x));
+                state_hash += uvec2(weight, hash_uint(weight ^ 0x9e3779b9u));
+            }
+        }
+    }
+    FragColor = uvec4(total, state_hash, 1u);
+}
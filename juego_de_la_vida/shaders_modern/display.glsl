@@ -2,7 +2,11 @@
 out vec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture; 
+// Estados de la celda, un entero por celda (textura R8UI)
+const uint STATE_ALIVE = 1u;
+const uint STATE_GHOST = 2u;
+
+uniform usampler2D u_state_texture; 
 uniform float u_zoom_level; 
 uniform vec2 u_view_offset;
 uniform vec2 u_grid_size;
@@ -16,10 +20,19 @@ void main()
         return;
     }
 
-    vec3 final_color = texture(u_state_texture, sample_coord).rgb;
-    
     // Calcular las coordenadas dentro de la celda para dibujar bordes
     vec2 grid_coord_float = sample_coord * u_grid_size;
+
+    ivec2 cell_coord = min(ivec2(grid_coord_float), ivec2(u_grid_size) - 1);
+    uint state = texelFetch(u_state_texture, cell_coord, 0).r;
+
+    vec3 final_color = vec3(0.0);
+    if (state == STATE_ALIVE){
+        final_color = vec3(1.0);
+    } else if (state == STATE_GHOST){
+        final_color = vec3(0.3); // Gris para las que han estado vivas
+    }
+
     vec2 inside_cell_coord = fract(grid_coord_float);
 
     // Estimar el tamaño de un pixel en coordenadas de celda
@@ -1,19 +1,23 @@
 #version 330 core
-out vec4 FragColor;
+out uvec4 FragColor;
 in vec2 TexCoords;
 
-uniform sampler2D u_state_texture;
+const uint STATE_DEAD = 0u;
+const uint STATE_ALIVE = 1u;
+
+uniform usampler2D u_state_texture;
 uniform vec2 u_grid_size;
 uniform vec2 u_flip_coord;
 
 void main(){
-    vec4 current_state = texture(u_state_texture, TexCoords);
-    vec2 current_grid_coord = floor(TexCoords * u_grid_size);
+    ivec2 current_grid_coord = ivec2(floor(TexCoords * u_grid_size));
+    uint current_state = texelFetch(u_state_texture, current_grid_coord, 0).r;
 
-    if (int(current_grid_coord.x) == int(u_flip_coord.x) && int(current_grid_coord.y) == int(u_flip_coord.y)){
-        FragColor = vec4(1.0 - current_state.rgb, 1.0);
+    if (current_grid_coord.x == int(u_flip_coord.x) && current_grid_coord.y == int(u_flip_coord.y)){
+        // Viva -> muerta, muerta o fantasma -> viva
+        FragColor = uvec4(current_state == STATE_ALIVE ? STATE_DEAD : STATE_ALIVE, 0u, 0u, 1u);
     } else {
-        FragColor = current_state;
+        FragColor = uvec4(current_state, 0u, 0u, 1u);
     }
 }
 
@@ -1,19 +1,25 @@
 #version 330 core
 // Salida
-out vec4 FragColor;
+out uvec4 FragColor;
 // Entrada
 in vec2 TexCoords;
 
+// Estados de la celda, un entero por celda (textura R8UI)
+const uint STATE_DEAD = 0u;
+const uint STATE_ALIVE = 1u;
+const uint STATE_GHOST = 2u; // Ha estado viva en algún momento
+
 // Parametros de entrada, se definen desde el programa principal
-uniform sampler2D u_state_texture; // Textura del estado actual
+uniform usampler2D u_state_texture; // Textura del estado actual
 uniform vec2 u_grid_size; // Tamaño del grid
 uniform int u_survive; // Numero de vecinos para sobrevivir
 uniform int u_birth; // Numero de vecinos para nacer
 
 void main(){
-    vec2 pixel_step = 1.0 / u_grid_size; // Tamaño de un pixel respecto al tamaño del grid
+    ivec2 grid_size = ivec2(u_grid_size);
+    ivec2 coord = ivec2(gl_FragCoord.xy); // Celda que le toca a este fragmento
     
-    float current_state = texture(u_state_texture, TexCoords).r; // El estado actual se obtiene con la intensidad del color
+    uint current_state = texelFetch(u_state_texture, coord, 0).r;
 
     int live_neighbors = 0;
     // Bucle para contar los vecinos vivos
@@ -23,30 +29,29 @@ void main(){
                // No se cuenta el pixel actual
                 continue;
             }
-            vec2 neighbor_coords = TexCoords + vec2(i, j) * pixel_step; // Coordenadas del vecino
+            ivec2 neighbor_coords = (coord + ivec2(i, j) + grid_size) % grid_size; // Coordenadas del vecino, los bordes son periodicos
             
-            if (texture(u_state_texture, neighbor_coords).r > 0.5){ // Si la intensidad del color es mayor a 0.5, el vecino esta vivo
+            if (texelFetch(u_state_texture, neighbor_coords, 0).r == STATE_ALIVE){
                 live_neighbors += 1;
             }
 
         }
     }
-    float new_state = 0.0;
+    uint new_state = STATE_DEAD;
     // Logica de cambio de estado
-    if (current_state > 0.5){// Si esta vivo
+    if (current_state == STATE_ALIVE){// Si esta vivo
         if (live_neighbors == u_survive || live_neighbors == u_birth){// Si tiene 2 o 3 vecinos vivos, sigue vivo
-            new_state = 1.0;
+            new_state = STATE_ALIVE;
         }else{
-            new_state = 0.3; // Muere, pero se ve gris para saber cuales han estado vivas en algún momento
+            new_state = STATE_GHOST; // Muere, pero se ve gris para saber cuales han estado vivas en algún momento
         }
     }else{// Si esta muerto
         if (live_neighbors == u_birth){// Si tiene exactamente 3 vecinos vivos, nace
-            new_state = 1.0;
-        } else if (current_state > 0.0){
+            new_state = STATE_ALIVE;
+        } else {
             new_state = current_state;
         }
     }
-    FragColor = vec4(vec3(new_state), 1.0);// Se asigna el nuevo estado al color de salida
+    FragColor = uvec4(new_state, 0u, 0u, 1u);// Se asigna el nuevo estado a la salida
 
 }
-
@@ -0,0 +1,62 @@
+#version 330 core
+// Variante de life_game.glsl para evaluar muchas reglas a la vez.
+// La textura es un atlas de casillas (tiles) del mismo tamaño, cada una es un grid
+// independiente con bordes periodicos y con su propia regla.
+// Salida
+out uvec4 FragColor;
+// Entrada
+in vec2 TexCoords;
+
+// Estados de la celda, los mismos que en life_game.glsl
+const uint STATE_DEAD = 0u;
+const uint STATE_ALIVE = 1u;
+const uint STATE_GHOST = 2u;
+
+// Parametros de entrada, se definen desde el programa principal
+uniform usampler2D u_state_texture; // Atlas con el estado actual de todas las casillas
+uniform usampler2D u_rule_texture; // Una texel por casilla: mascaras de 9 bits de supervivencia (r) y nacimiento (g)
+uniform ivec2 u_tile_size; // Tamaño de cada casilla (grid de una regla)
+
+void main(){
+    ivec2 coord = ivec2(gl_FragCoord.xy); // Celda del atlas
+    ivec2 tile = coord / u_tile_size; // Casilla a la que pertenece
+    ivec2 tile_origin = tile * u_tile_size;
+    ivec2 local_coord = coord - tile_origin; // Celda dentro de la casilla
+
+    uvec2 rule = texelFetch(u_rule_texture, tile, 0).rg;
+
+    uint current_state = texelFetch(u_state_texture, coord, 0).r;
+
+    int live_neighbors = 0;
+    // Bucle para contar los vecinos vivos, dando la vuelta dentro de la casilla
+    for (int i = -1; i <= 1; i++){
+        for (int j = -1; j <= 1; j++){
+            if (i == 0 && j == 0){
+                continue;
+            }
+            ivec2 neighbor_coords = tile_origin + (local_coord + ivec2(i, j) + u_tile_size) % u_tile_size;
+
+            if (texelFetch(u_state_texture, neighbor_coords, 0).r == STATE_ALIVE){
+                live_neighbors += 1;
+            }
+        }
+    }
+
+    uint neighbor_bit = 1u << uint(live_neighbors);
+    uint new_state = STATE_DEAD;
+    // Logica de cambio de estado, la misma que en life_game.glsl pero con mascaras
+    if (current_state == STATE_ALIVE){// Si esta vivo
+        if ((rule.r & neighbor_bit) != 0u){
+            new_state = STATE_ALIVE;
+        }else{
+            new_state = STATE_GHOST; // Muere, pero queda como fantasma
+        }
+    }else{// Si esta muerto
+        if ((rule.g & neighbor_bit) != 0u){
+            new_state = STATE_ALIVE;
+        }else{
+            new_state = current_state;
+        }
+    }
+    FragColor = uvec4(new_state, 0u, 0u, 1u);
+}
@@ -0,0 +1,26 @@
+#version 330 core
+// Pasadas siguientes de la reduccion: suma los enteros de cada bloque
+// de u_block x u_block texels de la pasada anterior (celdas vivas en r y hash en g y b)
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_source_texture; // Sumas parciales de la pasada anterior
+uniform ivec2 u_source_size; // Tamaño de la textura de entrada
+uniform int u_block; // Lado del bloque que suma cada fragmento
+uniform ivec2 u_output_offset; // Posicion de la salida (para escribir en el buffer circular)
+
+void main(){
+    ivec2 start = (ivec2(gl_FragCoord.xy) - u_output_offset) * u_block;
+
+    uvec3 total = uvec3(0u);
+    for (int y = 0; y < u_block; y++){
+        for (int x = 0; x < u_block; x++){
+            ivec2 coord = start + ivec2(x, y);
+            if (coord.x >= u_source_size.x || coord.y >= u_source_size.y){
+                continue;
+            }
+            total += texelFetch(u_source_texture, coord, 0).rgb;
+        }
+    }
+    FragColor = uvec4(total, 1u);
+}
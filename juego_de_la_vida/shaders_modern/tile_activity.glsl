@@ -0,0 +1,42 @@
+#version 330 core
+// Marca los bloques que han cambiado en el ultimo paso (un fragmento por bloque).
+// Los bloques que no se han recalculado no pueden haber cambiado
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_previous_texture; // Estado antes del paso
+uniform usampler2D u_next_texture; // Estado despues del paso
+uniform usampler2D u_changed_texture; // Bloques que cambiaron en el paso anterior
+uniform ivec2 u_tiles; // Numero de bloques en x e y
+uniform ivec2 u_tile_size; // Celdas de cada bloque
+uniform ivec2 u_grid_size; // Tamaño del grid
+
+void main(){
+    ivec2 tile = ivec2(gl_FragCoord.xy);
+
+    // Misma condicion que en tile_vertex.glsl
+    bool is_active = false;
+    for (int i = -1; i <= 1; i++){
+        for (int j = -1; j <= 1; j++){
+            ivec2 neighbor_tile = (tile + ivec2(i, j) + u_tiles) % u_tiles;
+            if (texelFetch(u_changed_texture, neighbor_tile, 0).r != 0u){
+                is_active = true;
+            }
+        }
+    }
+
+    uint changed = 0u;
+    if (is_active){
+        ivec2 start = tile * u_tile_size;
+        ivec2 end = min(start + u_tile_size, u_grid_size);
+        for (int y = start.y; y < end.y && changed == 0u; y++){
+            for (int x = start.x; x < end.x; x++){
+                if (texelFetch(u_previous_texture, ivec2(x, y), 0).r != texelFetch(u_next_texture, ivec2(x, y), 0).r){
+                    changed = 1u;
+                    break;
+                }
+            }
+        }
+    }
+    FragColor = uvec4(changed, 0u, 0u, 1u);
+}
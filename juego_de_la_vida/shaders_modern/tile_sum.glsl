@@ -0,0 +1,28 @@
+#version 330 core
+// Suma por bloques para contar las celdas vivas de cada casilla del atlas.
+// Cada fragmento de salida suma u_length texels de la textura de entrada
+// empezando en gl_FragCoord * u_block y avanzando u_step.
+// Con dos pasadas (filas y luego columnas) se obtiene una suma por casilla.
+out uvec4 FragColor;
+in vec2 TexCoords;
+
+uniform usampler2D u_source_texture; // Estado (R8UI) o sumas parciales (R32UI)
+uniform ivec2 u_block; // Tamaño del bloque que le toca a cada fragmento
+uniform ivec2 u_step; // Direccion de la suma: (1, 0) filas, (0, 1) columnas
+uniform int u_length; // Numero de texels a sumar
+uniform bool u_count_alive; // Si es true se cuentan celdas vivas (estado 1), si no se suman los valores
+
+void main(){
+    ivec2 start = ivec2(gl_FragCoord.xy) * u_block;
+
+    uint total = 0u;
+    for (int i = 0; i < u_length; i++){
+        uint value = texelFetch(u_source_texture, start + i * u_step, 0).r;
+        if (u_count_alive){
+            total += value == 1u ? 1u : 0u;
+        }else{
+            total += value;
+        }
+    }
+    FragColor = uvec4(total, 0u, 0u, 1u);
+}
@@ -0,0 +1,35 @@
+#version 330 core
+// Vertex shader del modo por bloques: cada instancia es un bloque de u_tile_size celdas.
+// Los bloques en los que ni ellos ni sus vecinos cambiaron en el paso anterior se
+// colapsan fuera de la pantalla y no generan fragmentos, asi que no se recalculan
+layout (location = 0) in vec2 aPos; // Esquina del bloque (0 o 1 en cada eje)
+out vec2 TexCoords;
+
+uniform usampler2D u_changed_texture; // 1 si el bloque cambio en el paso anterior
+uniform ivec2 u_tiles; // Numero de bloques en x e y
+uniform ivec2 u_tile_size; // Celdas de cada bloque
+uniform vec2 u_grid_size; // Tamaño del grid
+
+void main()
+{
+    ivec2 tile = ivec2(gl_InstanceID % u_tiles.x, gl_InstanceID / u_tiles.x);
+
+    bool is_active = false;
+    for (int i = -1; i <= 1; i++){
+        for (int j = -1; j <= 1; j++){
+            ivec2 neighbor_tile = (tile + ivec2(i, j) + u_tiles) % u_tiles; // Los bordes son periodicos
+            if (texelFetch(u_changed_texture, neighbor_tile, 0).r != 0u){
+                is_active = true;
+            }
+        }
+    }
+
+    // El ultimo bloque de cada eje puede ser mas pequeño
+    vec2 corner = min(vec2((tile + ivec2(aPos)) * u_tile_size), u_grid_size);
+    TexCoords = corner / u_grid_size;
+    if (is_active){
+        gl_Position = vec4(TexCoords * 2.0 - 1.0, 0.0, 1.0);
+    }else{
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0); // Fuera del volumen de recorte
+    }
+}
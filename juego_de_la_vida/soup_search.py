@@ -0,0 +1,154 @@
+"""
+Busqueda en sopas: estadisticas de muchas sopas pequeñas de una misma regla.
+
+En vez de un grid grande por configuracion, se generan sopas aleatorias de
+SOUP_SIZE x SOUP_SIZE en el centro de un grid periodico de SOUP_BOUNDS x SOUP_BOUNDS
+y se dejan evolucionar hasta que se estabilizan. De cada una se guarda la poblacion
+final, la generacion en la que se estabilizo y el censo de objetos de su ceniza.
+
+Las sopas se avanzan juntas con LifeEnsemble (64 por palabra). Para saber cuales
+se han estabilizado se compara el estado con el de hace lag generaciones para
+cada lag de stability_lags: un XOR de cada palabra y un OR de todas las palabras
+dicen, para las 64 sopas a la vez, cuales han cambiado. Con STABILITY_PERIOD se
+detecta la ceniza de periodo 1, 2, 3, 4, 5, 6, 15... y con 4 * mcm(ancho, alto) la
+que ademas tiene planeadores o naves dando vueltas al grid. Cuando las sopas que
+quedan caben en menos palabras se vuelven a empaquetar sin las terminadas, asi que
+cada vez se simulan menos palabras.
+"""
+
+from collections import Counter
+from math import lcm
+
+import numpy as np
+
+from bit_life import WORD_BITS
+from life_ensemble import LifeEnsemble, pack_replicas, unpack_replicas
+
+SOUP_SIZE = 16 # Lado de la zona aleatoria de cada sopa
+SOUP_BOUNDS = 64 # Lado del grid periodico en el que evoluciona
+SOUP_DENSITY = 0.5
+SOUPS_PER_BATCH = 64 * WORD_BITS # Sopas que se simulan juntas (64 palabras por celda)
+STABILITY_PERIOD = 60 # Multiplo de los periodos de la ceniza habitual (1, 2, 3, 4, 5, 6, 15...)
+MAX_SOUP_GENERATIONS = 10_000 # Las sopas que no se estabilizan antes se dan por terminadas
+
+
+def random_soups(num_soups: int, rng: np.random.Generator, soup_size: int = SOUP_SIZE,
+                 bounds: int = SOUP_BOUNDS, density: float = SOUP_DENSITY) -> np.ndarray:
+    """
+    Sopas aleatorias (num_soups, bounds, bounds) con la zona aleatoria en el centro
+    """
+    cells = np.zeros((num_soups, bounds, bounds), dtype=bool)
+    start = (bounds - soup_size) // 2
+    cells[:, start:start + soup_size, start:start + soup_size] = rng.random((num_soups, soup_size, soup_size)) < density
+    return cells
+
+
+def stability_lags(width: int, height: int):
+    """
+    Lags con los que se comparan los estados: la ceniza y un planeador (o una nave
+    ortogonal) que vuelve a su sitio tras dar la vuelta al grid periodico
+    """
+    return (STABILITY_PERIOD, 4 * lcm(width, height))
+
+
+def _changed_replicas(words: np.ndarray, previous: np.ndarray, num_replicas: int) -> np.ndarray:
+    """
+    Para cada replica, si alguna celda es distinta entre los dos estados empaquetados
+    """
+    changed = np.bitwise_or.reduce((words ^ previous).reshape(len(words), -1), axis=1)
+    bits = np.unpackbits(changed.astype('<u8').view(np.uint8), bitorder='little')
+    return bits[:num_replicas].astype(bool)
+
+
+class SoupResults:
+    """
+    Resultados de un conjunto de sopas de una regla. generations es la generacion a
+    partir de la que cada sopa es periodica (-1 si no se estabilizo)
+    """
+
+    def __init__(self, populations: np.ndarray, generations: np.ndarray, objects: Counter = None,
+                 soups_with: Counter = None, kinds: dict = None):
+        self.populations = populations
+        self.generations = generations
+        self.objects = Counter() if objects is None else objects # Objetos de cada tipo en total
+        self.soups_with = Counter() if soups_with is None else soups_with # Sopas en las que aparece cada objeto
+        self.kinds = {} if kinds is None else kinds # Nombre -> tipo
+
+    def __len__(self):
+        return len(self.populations)
+
+    def merge(self, other: 'SoupResults') -> 'SoupResults':
+        """
+        Une los resultados de otro lote de sopas de la misma regla (a continuacion)
+        """
+        return SoupResults(np.concatenate((self.populations, other.populations)),
+                           np.concatenate((self.generations, other.generations)),
+                           self.objects + other.objects, self.soups_with + other.soups_with,
+                           {**self.kinds, **other.kinds})
+
+
+def run_soups(cells: np.ndarray, survive: int = 2, birth: int = 3, census=None,
+              max_generations: int = MAX_SOUP_GENERATIONS) -> SoupResults:
+    """
+    Avanza las sopas (n, alto, ancho) hasta que se estabilizan o llegan a max_generations.
+    Si se da un ObjectCensus de la misma regla se hace el censo de la ceniza de cada sopa
+    """
+    cells = np.asarray(cells, dtype=bool)
+    num_soups, height, width = cells.shape
+    lags = stability_lags(width, height)
+
+    populations = np.zeros(num_soups, dtype=np.int64)
+    generations = np.full(num_soups, -1, dtype=np.int64)
+    results = SoupResults(populations, generations)
+
+    ensemble = LifeEnsemble(width, height, num_replicas=num_soups, survive=survive, birth=birth)
+    ensemble.set_cells(cells)
+    soup_ids = np.arange(num_soups) # Sopa de cada replica del conjunto
+    active = np.ones(num_soups, dtype=bool) # Replicas que todavia no se han estabilizado
+    snapshots = {lag: ensemble.alive.copy() for lag in lags} # Estado en el ultimo multiplo de cada lag
+    generation = 0
+
+    while active.any():
+        # Avanzar hasta el siguiente multiplo de algun lag
+        next_check = min(min((generation // lag + 1) * lag for lag in lags), max_generations)
+        for _ in range(next_check - generation):
+            ensemble.step()
+        generation = next_check
+
+        # Generacion desde la que cada replica es periodica (la mas temprana que se sabe)
+        periodic_since = np.full(len(soup_ids), -1, dtype=np.int64)
+        for lag in sorted(lags):
+            if generation % lag == 0:
+                repeated = ~_changed_replicas(ensemble.alive, snapshots[lag], len(soup_ids))
+                periodic_since[repeated] = generation - lag
+                snapshots[lag] = ensemble.alive.copy()
+
+        finished = active & (periodic_since >= 0)
+        if generation >= max_generations:
+            finished = active.copy()
+        if not finished.any():
+            continue
+
+        current = ensemble.get_cells()
+        done = soup_ids[finished]
+        populations[done] = current[finished].sum(axis=(1, 2))
+        generations[done] = periodic_since[finished]
+        if census is not None:
+            for soup_census in census.census_stack(current[finished]):
+                results.objects.update(soup_census)
+                results.soups_with.update(soup_census.keys())
+        active &= ~finished
+
+        # Las terminadas siguen en el conjunto (son periodicas) hasta que quitarlas ahorra palabras
+        num_active = int(active.sum())
+        if num_active and (num_active + WORD_BITS - 1) // WORD_BITS < ensemble.num_batches:
+            soup_ids = soup_ids[active]
+            ensemble = LifeEnsemble(width, height, num_replicas=num_active, survive=survive, birth=birth)
+            ensemble.set_cells(current[active])
+            snapshots = {lag: pack_replicas(unpack_replicas(snapshot, len(active))[active])
+                         for lag, snapshot in snapshots.items()}
+            active = np.ones(num_active, dtype=bool)
+
+    if census is not None:
+        results.kinds = dict(census.kinds)
+    return results
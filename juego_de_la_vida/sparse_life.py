@@ -0,0 +1,118 @@
+"""
+Juego de la Vida en CPU que solo recalcula las zonas activas del grid.
+
+El grid empaquetado de bit_life se divide en bloques de TILE_ROWS filas por una
+palabra de 64 celdas. Un bloque solo se recalcula si en el paso anterior cambio
+el o alguno de sus 8 vecinos: si ninguna celda de su entorno ha cambiado, su
+siguiente estado es el mismo que el actual. Cuando una sopa se ha quedado en
+ceniza casi todos los bloques estan quietos y el coste de cada paso depende de
+la actividad, no del area.
+
+Los resultados son exactamente los mismos que los de BitLifeEngine.
+"""
+
+import numpy as np
+
+from bit_life import BitLifeEngine, step_rows
+
+TILE_ROWS = 32 # Filas de cada bloque (el ancho es una palabra, 64 celdas)
+# Por encima de esta proporcion de bloques activos sale mas a cuenta avanzar todo el grid
+DENSE_FRACTION = 0.5
+
+
+class SparseBitLifeEngine(BitLifeEngine):
+    """
+    BitLifeEngine con una mascara de bloques activos
+    """
+
+    def __init__(self, width: int, height: int, survive: int = 2, birth: int = 3, tile_rows: int = TILE_ROWS):
+        super().__init__(width, height, survive, birth)
+        self.tile_rows = tile_rows
+        self.tiles_y = (height + tile_rows - 1) // tile_rows
+        # Un bloque esta activo si hay que recalcularlo en el siguiente paso
+        self.active_tiles = np.ones((self.tiles_y, self.num_words), dtype=bool)
+        self._last_rule_masks = None
+
+        # Filas que lee cada fila de bloques (con el halo periodico de arriba y abajo)
+        offsets = np.arange(-1, tile_rows + 1)
+        self._tile_row_idx = (np.arange(self.tiles_y)[:, None] * tile_rows + offsets) % height
+
+    def mark_all_active(self):
+        """
+        Hay que llamarla si se modifica el estado a mano (alive) sin pasar por set_cells
+        """
+        self.active_tiles[:] = True
+
+    def set_cells(self, cells: np.ndarray):
+        super().set_cells(cells)
+        self.mark_all_active()
+
+    def active_fraction(self) -> float:
+        return float(self.active_tiles.mean())
+
+    def step(self):
+        """
+        Avanza una generacion recalculando solo los bloques activos
+        """
+        survive_mask, birth_mask = self.rule_masks
+        if (survive_mask, birth_mask) != self._last_rule_masks:
+            # Con otra regla el estado quieto deja de serlo
+            self.mark_all_active()
+            self._last_rule_masks = (survive_mask, birth_mask)
+
+        if self.active_fraction() > DENSE_FRACTION:
+            self._dense_step()
+            return
+
+        tile_y, word = np.nonzero(self.active_tiles)
+        if len(tile_y) == 0:
+            self.iteration_count += 1
+            return
+
+        # (bloques, filas + 2, 1): cada bloque activo con su halo
+        row_idx = self._tile_row_idx[tile_y]
+        rows = self.alive[row_idx, word[:, None]][..., None]
+        west_words = self.alive[row_idx, self._west_src[word][:, None]][..., None]
+        east_words = self.alive[row_idx, self._east_src[word][:, None]][..., None]
+        shape = (-1, 1, 1)
+        new_rows = step_rows(rows, west_words, east_words,
+                             self._west_bit[word].reshape(shape), self._east_bit[word].reshape(shape),
+                             self._valid_mask[word].reshape(shape), survive_mask, birth_mask)[..., 0]
+
+        # El ultimo bloque puede tener filas de mas (que vuelven a empezar por arriba)
+        out_rows = row_idx[:, 1:-1]
+        inside = (tile_y[:, None] * self.tile_rows + np.arange(self.tile_rows)) < self.height
+        old_rows = rows[:, 1:-1, 0]
+        changed = ((new_rows != old_rows) & inside).any(axis=1)
+
+        target_rows = out_rows[inside]
+        target_words = np.broadcast_to(word[:, None], out_rows.shape)[inside]
+        self.alive[target_rows, target_words] = new_rows[inside]
+        self.visited[target_rows, target_words] |= new_rows[inside]
+
+        changed_tiles = np.zeros_like(self.active_tiles)
+        changed_tiles[tile_y[changed], word[changed]] = True
+        self._activate_neighbours(changed_tiles)
+        self.iteration_count += 1
+
+    def _dense_step(self):
+        """
+        Paso normal de BitLifeEngine, comparando despues que bloques han cambiado
+        """
+        old_alive = self.alive
+        super().step()
+        changed_rows = np.zeros((self.tiles_y * self.tile_rows, self.num_words), dtype=bool)
+        changed_rows[:self.height] = old_alive != self.alive
+        self._activate_neighbours(changed_rows.reshape(self.tiles_y, self.tile_rows, self.num_words).any(axis=1))
+
+    def _activate_neighbours(self, changed_tiles: np.ndarray):
+        """
+        Los bloques que han cambiado activan a sus vecinos para el siguiente paso (bordes periodicos)
+        """
+        active = changed_tiles.copy()
+        for dy in (-1, 0, 1):
+            shifted = np.roll(changed_tiles, dy, axis=0)
+            for dx in (-1, 0, 1):
+                if dy or dx:
+                    active |= np.roll(shifted, dx, axis=1)
+        self.active_tiles = active
@@ -0,0 +1,117 @@
+"""
+Deteccion del tramo final estable de una serie de celdas vivas.
+
+Una serie se considera estable a partir del primer tramo de max_stable_iterations
+pasos seguidos en los que el cambio relativo respecto al valor anterior no supera
+min_relative_change (si el valor anterior es 0 se usa el cambio absoluto). El indice
+de corte es el primer elemento de ese tramo.
+
+stable_cutoff lo calcula de golpe sobre un array (sin bucles de Python) y
+StableTailTracker lo va calculando a medida que llegan los valores, para que
+SeriesWriter lo tenga ya calculado al cerrar la serie.
+"""
+
+import numpy as np
+
+MAX_STABLE_ITERATIONS = 50
+MIN_RELATIVE_CHANGE = 0.001
+
+
+def _stable_steps(values: np.ndarray, min_relative_change: float) -> np.ndarray:
+    """
+    Para cada paso values[i - 1] -> values[i], si el cambio relativo es apreciable o no
+    """
+    previous, current = values[:-1], values[1:]
+    change = np.abs(current - previous)
+    magnitude = np.abs(previous)
+    relative_change = np.divide(change, magnitude, out=change.copy(), where=magnitude != 0)
+    return relative_change <= min_relative_change
+
+
+def _run_lengths(stable: np.ndarray, carry: int = 0) -> np.ndarray:
+    """
+    Longitud del tramo de pasos estables que acaba en cada posicion. carry es la
+    longitud del tramo que venia de antes (se suma hasta el primer paso no estable)
+    """
+    counts = np.cumsum(stable, dtype=np.int64)
+    # En cada paso no estable se reinicia: se resta el acumulado en el ultimo reinicio
+    resets = np.maximum.accumulate(np.where(stable, 0, counts))
+    runs = counts - resets
+    first_reset = np.argmin(stable) if not stable.all() else len(stable)
+    runs[:first_reset] += carry
+    return runs
+
+
+def stable_cutoff(values, max_stable_iterations=MAX_STABLE_ITERATIONS,
+                  min_relative_change=MIN_RELATIVE_CHANGE) -> int:
+    """
+    Indice donde empieza el tramo final estable, o len(values) si no lo hay
+    """
+    tracker = StableTailTracker(max_stable_iterations, min_relative_change)
+    tracker.extend(values)
+    return tracker.cutoff_index
+
+
+class StableTailTracker:
+    """
+    Version incremental de stable_cutoff: se le van dando los valores con update o
+    extend y cutoff_index es el corte de todo lo recibido hasta ahora. Una vez
+    encontrado el tramo estable el corte ya no cambia y los nuevos valores solo se cuentan
+    """
+
+    def __init__(self, max_stable_iterations=MAX_STABLE_ITERATIONS, min_relative_change=MIN_RELATIVE_CHANGE):
+        self.max_stable_iterations = max_stable_iterations
+        self.min_relative_change = min_relative_change
+        self.num_values = 0
+        self.stable_count = 0 # Pasos estables seguidos al final de lo recibido
+        self.found_cutoff = None
+        self._previous = None
+
+    @property
+    def cutoff_index(self) -> int:
+        return self.num_values if self.found_cutoff is None else self.found_cutoff
+
+    def update(self, value):
+        """
+        Añade un valor (sin pasar por numpy, para llamarlo en cada generacion)
+        """
+        value = float(value)
+        if self.found_cutoff is None and self._previous is not None:
+            if self._previous == 0:
+                relative_change = abs(value - self._previous)
+            else:
+                relative_change = abs(value - self._previous) / abs(self._previous)
+            if relative_change <= self.min_relative_change:
+                self.stable_count += 1
+                if self.stable_count >= self.max_stable_iterations:
+                    self.found_cutoff = self.num_values - self.max_stable_iterations + 1
+            else:
+                self.stable_count = 0
+        self._previous = value
+        self.num_values += 1
+
+    def extend(self, values):
+        """
+        Añade un bloque de valores de golpe
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+        if self.found_cutoff is None:
+            # Indice en la serie completa del primer valor de chain
+            if self._previous is None:
+                chain, first_index = values, self.num_values
+            else:
+                chain, first_index = np.concatenate(([self._previous], values)), self.num_values - 1
+
+            stable = _stable_steps(chain, self.min_relative_change)
+            if len(stable):
+                runs = _run_lengths(stable, self.stable_count)
+                hits = np.flatnonzero(runs >= self.max_stable_iterations)
+                if len(hits):
+                    # El paso k acaba en chain[k + 1]
+                    self.found_cutoff = first_index + int(hits[0]) + 1 - self.max_stable_iterations + 1
+                else:
+                    self.stable_count = int(runs[-1])
+        self._previous = float(values[-1])
+        self.num_values += len(values)
@@ -0,0 +1,226 @@
+"""
+Grabacion de trayectorias del Juego de la Vida: todas las generaciones de una
+simulacion en disco, para poder volver atras en la interfaz o analizarlas sin
+volver a simular.
+
+Cada generacion se guarda empaquetada en bits (pack_rows de bit_life, la fila 0
+arriba) como:
+
+    - Un fotograma clave con el estado completo cada keyframe_interval generaciones.
+    - Entre medias, solo las palabras que cambian respecto a la generacion anterior
+      (XOR): los indices uint32 de las palabras y su XOR uint64. Cuando la sopa ya
+      es ceniza casi no cambia nada y cada generacion ocupa unos pocos bytes.
+      Si la diferencia ocupa mas que el estado completo se guarda un fotograma clave.
+
+Los datos van en el archivo de la trayectoria y el indice de cada generacion
+(posicion, tamaño, si es clave) en el mismo nombre con '.idx'. Los dos se leen
+con np.memmap; para reconstruir una generacion se parte del ultimo fotograma
+clave y se aplican como mucho keyframe_interval - 1 diferencias.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from bit_life import WORD_BITS, pack_rows, unpack_rows
+
+TRAJECTORY_EXTENSION = '.golt'
+KEYFRAME_INTERVAL = 256 # Generaciones entre fotogramas clave
+
+HEADER_SIZE = 32
+_MAGIC = b'GOLTRAJ1'
+_HEADER_FORMAT = '<8sIII' # magic, ancho, alto, generaciones entre fotogramas clave
+_INDEX_DTYPE = np.dtype([('offset', '<u8'), ('size', '<u4'), ('keyframe', '<u4')])
+_DELTA_ENTRY_SIZE = 12 # uint32 de indice + uint64 de XOR
+
+
+def index_path(file_path: str) -> str:
+    return file_path + '.idx'
+
+
+class Trajectory:
+    """
+    Lectura de una trayectoria grabada. trajectory[g] devuelve la generacion g como
+    matriz booleana (alto, ancho) y trajectory[a:b:paso] un array (generaciones, alto, ancho)
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{file_path} no es una trayectoria del Juego de la Vida")
+        _, self.width, self.height, self.keyframe_interval = struct.unpack_from(_HEADER_FORMAT, header)
+        self.num_words = (self.width + WORD_BITS - 1) // WORD_BITS
+        self.refresh()
+
+    def refresh(self):
+        """
+        Vuelve a mapear los archivos (por si se han añadido generaciones desde que se abrio)
+        """
+        num_frames = os.path.getsize(index_path(self.file_path)) // _INDEX_DTYPE.itemsize
+        data_size = os.path.getsize(self.file_path)
+        if num_frames == 0:
+            self.index = np.zeros(0, dtype=_INDEX_DTYPE)
+            self.data = np.zeros(0, dtype=np.uint8)
+        else:
+            self.index = np.memmap(index_path(self.file_path), dtype=_INDEX_DTYPE, mode='r', shape=(num_frames,))
+            self.data = np.memmap(self.file_path, dtype=np.uint8, mode='r', shape=(data_size,))
+        self._keyframes = np.flatnonzero(self.index['keyframe'])
+        self._cache = None # (generacion, palabras) de la ultima generacion reconstruida
+
+    def __len__(self):
+        return len(self.index)
+
+    def _apply(self, words: np.ndarray, generation: int):
+        """
+        Aplica sobre words (plano) el registro de la generacion: lo sustituye si es clave
+        """
+        offset, size, keyframe = self.index[generation]
+        raw = self.data[offset:offset + size]
+        if keyframe:
+            words[:] = np.frombuffer(raw, dtype='<u8')
+        else:
+            num_changes = size // _DELTA_ENTRY_SIZE
+            positions = np.frombuffer(raw, dtype='<u4', count=num_changes)
+            words[positions] ^= np.frombuffer(raw, dtype='<u8', offset=4 * num_changes)
+
+    def packed_frame(self, generation: int) -> np.ndarray:
+        """
+        Generacion empaquetada (alto, palabras) de uint64
+        """
+        if generation < 0:
+            generation += len(self)
+        if not 0 <= generation < len(self):
+            raise IndexError(f"La trayectoria tiene {len(self)} generaciones")
+
+        # Seguir desde la ultima generacion reconstruida si no hay un fotograma clave entre medias
+        start = self._keyframes[np.searchsorted(self._keyframes, generation, side='right') - 1]
+        if self._cache is not None and start <= self._cache[0] <= generation:
+            first, words = self._cache[0] + 1, self._cache[1].copy()
+        else:
+            first, words = start, np.zeros(self.height * self.num_words, dtype=np.uint64)
+        for g in range(first, generation + 1):
+            self._apply(words, g)
+
+        self._cache = (generation, words)
+        return words.reshape(self.height, self.num_words).copy()
+
+    def frame(self, generation: int) -> np.ndarray:
+        return unpack_rows(self.packed_frame(generation), self.width)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            generations = range(*key.indices(len(self)))
+            frames = np.empty((len(generations), self.height, self.width), dtype=bool)
+            for idx, generation in enumerate(generations):
+                frames[idx] = self.frame(generation)
+            return frames
+        return self.frame(key)
+
+    def live_counts(self) -> np.ndarray:
+        """
+        Celdas vivas de cada generacion, recorriendo la trayectoria una sola vez
+        """
+        counts = np.empty(len(self), dtype=np.int64)
+        words = np.zeros(self.height * self.num_words, dtype=np.uint64)
+        for generation in range(len(self)):
+            self._apply(words, generation)
+            counts[generation] = int(np.bitwise_count(words).sum())
+        return counts
+
+
+class TrajectoryRecorder:
+    """
+    Graba una trayectoria generacion a generacion (append) en file_path
+    """
+
+    def __init__(self, file_path: str, width: int, height: int, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.file_path = file_path
+        self.width = width
+        self.height = height
+        self.keyframe_interval = keyframe_interval
+        self.num_frames = 0
+        self._previous = None # Ultima generacion grabada, empaquetada y en plano
+        self._reader = None
+
+        self._data_file = open(file_path, 'wb')
+        self._data_file.write(struct.pack(_HEADER_FORMAT, _MAGIC, width, height, keyframe_interval).ljust(HEADER_SIZE, b'\0'))
+        self._index_file = open(index_path(file_path), 'wb')
+
+    def __len__(self):
+        return self.num_frames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, cells: np.ndarray):
+        """
+        Añade una generacion (matriz booleana (alto, ancho), fila 0 arriba)
+        """
+        words = pack_rows(np.asarray(cells, dtype=bool)).ravel()
+        keyframe = self._previous is None or self.num_frames % self.keyframe_interval == 0
+        if not keyframe:
+            changed = np.flatnonzero(words != self._previous)
+            if len(changed) * _DELTA_ENTRY_SIZE >= words.nbytes:
+                keyframe = True
+            else:
+                record = changed.astype('<u4').tobytes() + (words[changed] ^ self._previous[changed]).astype('<u8').tobytes()
+        if keyframe:
+            record = words.astype('<u8').tobytes()
+
+        offset = self._data_file.tell()
+        self._data_file.write(record)
+        entry = np.array([(offset, len(record), int(keyframe))], dtype=_INDEX_DTYPE)
+        self._index_file.write(entry.tobytes())
+        self._previous = words
+        self.num_frames += 1
+
+    def flush(self):
+        self._data_file.flush()
+        self._index_file.flush()
+
+    def reader(self) -> Trajectory:
+        """
+        Lector de lo grabado hasta ahora (se actualiza en cada llamada)
+        """
+        self.flush()
+        if self._reader is None:
+            self._reader = Trajectory(self.file_path)
+        else:
+            self._reader.refresh()
+        return self._reader
+
+    def frame(self, generation: int) -> np.ndarray:
+        return self.reader().frame(generation)
+
+    def truncate(self, num_frames: int):
+        """
+        Descarta las generaciones a partir de num_frames (para seguir grabando desde ahi)
+        """
+        if num_frames >= self.num_frames:
+            return
+        if num_frames > 0:
+            self._previous = self.reader().packed_frame(num_frames - 1).ravel()
+            data_size = int(self._reader.index[num_frames]['offset'])
+        else:
+            self._previous = None
+            data_size = HEADER_SIZE
+        # Soltar los memmap antes de recortar los archivos
+        self._reader = None
+
+        self._data_file.truncate(data_size)
+        self._data_file.seek(data_size)
+        self._index_file.truncate(num_frames * _INDEX_DTYPE.itemsize)
+        self._index_file.seek(num_frames * _INDEX_DTYPE.itemsize)
+        self.num_frames = num_frames
+
+    def close(self):
+        self._reader = None
+        for f in (self._data_file, self._index_file):
+            if not f.closed:
+                f.close()